@@ -2,6 +2,7 @@ import pygame
 import os
 
 from utils import *
+from atlas import sprite_atlas
 
 class Sprite(pygame.sprite.Sprite): # Sprites class
     def __init__(self, image, pos):
@@ -18,98 +19,60 @@ class Button():
         self.rect = self.image.get_rect()
         self.rect.topleft = (x, y)
 
-white_pieces_surface = {}
-black_pieces_surface = {}
+def piece_image(piece_name: str) -> pygame.Surface: # Image of a piece at the current square size (atlas cell)
+    return sprite_atlas.image(get_piece_kind(piece_name))
 
 class UI: # User Interface class
     def __init__(self) -> None:
         # Instance varaible initialization
-        self.board_surface = pygame.Surface(
-            (8 * SQUARE_SIZE + 50, 8 * SQUARE_SIZE + 50)) # Chess board (whole)
+        self.board_surface = None # Chess board (whole), drawn for the board view
 
-    def chess_board(self) -> tuple[pygame.Surface, dict]:
-        square_rects_dict.clear() # Reset rects dictionary
+    def chess_board(self) -> tuple[pygame.Surface, dict]: # Draws the board for the current board view (size, orientation)
+        size = board_view.square_size
+        self.board_surface = pygame.Surface((8 * size + NOTATION_MARGIN, 8 * size + NOTATION_MARGIN))
         self.board_surface.fill(GRAY)
 
         # Creating the 64 squares of the chess board
-        for row in range(8):
-            for col in range(8):
-                square_color = LIGHT_SQUARE_COLOR if (row + col) % 2 == 0 else DARK_SQUARE_COLOR
-                square_rect = pygame.Rect(50 + col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
-                pygame.draw.rect(self.board_surface, square_color, square_rect)
-                square_coord = f"{chr(97 + col)}{8 - row}"
-                square_rects_dict[square_coord] = square_rect # Storing square coords and rects
+        for index in range(64):
+            col, row = board_view.cell(index)
+            square_color = LIGHT_SQUARE_COLOR if (index % 8 + index // 8) % 2 else DARK_SQUARE_COLOR
+            square_rect = pygame.Rect(NOTATION_MARGIN + col * size, row * size, size, size)
+            pygame.draw.rect(self.board_surface, square_color, square_rect)
 
         self.add_notations() # Adding board notations
-
-        # Adjusting to offset of the board
-        count = 0
-        for square_coord, square_rect in square_rects_dict.items():
-            square_rect.x +=  BOARD_OFFSET_X
-            square_rect.y += BOARD_OFFSET_Y
-            if count == 63:
-                break
-            count += 1
-
         return self.board_surface, square_rects_dict
 
     def add_notations(self) -> None: # Board notations (Ranks & Files)
-        # Ranks (Y axis)
-        rank_left_margin = 10
-        starting_rank = 8
-        rank_top_margin = 30
-
-        # Files (X axis)
-        files = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']
-        file_count = 0
-        file_top_margin = 660
-        file_left_margin = 80
-
-        for row in range(9):
-            if row < 8:
-                rank = FONT32.render(str(starting_rank), True, WHITE)
-                self.board_surface.blit(rank, (rank_left_margin, rank_top_margin))
-
-                rank_top_margin = 30 + (row + 1) * SQUARE_SIZE
-                starting_rank -= 1 # Ranks in decreasing order (top - bottom)
-            else:
-                for col in range(8):
-                    file = FONT32.render(files[file_count], True, WHITE)
-                    self.board_surface.blit(file, (file_left_margin, file_top_margin))
-
-                    file_left_margin = 80 + (col + 1) * SQUARE_SIZE
-                    file_count += 1 # Files in alphabetic order (left - right)
-
-    def load_white_pieces(self) -> None: # Loading image (Surface) of white pieces
-        white_pieces_png = [png for png in PIECE_FILES if "w_" in png]
-        for piece in white_pieces_png:
-            piece_name = piece[:-4]
-            white_pieces_surface[piece_name] = pygame.image.load(os.path.join("assets", "chess_pieces", piece)).convert_alpha()
-
-    def load_black_pieces(self) -> None: # Loading image (Surface) of black pieces
-        black_pieces_png = [png for png in PIECE_FILES if "b_" in png]
-        for piece in black_pieces_png:
-            piece_name = piece[:-4]
-            black_pieces_surface[piece_name] = pygame.image.load(os.path.join("assets", "chess_pieces", piece)).convert_alpha()
-
-    def initialize_pieces(self) -> pygame.sprite.Group: # Rendering pieces on chess board
+        size = board_view.square_size
+        font = resources.font(32)
+        for index in range(8):
+            col, row = board_view.cell(index * 8) # Ranks (Y axis)
+            rank = font.render(RANKS[index], True, WHITE)
+            self.board_surface.blit(rank, (10, row * size + size // 2 - 10))
+
+            col, row = board_view.cell(index) # Files (X axis)
+            file = font.render(FILES[index], True, WHITE)
+            self.board_surface.blit(file, (NOTATION_MARGIN + col * size + size // 2 - 10, 8 * size + 20))
+
+    def initialize_pieces(self, fen: str = None) -> pygame.sprite.Group: # Rendering pieces on chess board (start position or FEN)
         chess_pieces_dict.clear()
-
-        # White Sprite
-        self.load_white_pieces()
-        for piece, square in WHITE_START_POSITIONS.items():
-            piece_obj = Sprite(white_pieces_surface.get(piece[:-1]), get_square_center(square))
-            chess_pieces_dict[piece] = piece_obj
-            all_pieces_group.add(piece_obj) # Add piece in group
-
-        # Black Sprite
-        self.load_black_pieces()
-        for piece, square in BLACK_START_POSITIONS.items():
-            piece_obj = Sprite(black_pieces_surface.get(piece[:-1]), get_square_center(square))
+        all_pieces_group.empty()
+        if fen is None:
+            board_state.reset() # Sprites mirror the board state
+        else:
+            board_state.load_fen(fen)
+
+        for piece, square in board_state.piece_squares.items():
+            piece_obj = Sprite(piece_image(piece), get_square_center(square_name(square)))
             chess_pieces_dict[piece] = piece_obj
             all_pieces_group.add(piece_obj) # Add piece in group
 
         return all_pieces_group
+
+    def relayout_pieces(self) -> None: # Reposition (and rescale) the sprites from the board state after a view change
+        for piece, sprite in chess_pieces_dict.items():
+            sprite.image = piece_image(piece)
+            sprite.rect = sprite.image.get_rect(center=get_square_center(square_name(board_state.piece_squares[piece])))
     
     # def controls(self):
     #     start_button = pygame.image.load(os.path.join("assets", "buttons", "start.png")).convert_alpha()
@@ -0,0 +1,80 @@
+# Sprite atlas cache
+#
+# Piece images and highlight overlays of one square size are packed into a
+# single surface: one square cell per image, pieces scaled once with
+# smoothscale and centered in their cell. Sprites and overlays blit from
+# subsurfaces of the atlas. Atlases are cached by (square size, theme); the
+# least recently used sizes are evicted when the window is resized.
+
+import os
+import pygame
+
+from utils import *
+
+DEFAULT_THEME = "chess_pieces" # Piece image directory in assets
+MAX_ATLASES = 2 # Cached (square size, theme) atlases
+OVERLAY_NAMES = ("check", "move", "capture", "promotion", "selection")
+SELECTION_COLOR = (255, 255, 0)
+
+class SpriteAtlas:
+    def __init__(self, theme: str = DEFAULT_THEME) -> None:
+        self.theme = theme
+        self.sources: dict[str, dict[str, pygame.Surface]] = {} # Theme -> piece kind -> image as loaded
+        self.atlases: dict[tuple[int, str], tuple[pygame.Surface, dict[str, pygame.Surface]]] = {} # LRU order
+
+    def load_theme(self, theme: str) -> dict[str, pygame.Surface]: # Decode the PNGs of a theme once
+        sources = self.sources.get(theme)
+        if sources is None:
+            sources = self.sources[theme] = {}
+            for file_name in resources.piece_files(theme):
+                if file_name.endswith(".png"):
+                    sources[file_name[:-4]] = pygame.image.load(os.path.join("assets", theme, file_name)).convert_alpha()
+        return sources
+
+    def get(self, size: int = None, theme: str = None) -> dict[str, pygame.Surface]: # Image name -> atlas cell
+        key = (size if size is not None else board_view.square_size, theme if theme is not None else self.theme)
+        atlas = self.atlases.pop(key, None)
+        if atlas is None:
+            atlas = self.build(*key)
+            while len(self.atlases) >= MAX_ATLASES:
+                del self.atlases[next(iter(self.atlases))] # Least recently used
+        self.atlases[key] = atlas # Most recently used last
+        return atlas[1]
+
+    def image(self, name: str, size: int = None, theme: str = None) -> pygame.Surface: # Piece kind or overlay name
+        return self.get(size, theme)[name]
+
+    def build(self, size: int, theme: str) -> tuple[pygame.Surface, dict[str, pygame.Surface]]:
+        sources = self.load_theme(theme)
+        names = sorted(sources) + list(OVERLAY_NAMES)
+        surface = pygame.Surface((size * len(names), size), pygame.SRCALPHA)
+        scale = size / SQUARE_SIZE # Assets are drawn for SQUARE_SIZE
+        cells = {}
+        for index, name in enumerate(names):
+            cell = surface.subsurface((index * size, 0, size, size))
+            if name in sources:
+                image = sources[name]
+                if scale != 1:
+                    image = pygame.transform.smoothscale(image, (max(1, round(image.get_width() * scale)),
+                                                                 max(1, round(image.get_height() * scale))))
+                cell.blit(image, image.get_rect(center=(size // 2, size // 2)))
+            else:
+                self.draw_overlay(cell, name, size)
+            cells[name] = cell
+        return surface, cells
+
+    def draw_overlay(self, cell: pygame.Surface, name: str, size: int) -> None: # Highlight overlays (alpha in the pixels)
+        center = (size // 2, size // 2)
+        if name == "check": # King in check
+            pygame.draw.circle(cell, (*RED, 120), center, size // 2)
+        elif name == "move": # Available move
+            pygame.draw.circle(cell, DARK_GRAY, center, 10)
+        elif name == "capture":
+            cell.fill((*RED, 90))
+        elif name == "promotion": # Cross
+            pygame.draw.line(cell, DARK_GRAY, (center[0] - 10, center[1]), (center[0] + 10, center[1]), 5)
+            pygame.draw.line(cell, DARK_GRAY, (center[0], center[1] - 10), (center[0], center[1] + 10), 5)
+        elif name == "selection":
+            cell.fill((*SELECTION_COLOR, 70))
+
+sprite_atlas = SpriteAtlas()
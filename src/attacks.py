@@ -0,0 +1,124 @@
+# Incremental attack / mobility map
+#
+# Keeps, for every piece on a board, its allowed moves (same dict shape as
+# Piece.get_allowed_moves), the squares it attacks and the squares it
+# "watches" (every square whose contents can change its moves: its own
+# square, its rays up to and including the first blocker, pawn push squares).
+# After a move only the pieces watching a changed square are recomputed, so
+# the cost depends on the pieces near the move, not on the material count.
+
+from board import *
+from bitboard import (KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, RANK_2, RANK_7, FULL_BOARD,
+                      BITBOARD_PIECE_CLASS_DICT, bit, iter_bits, rook_attacks, bishop_attacks)
+
+# Squares a king on its start square watches for castling (path and rook corners)
+CASTLING_WATCH = {4: 0xEF, 60: 0xEF << 56}
+
+class AttackMap:
+    def __init__(self, board: Board, piece_class_dict: dict = None) -> None:
+        self.board = board
+        self.piece_class_dict = piece_class_dict if piece_class_dict is not None else BITBOARD_PIECE_CLASS_DICT
+        self.mobility: dict[str, dict] = {} # Allowed moves per piece
+        self.attacks: dict[str, int] = {} # Attacked squares per piece (bitboard)
+        self.watched: dict[str, int] = {} # Watched squares per piece (bitboard)
+        self.watchers: list[set] = [set() for _ in range(64)] # Pieces watching each square
+        self.attack_count = [[0] * 64, [0] * 64] # Number of attackers per [colour][square]
+        self.rebuild()
+
+    def rebuild(self) -> None: # Full recompute (new game, position loaded)
+        self.mobility.clear()
+        self.attacks.clear()
+        self.watched.clear()
+        self.watchers = [set() for _ in range(64)]
+        self.attack_count = [[0] * 64, [0] * 64]
+        for piece_name in list(self.board.piece_squares):
+            self._refresh(piece_name)
+
+    def update(self, changed_squares) -> None: # Squares whose occupant changed since the last update
+        squares = self.board.squares
+        affected = set()
+        for square in changed_squares:
+            affected |= self.watchers[square]
+            occupant = squares[square]
+            if occupant is not None:
+                affected.add(occupant)
+        for piece_name in affected:
+            if piece_name in self.board.piece_squares:
+                self._refresh(piece_name)
+            else:
+                self._drop(piece_name) # Captured or promoted away
+
+    def _piece_sets(self, piece_name: str, index: int) -> tuple[int, int]: # (attacks, watched)
+        board = self.board
+        piece_type = get_piece_type(piece_name)
+        if piece_type == "pawn":
+            colour = get_colour(piece_name)
+            attacks = PAWN_ATTACKS[colour][index]
+            if colour == WHITE_SIDE:
+                pushes = bit(index) << 8
+                if bit(index) & RANK_2:
+                    pushes |= pushes << 8
+            else:
+                pushes = bit(index) >> 8
+                if bit(index) & RANK_7:
+                    pushes |= pushes >> 8
+            return attacks, attacks | (pushes & FULL_BOARD) | bit(index)
+
+        if piece_type == "knight":
+            attacks = KNIGHT_ATTACKS[index]
+        elif piece_type == "king":
+            attacks = KING_ATTACKS[index]
+            return attacks, attacks | CASTLING_WATCH.get(index, 0) | bit(index)
+        else:
+            occupied = board.occupancy[WHITE_SIDE] | board.occupancy[BLACK_SIDE]
+            if piece_type == "rook":
+                attacks = rook_attacks(index, occupied)
+            elif piece_type == "bishop":
+                attacks = bishop_attacks(index, occupied)
+            else:
+                attacks = rook_attacks(index, occupied) | bishop_attacks(index, occupied)
+        return attacks, attacks | bit(index)
+
+    def _refresh(self, piece_name: str) -> None:
+        self._drop(piece_name)
+        index = self.board.piece_squares[piece_name]
+        attacks, watched = self._piece_sets(piece_name, index)
+
+        piece_obj = self.piece_class_dict.get(get_piece_type(piece_name))
+        self.mobility[piece_name] = piece_obj(piece_name, SQUARE_NAMES[index], board=self.board).get_allowed_moves()
+        self.attacks[piece_name] = attacks
+        self.watched[piece_name] = watched
+
+        counts = self.attack_count[get_colour(piece_name)]
+        for square in iter_bits(attacks):
+            counts[square] += 1
+        for square in iter_bits(watched):
+            self.watchers[square].add(piece_name)
+
+    def _drop(self, piece_name: str) -> None:
+        attacks = self.attacks.pop(piece_name, None)
+        if attacks is None:
+            return
+        counts = self.attack_count[get_colour(piece_name)]
+        for square in iter_bits(attacks):
+            counts[square] -= 1
+        for square in iter_bits(self.watched.pop(piece_name)):
+            self.watchers[square].discard(piece_name)
+        del self.mobility[piece_name]
+
+    def is_attacked(self, square: int, by_colour: int) -> bool:
+        return self.attack_count[by_colour][square] > 0
+
+    def attackers(self, square: int, by_colour: int) -> list[str]:
+        prefix = "w" if by_colour == WHITE_SIDE else "b"
+        return [piece_name for piece_name in self.watchers[square]
+                if piece_name[0] == prefix and self.attacks[piece_name] >> square & 1]
+
+    def checkers(self, colour: int) -> list[str]: # Pieces giving check to the king of colour
+        king = self.board.bitboards.get("w_king" if colour == WHITE_SIDE else "b_king", 0)
+        if not king:
+            return []
+        king_square = king.bit_length() - 1
+        if not self.is_attacked(king_square, colour ^ 1):
+            return []
+        return self.attackers(king_square, colour ^ 1)
@@ -0,0 +1,224 @@
+# Batch evaluation with NumPy
+#
+# Scores many positions at once with the terms of evaluate.evaluate_position
+# (material, piece-square tables, mobility, pawn structure). A batch is an
+# (N, 12) uint64 array of piece bitboards (one column per piece kind, in
+# PLANE_KINDS order) plus the side to move; to_planes expands it to (N, 12, 64)
+# 0/1 planes. Material and tables are one matrix product over the planes,
+# slider mobility uses shift-and-mask fills over the whole batch and pawn
+# terms work on (N, 8, 8) pawn planes. Without NumPy the same functions
+# fall back to evaluate_position one board at a time.
+#
+#   python src/batcheval.py positions.fen --output scores.txt
+#
+# FEN files are read in batches (one FEN per line); the output has one
+# "<line number>\t<score>" line per position, side to move's point of view.
+
+import argparse
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError: # Optional: scalar fallback
+    np = None
+
+from board import *
+from bitboard import init_tables
+from evaluate import (KIND_SQUARE_SCORES, MOBILITY_WEIGHTS, DOUBLED_PAWN, ISOLATED_PAWN, PASSED_PAWN_BONUS,
+                      evaluate_position)
+
+PIECE_TYPES = ("pawn", "knight", "bishop", "rook", "queen", "king")
+PLANE_KINDS = [f"{side}_{piece_type}" for side in "wb" for piece_type in PIECE_TYPES] # Column / plane order
+FEN_PLANES = {(letter.upper() if side == "w" else letter): PLANE_KINDS.index(f"{side}_{piece_type}")
+              for piece_type, letter in FEN_PIECE_LETTERS.items() for side in "wb"} # "N" -> w_knight plane
+BATCH_POSITIONS = 1 << 16 # FEN lines per batch
+
+# Helper functions
+def encode_boards(boards: list[Board]) -> tuple: # -> (bitboards (N, 12) uint64, side to move (N,) int8)
+    return encode_rows([[board.bitboards.get(kind, 0) for kind in PLANE_KINDS] for board in boards],
+                       [board.side_to_move for board in boards])
+
+def fen_bitboards(fen: str) -> tuple[list[int], int]: # Piece placement and side to move only, no Board object
+    fields = fen.split()
+    if len(fields) < 2 or fields[1] not in ("w", "b"):
+        raise ValueError(f"bad FEN: {fen!r}")
+    row = [0] * 12
+    rank, file = 7, 0
+    for char in fields[0]:
+        if char == "/":
+            rank, file = rank - 1, 0
+        elif char.isdigit():
+            file += int(char)
+        else:
+            if char not in FEN_PLANES or rank < 0 or file > 7:
+                raise ValueError(f"bad FEN: {fen!r}")
+            row[FEN_PLANES[char]] |= 1 << (rank * 8 + file)
+            file += 1
+    return row, WHITE_SIDE if fields[1] == "w" else BLACK_SIDE
+
+def encode_rows(rows: list[list[int]], sides: list[int]) -> tuple:
+    if np is None:
+        return rows, sides
+    return np.array(rows, dtype=np.uint64).reshape(len(rows), 12), np.array(sides, dtype=np.int8)
+
+def encode_fens(fens: list[str]) -> tuple:
+    rows, sides = zip(*map(fen_bitboards, fens)) if fens else ((), ())
+    return encode_rows(list(rows), list(sides))
+
+def boards_from_bitboards(bitboards, sides) -> list[Board]: # Scalar fallback input
+    boards = []
+    for row, side in zip(bitboards, sides):
+        board = Board()
+        for kind, bits in zip(PLANE_KINDS, row):
+            for index in range(64):
+                if int(bits) >> index & 1:
+                    board.place_piece(board.new_piece_name(kind), index)
+        board.side_to_move = int(side)
+        boards.append(board)
+    return boards
+
+if np is not None:
+    U64 = np.uint64
+    NOT_A = U64(0xFEFEFEFEFEFEFEFE)
+    NOT_AB = U64(0xFCFCFCFCFCFCFCFC)
+    NOT_H = U64(0x7F7F7F7F7F7F7F7F)
+    NOT_GH = U64(0x3F3F3F3F3F3F3F3F)
+    FULL = U64(0xFFFFFFFFFFFFFFFF)
+    ROOK_SHIFTS = ((8, FULL), (-8, FULL), (1, NOT_A), (-1, NOT_H)) # (square step, mask of valid targets)
+    BISHOP_SHIFTS = ((9, NOT_A), (7, NOT_H), (-7, NOT_A), (-9, NOT_H))
+    KNIGHT_SHIFTS = ((17, NOT_A), (15, NOT_H), (10, NOT_AB), (6, NOT_GH), (-6, NOT_AB), (-10, NOT_GH), (-15, NOT_A), (-17, NOT_H))
+    SQUARE_WEIGHTS = np.array([KIND_SQUARE_SCORES[kind] for kind in PLANE_KINDS], dtype=np.float32).reshape(768)
+    RANKS = np.arange(8)
+    WHITE_PASSED = np.array(PASSED_PAWN_BONUS, dtype=np.int32)[:, None] # [rank, file]
+    BLACK_PASSED = np.array(PASSED_PAWN_BONUS[::-1], dtype=np.int32)[:, None]
+    BYTE_COUNTS = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+    def shift(bitboards, step: int):
+        return bitboards << U64(step) if step > 0 else bitboards >> U64(-step)
+
+    def popcount(bitboards): # Set bits per uint64
+        if hasattr(np, "bitwise_count"):
+            return np.bitwise_count(bitboards).astype(np.int32)
+        return BYTE_COUNTS[bitboards.view(np.uint8)].reshape(*bitboards.shape, 8).sum(axis=-1, dtype=np.int32)
+
+    def slide(pieces, empty, shifts):
+        attacks = np.zeros_like(pieces)
+        for step, mask in shifts:
+            flood = pieces
+            open_squares = empty & mask
+            for _ in range(6): # Through empty squares
+                flood = flood | (shift(flood, step) & open_squares)
+            attacks |= shift(flood, step) & mask # Plus the first blocker
+        return attacks
+
+    def to_planes(bitboards): # (N, 12) uint64 -> (N, 12, 64) uint8, plane[kind][square]
+        bytes_view = np.ascontiguousarray(bitboards, dtype="<u8").view(np.uint8).reshape(len(bitboards), 12, 8)
+        return np.unpackbits(bytes_view, axis=-1, bitorder="little")
+
+    def side_mobility(bitboards, own, occupied):
+        empty = ~occupied
+        targets = ~own
+        knights, bishops, rooks, queens = (bitboards[:, index] for index in range(1, 5))
+        attacks = {"knight": np.zeros_like(knights), "bishop": slide(bishops, empty, BISHOP_SHIFTS),
+                   "rook": slide(rooks, empty, ROOK_SHIFTS),
+                   "queen": slide(queens, empty, ROOK_SHIFTS) | slide(queens, empty, BISHOP_SHIFTS)}
+        for step, mask in KNIGHT_SHIFTS:
+            attacks["knight"] |= shift(knights, step) & mask
+        return sum(weight * popcount(attacks[piece_type] & targets) for piece_type, weight in MOBILITY_WEIGHTS.items())
+
+    def pawn_terms(pawns, enemy_pawns, colour: int):
+        # pawns / enemy_pawns: (N, 8, 8) planes [rank, file]
+        counts = pawns.sum(axis=1, dtype=np.int32) # Pawns per file
+        present = counts > 0
+        neighbours = np.zeros_like(present)
+        neighbours[:, 1:] |= present[:, :-1]
+        neighbours[:, :-1] |= present[:, 1:]
+        score = DOUBLED_PAWN * np.maximum(counts - 1, 0).sum(axis=1) + ISOLATED_PAWN * (counts * ~neighbours).sum(axis=1)
+
+        if colour == WHITE_SIDE: # Most advanced enemy pawn per file, then over the neighbouring files
+            front = np.where(enemy_pawns, RANKS[:, None], -1).max(axis=1)
+            padded = np.pad(front, ((0, 0), (1, 1)), constant_values=-1)
+            front = np.maximum(np.maximum(padded[:, :-2], padded[:, 1:-1]), padded[:, 2:])
+            passed = pawns & (front[:, None, :] <= RANKS[None, :, None])
+            return score + (passed * WHITE_PASSED).sum(axis=(1, 2))
+        front = np.where(enemy_pawns, RANKS[:, None], 8).min(axis=1)
+        padded = np.pad(front, ((0, 0), (1, 1)), constant_values=8)
+        front = np.minimum(np.minimum(padded[:, :-2], padded[:, 1:-1]), padded[:, 2:])
+        passed = pawns & (front[:, None, :] >= RANKS[None, :, None])
+        return score + (passed * BLACK_PASSED).sum(axis=(1, 2))
+
+def evaluate_terms(bitboards) -> dict: # Per term scores, white positive: {"material", "mobility", "pawns"}
+    planes = to_planes(bitboards)
+    material = np.rint(planes.reshape(len(bitboards), 768).astype(np.float32) @ SQUARE_WEIGHTS).astype(np.int32)
+    white = np.bitwise_or.reduce(bitboards[:, :6], axis=1)
+    black = np.bitwise_or.reduce(bitboards[:, 6:], axis=1)
+    occupied = white | black
+    mobility = side_mobility(bitboards[:, :6], white, occupied) - side_mobility(bitboards[:, 6:], black, occupied)
+    white_pawns = planes[:, 0].reshape(-1, 8, 8).astype(bool)
+    black_pawns = planes[:, 6].reshape(-1, 8, 8).astype(bool)
+    pawns = pawn_terms(white_pawns, black_pawns, WHITE_SIDE) - pawn_terms(black_pawns, white_pawns, BLACK_SIDE)
+    return {"material": material, "mobility": mobility.astype(np.int32), "pawns": pawns.astype(np.int32)}
+
+def evaluate_batch(bitboards, sides): # Scores from the side to move's point of view
+    if np is None:
+        return [evaluate_position(board) for board in boards_from_bitboards(bitboards, sides)]
+    if not len(bitboards):
+        return np.zeros(0, dtype=np.int32)
+    terms = evaluate_terms(bitboards)
+    score = terms["material"] + terms["mobility"] + terms["pawns"]
+    return np.where(sides == WHITE_SIDE, score, -score)
+
+def read_batches(file, size: int):
+    lines, start = [], 1
+    for number, line in enumerate(file, 1):
+        lines.append(line.strip())
+        if len(lines) == size:
+            yield start, lines
+            lines, start = [], number + 1
+    if lines:
+        yield start, lines
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluate every FEN of a file in batches")
+    parser.add_argument("path", help="file with one FEN per line")
+    parser.add_argument("--batch", type=int, default=BATCH_POSITIONS, help="positions per batch")
+    parser.add_argument("--output", default=None, help="score file (default: standard output)")
+    args = parser.parse_args(argv)
+
+    init_tables()
+    output = open(args.output, "w") if args.output else sys.stdout
+    positions = errors = 0
+    start_time = time.perf_counter()
+    try:
+        with open(args.path) as file:
+            for start, lines in read_batches(file, max(1, args.batch)):
+                rows, sides, results = [], [], {} # Line number -> error text
+                for number, line in enumerate(lines, start):
+                    if not line or line.startswith("#"):
+                        continue
+                    try:
+                        row, side = fen_bitboards(line)
+                    except ValueError as error:
+                        results[number] = f"error: {error}"
+                        errors += 1
+                        continue
+                    rows.append(row)
+                    sides.append(side)
+                    results[number] = None
+                scores = iter(evaluate_batch(*encode_rows(rows, sides)))
+                output.write("".join(f"{number}\t{result if result is not None else int(next(scores))}\n"
+                                     for number, result in results.items()))
+                positions += len(rows)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - start_time
+    rate = positions / elapsed if elapsed > 0 else 0
+    backend = "numpy" if np is not None else "scalar"
+    print(f"{positions} positions, {errors} errors, {elapsed:.2f}s, {rate:,.0f} positions/s ({backend})", file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+# Bitboard move generator backend
+#
+# Alternative to the ray walkers in pieces.py. Every set of squares is a
+# 64-bit integer (bit n = square index n, a1 = bit 0) and attacks come from
+# precomputed tables. Slider attacks use a PEXT-style lookup: the occupancy is
+# masked down to the squares that can block the piece and used as the key of
+# a per-square table holding the finished attack set. Python has no PEXT or
+# fast 64-bit multiply, so the masked occupancy itself is the (perfect) hash
+# key instead of a magic index. Tables are filled lazily, per square, the
+# first time a slider on that square is queried.
+
+from board import *
+from pieces import Piece, LINEAR_DIRECTIONS, DIAGONAL_DIRECTIONS, KNIGHT_OFFSETS, KING_OFFSETS, castling_movement
+from moves import MoveList, CAPTURE, DOUBLE_PUSH, EP_CAPTURE, KING_CASTLE, QUEEN_CASTLE, PROMOTION, PROMOTION_CAPTURE
+
+# Constants
+FULL_BOARD = (1 << 64) - 1
+RANK_1 = 0xFF
+RANK_2 = RANK_1 << 8
+RANK_7 = RANK_1 << 48
+RANK_8 = RANK_1 << 56
+
+# Helper functions
+def bit(index: int) -> int:
+    return 1 << index
+
+def pop_count(bitboard: int) -> int:
+    return bin(bitboard).count("1")
+
+def iter_bits(bitboard: int): # Yields square indexes (lowest first)
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+def bitboard_squares(bitboard: int) -> list[str]: # Bitboard -> square names
+    squares = []
+    while bitboard:
+        lowest = bitboard & -bitboard
+        squares.append(SQUARE_NAMES[lowest.bit_length() - 1])
+        bitboard ^= lowest
+    return squares
+
+def _step_table(offsets: tuple) -> list[int]:
+    table = []
+    for index in range(64):
+        file, rank = index % 8, index // 8
+        attacks = 0
+        for df, dr in offsets:
+            if 0 <= file + df < 8 and 0 <= rank + dr < 8:
+                attacks |= bit((rank + dr) * 8 + file + df)
+        table.append(attacks)
+    return table
+
+def _ray_attacks(index: int, occupied: int, directions: tuple) -> int: # Slow reference walk (table building only)
+    file, rank = index % 8, index // 8
+    attacks = 0
+    for df, dr in directions:
+        next_file, next_rank = file + df, rank + dr
+        while 0 <= next_file < 8 and 0 <= next_rank < 8:
+            square_bit = bit(next_rank * 8 + next_file)
+            attacks |= square_bit
+            if occupied & square_bit:
+                break # Blocker is included (capture or defended square)
+            next_file += df
+            next_rank += dr
+    return attacks
+
+def _blocker_mask(index: int, directions: tuple) -> int: # Squares that can block (board edges excluded)
+    file, rank = index % 8, index // 8
+    mask = 0
+    for df, dr in directions:
+        next_file, next_rank = file + df, rank + dr
+        while 0 <= next_file + df < 8 and 0 <= next_rank + dr < 8:
+            mask |= bit(next_rank * 8 + next_file)
+            next_file += df
+            next_rank += dr
+    return mask
+
+# Precomputed attack tables
+KNIGHT_ATTACKS = _step_table(KNIGHT_OFFSETS)
+KING_ATTACKS = _step_table(KING_OFFSETS)
+PAWN_ATTACKS = (_step_table(((-1, 1), (1, 1))), _step_table(((-1, -1), (1, -1)))) # [colour][square]
+
+def _between_table() -> list[list[int]]: # Squares strictly between two aligned squares (0 if not aligned)
+    table = [[0] * 64 for _ in range(64)]
+    for index in range(64):
+        file, rank = index % 8, index // 8
+        for df, dr in LINEAR_DIRECTIONS + DIAGONAL_DIRECTIONS:
+            between = 0
+            next_file, next_rank = file + df, rank + dr
+            while 0 <= next_file < 8 and 0 <= next_rank < 8:
+                table[index][next_rank * 8 + next_file] = between
+                between |= bit(next_rank * 8 + next_file)
+                next_file += df
+                next_rank += dr
+    return table
+
+BETWEEN = _between_table()
+
+# Castling: (right, king square, king target, squares that must be empty)
+CASTLING_MASKS = tuple((right, king_square, target, sum(bit(index) for index in path))
+                       for right, king_square, target, path in CASTLING_PATHS)
+
+ROOK_MASKS = [_blocker_mask(index, LINEAR_DIRECTIONS) for index in range(64)]
+BISHOP_MASKS = [_blocker_mask(index, DIAGONAL_DIRECTIONS) for index in range(64)]
+ROOK_TABLES: list[dict | None] = [None] * 64
+BISHOP_TABLES: list[dict | None] = [None] * 64
+
+def _build_slider_table(index: int, mask: int, directions: tuple) -> dict[int, int]:
+    table = {}
+    subset = 0
+    while True: # Carry-rippler walk over every subset of the mask
+        table[subset] = _ray_attacks(index, subset, directions)
+        subset = (subset - mask) & mask
+        if subset == 0:
+            break
+    return table
+
+def rook_attacks(index: int, occupied: int) -> int:
+    table = ROOK_TABLES[index]
+    if table is None:
+        table = ROOK_TABLES[index] = _build_slider_table(index, ROOK_MASKS[index], LINEAR_DIRECTIONS)
+    return table[occupied & ROOK_MASKS[index]]
+
+def bishop_attacks(index: int, occupied: int) -> int:
+    table = BISHOP_TABLES[index]
+    if table is None:
+        table = BISHOP_TABLES[index] = _build_slider_table(index, BISHOP_MASKS[index], DIAGONAL_DIRECTIONS)
+    return table[occupied & BISHOP_MASKS[index]]
+
+def queen_attacks(index: int, occupied: int) -> int:
+    return rook_attacks(index, occupied) | bishop_attacks(index, occupied)
+
+def init_tables() -> None: # Fill every slider table up front (e.g. before timing)
+    for index in range(64):
+        rook_attacks(index, 0)
+        bishop_attacks(index, 0)
+
+# Piece objects
+class BitboardPiece(Piece):
+
+    """
+    Bitboard version of a piece. Subclasses return the attack set of the
+    piece and the shared get_allowed_moves splits it into moves and captures
+    """
+
+    def get_attacks(self, index: int, occupied: int) -> int:
+        raise NotImplementedError("This method must be overridden in derived classes")
+
+    def get_allowed_moves(self) -> dict:
+        board = self.board
+        index = SQUARE_INDEX[self.current_square]
+        colour = get_colour(self.piece_name)
+        occupied = board.occupancy[WHITE_SIDE] | board.occupancy[BLACK_SIDE]
+        attacks = self.get_attacks(index, occupied)
+
+        moves_list = bitboard_squares(attacks & ~occupied)
+        self.capture_moves = bitboard_squares(attacks & board.occupancy[colour ^ 1])
+
+        if moves_list:
+            self.moves["moves"] = moves_list
+        if self.capture_moves:
+            self.moves["captures"] = self.capture_moves
+
+        return self.moves
+
+class BitboardPawn(Piece):
+
+    """
+    Calculate and return possible moves for the pawn piece (bitboards)
+
+    Same rules as pieces.Pawn
+    """
+
+    def get_allowed_moves(self) -> dict:
+        board = self.board
+        index = SQUARE_INDEX[self.current_square]
+        colour = get_colour(self.piece_name)
+        occupied = board.occupancy[WHITE_SIDE] | board.occupancy[BLACK_SIDE]
+        empty = ~occupied & FULL_BOARD
+
+        # Vertical movement
+        if colour == WHITE_SIDE:
+            single_push = (bit(index) << 8) & empty
+            double_push = (single_push << 8) & empty
+        else:
+            single_push = (bit(index) >> 8) & empty
+            double_push = (single_push >> 8) & empty
+        pushes = single_push
+        if single_push and bit(index) & (RANK_2 if colour == WHITE_SIDE else RANK_7):
+            pushes |= double_push
+
+        # Possible captures in diagonals (en passant included)
+        enemy = board.occupancy[colour ^ 1]
+        if board.ep_square is not None and board.side_to_move == colour:
+            enemy |= bit(board.ep_square)
+        captures = PAWN_ATTACKS[colour][index] & enemy
+
+        moves_list = bitboard_squares(pushes)
+        self.capture_moves = bitboard_squares(captures)
+
+        # Promotion check
+        last_rank = RANK_8 if colour == WHITE_SIDE else RANK_1
+        promotions = (pushes | captures) & last_rank
+        if promotions:
+            self.moves["promotions"] = bitboard_squares(promotions)
+
+        if moves_list:
+            self.moves["moves"] = moves_list
+        if self.capture_moves:
+            self.moves["captures"] = self.capture_moves
+
+        return self.moves
+
+class BitboardRook(BitboardPiece):
+    def get_attacks(self, index: int, occupied: int) -> int:
+        return rook_attacks(index, occupied)
+
+class BitboardBishop(BitboardPiece):
+    def get_attacks(self, index: int, occupied: int) -> int:
+        return bishop_attacks(index, occupied)
+
+class BitboardKnight(BitboardPiece):
+    def get_attacks(self, index: int, occupied: int) -> int:
+        return KNIGHT_ATTACKS[index]
+
+class BitboardQueen(BitboardPiece):
+    def get_attacks(self, index: int, occupied: int) -> int:
+        return rook_attacks(index, occupied) | bishop_attacks(index, occupied)
+
+class BitboardKing(BitboardPiece):
+    def get_attacks(self, index: int, occupied: int) -> int:
+        return KING_ATTACKS[index]
+
+    def get_allowed_moves(self) -> dict:
+        super().get_allowed_moves()
+        castling = castling_movement(self.board, SQUARE_INDEX[self.current_square])
+        if castling:
+            self.moves["moves"] = self.moves.get("moves", []) + castling
+        return self.moves
+
+# Piece class dictionary (same interface as pieces.PIECE_CLASS_DICT)
+BITBOARD_PIECE_CLASS_DICT = {
+    "pawn": BitboardPawn,
+    "rook": BitboardRook,
+    "bishop": BitboardBishop,
+    "knight": BitboardKnight,
+    "queen": BitboardQueen,
+    "king": BitboardKing
+}
+
+# Bulk generation (no square names, for counting and searching)
+PROMOTION_TYPES = ("queen", "rook", "bishop", "knight")
+
+def piece_targets(board: Board, piece_name: str, index: int) -> tuple[int, int]: # (quiet targets, capture targets)
+    colour = get_colour(piece_name)
+    occupied = board.occupancy[WHITE_SIDE] | board.occupancy[BLACK_SIDE]
+    enemy = board.occupancy[colour ^ 1]
+    piece_type = get_piece_type(piece_name)
+
+    if piece_type == "pawn":
+        empty = ~occupied & FULL_BOARD
+        if colour == WHITE_SIDE:
+            pushes = (bit(index) << 8) & empty
+            if pushes and index < 16:
+                pushes |= (pushes << 8) & empty
+        else:
+            pushes = (bit(index) >> 8) & empty
+            if pushes and index >= 48:
+                pushes |= (pushes >> 8) & empty
+        return pushes, PAWN_ATTACKS[colour][index] & enemy
+
+    if piece_type == "knight":
+        attacks = KNIGHT_ATTACKS[index]
+    elif piece_type == "king":
+        attacks = KING_ATTACKS[index]
+    elif piece_type == "rook":
+        attacks = rook_attacks(index, occupied)
+    elif piece_type == "bishop":
+        attacks = bishop_attacks(index, occupied)
+    else:
+        attacks = rook_attacks(index, occupied) | bishop_attacks(index, occupied)
+    return attacks & ~occupied, attacks & enemy
+
+def generate_packed_moves(board: Board, colour: int, move_list: MoveList, captures_only: bool = False) -> MoveList:
+    # Pseudo-legal packed moves appended to move_list (see moves.py for the encoding)
+    moves, count = move_list.moves, move_list.count
+    prefix = "w" if colour == WHITE_SIDE else "b"
+    last_rank = RANK_8 if colour == WHITE_SIDE else RANK_1
+    occupied = board.occupancy[WHITE_SIDE] | board.occupancy[BLACK_SIDE]
+    enemy = board.occupancy[colour ^ 1]
+    empty = ~occupied & FULL_BOARD
+    pawn_attacks = PAWN_ATTACKS[colour]
+    for piece_name, index in board.piece_squares.items():
+        if piece_name[0] != prefix:
+            continue
+        kind = piece_name[2:4] # Same targets as piece_targets, inlined
+        is_pawn = kind == "pa"
+        if is_pawn:
+            if colour == WHITE_SIDE:
+                quiet = (1 << index << 8) & empty
+                if quiet and index < 16:
+                    quiet |= (quiet << 8) & empty
+            else:
+                quiet = (1 << index >> 8) & empty
+                if quiet and index >= 48:
+                    quiet |= (quiet >> 8) & empty
+            captures = pawn_attacks[index] & enemy
+        else:
+            if kind == "kn":
+                attacks = KNIGHT_ATTACKS[index]
+            elif kind == "ki":
+                attacks = KING_ATTACKS[index]
+            elif kind == "ro":
+                attacks = rook_attacks(index, occupied)
+            elif kind == "bi":
+                attacks = bishop_attacks(index, occupied)
+            else:
+                attacks = rook_attacks(index, occupied) | bishop_attacks(index, occupied)
+            quiet, captures = attacks & empty, attacks & enemy
+        if is_pawn and (quiet | captures) & last_rank:
+            for targets, flags in ((captures, PROMOTION_CAPTURE), (quiet, PROMOTION)):
+                for target in iter_bits(targets):
+                    if captures_only: # Queen promotions count as tactical moves
+                        moves[count] = index | target << 6 | (flags | 3) << 12
+                        count += 1
+                        continue
+                    for code in (3, 2, 1, 0): # Queen, rook, bishop, knight
+                        moves[count] = index | target << 6 | (flags | code) << 12
+                        count += 1
+            continue
+        while captures:
+            lowest = captures & -captures
+            moves[count] = index | (lowest.bit_length() - 1) << 6 | CAPTURE << 12
+            count += 1
+            captures ^= lowest
+        if captures_only:
+            continue
+        while quiet:
+            lowest = quiet & -quiet
+            target = lowest.bit_length() - 1
+            moves[count] = index | target << 6 | (DOUBLE_PUSH << 12 if is_pawn and abs(target - index) == 16 else 0)
+            count += 1
+            quiet ^= lowest
+
+    # En passant
+    if board.ep_square is not None and board.side_to_move == colour:
+        pawns = board.bitboards.get(f"{prefix}_pawn", 0) & PAWN_ATTACKS[colour ^ 1][board.ep_square]
+        for index in iter_bits(pawns):
+            moves[count] = index | board.ep_square << 6 | EP_CAPTURE << 12
+            count += 1
+
+    # Castling (squares between king and rook empty; attacks are checked by the legal filter)
+    if board.castling and not captures_only:
+        for right, king_square, target, path in CASTLING_MASKS:
+            if board.castling & right and not occupied & path and board.squares[king_square] is not None \
+                    and board.squares[king_square][0] == prefix:
+                moves[count] = king_square | target << 6 | (KING_CASTLE if target > king_square else QUEEN_CASTLE) << 12
+                count += 1
+    move_list.count = count
+    return move_list
+
+def generate_moves(board: Board, colour: int, captures_only: bool = False) -> list[tuple[int, int, str | None]]: # (from, to, promotion)
+    return generate_packed_moves(board, colour, MoveList(), captures_only).to_tuples()
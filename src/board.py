@@ -0,0 +1,385 @@
+# Board model (pygame independent)
+#
+# The board is the single source of truth for piece placement. Squares are
+# indexed 0 - 63 (a1 = 0, b1 = 1, ..., h8 = 63) and every square holds the
+# name of the piece standing on it (e.g. "w_pawn1") or None. Sprites in the
+# UI only mirror this state for display.
+
+from zobrist import PIECE_KEYS, CASTLING_KEYS, EP_KEYS, SIDE_KEY
+
+# Board constants
+FILES = "abcdefgh"
+RANKS = "12345678"
+
+SQUARE_NAMES = [f"{file}{rank}" for rank in RANKS for file in FILES]
+SQUARE_INDEX = {square: index for index, square in enumerate(SQUARE_NAMES)}
+
+WHITE_SIDE, BLACK_SIDE = 0, 1 # Colour indexes (occupancy bitboards, attack tables)
+
+# Castling rights (bitfield)
+CASTLE_WHITE_KING, CASTLE_WHITE_QUEEN, CASTLE_BLACK_KING, CASTLE_BLACK_QUEEN = 1, 2, 4, 8
+CASTLING_FLAGS = {"K": CASTLE_WHITE_KING, "Q": CASTLE_WHITE_QUEEN, "k": CASTLE_BLACK_KING, "q": CASTLE_BLACK_QUEEN}
+
+# Castling rights kept after a piece leaves / lands on a square (king & rook squares clear their rights)
+CASTLING_RIGHTS_MASK = [15] * 64
+CASTLING_RIGHTS_MASK[0] = 15 & ~CASTLE_WHITE_QUEEN
+CASTLING_RIGHTS_MASK[7] = 15 & ~CASTLE_WHITE_KING
+CASTLING_RIGHTS_MASK[4] = 15 & ~(CASTLE_WHITE_KING | CASTLE_WHITE_QUEEN)
+CASTLING_RIGHTS_MASK[56] = 15 & ~CASTLE_BLACK_QUEEN
+CASTLING_RIGHTS_MASK[63] = 15 & ~CASTLE_BLACK_KING
+CASTLING_RIGHTS_MASK[60] = 15 & ~(CASTLE_BLACK_KING | CASTLE_BLACK_QUEEN)
+
+CASTLING_PATHS = ( # (right, king square, king target, squares that must be empty)
+    (CASTLE_WHITE_KING, 4, 6, (5, 6)),
+    (CASTLE_WHITE_QUEEN, 4, 2, (1, 2, 3)),
+    (CASTLE_BLACK_KING, 60, 62, (61, 62)),
+    (CASTLE_BLACK_QUEEN, 60, 58, (57, 58, 59)),
+)
+CASTLING_HOMES = ((CASTLE_WHITE_KING, 4, 7), (CASTLE_WHITE_QUEEN, 4, 0), (CASTLE_BLACK_KING, 60, 63), (CASTLE_BLACK_QUEEN, 60, 56)) # (right, king, rook)
+CASTLING_ROOK_MOVES = {6: (7, 5), 2: (0, 3), 62: (63, 61), 58: (56, 59)} # King target -> (rook from, rook to)
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+FEN_PIECE_TYPES = {"p": "pawn", "n": "knight", "b": "bishop", "r": "rook", "q": "queen", "k": "king"}
+FEN_PIECE_LETTERS = {piece_type: letter for letter, piece_type in FEN_PIECE_TYPES.items()}
+
+WHITE_START_POSITIONS = {
+    "w_pawn1": "a2", "w_pawn2": "b2", "w_pawn3": "c2", "w_pawn4": "d2", "w_pawn5": "e2", "w_pawn6": "f2", "w_pawn7": "g2", "w_pawn8": "h2",
+    "w_rook1": "a1", "w_knight1": "b1", "w_bishop1": "c1", "w_queen0": "d1", "w_king0": "e1", "w_bishop2": "f1", "w_knight2": "g1", "w_rook2": "h1",
+}
+
+BLACK_START_POSITIONS = {
+    "b_rook1": "a8", "b_knight1": "b8", "b_bishop1": "c8", "b_queen0": "d8", "b_king0": "e8", "b_bishop2": "f8", "b_knight2": "g8", "b_rook2": "h8",
+    "b_pawn1": "a7", "b_pawn2": "b7", "b_pawn3": "c7", "b_pawn4": "d7", "b_pawn5": "e7", "b_pawn6": "f7", "b_pawn7": "g7", "b_pawn8": "h7",
+}
+
+# Helper functions
+def square_index(square: str | int) -> int | None: # Square name -> board index
+    if isinstance(square, int):
+        return square if 0 <= square < 64 else None
+    return SQUARE_INDEX.get(square)
+
+def square_name(index: int) -> str: # Board index -> square name
+    return SQUARE_NAMES[index]
+
+def is_white(piece_name: str) -> bool: # Checks if piece is white
+    return piece_name[0] == "w"
+
+def get_piece_type(piece_name: str) -> str: # "w_queen12" -> "queen"
+    return piece_name[2:].rstrip("0123456789")
+
+_piece_kinds: dict[str, str] = {} # Name -> kind cache (hot path of make / unmake)
+
+def get_piece_kind(piece_name: str) -> str: # "w_queen12" -> "w_queen"
+    kind = _piece_kinds.get(piece_name)
+    if kind is None:
+        kind = _piece_kinds[piece_name] = piece_name.rstrip("0123456789")
+    return kind
+
+def get_colour(piece_name: str) -> int: # WHITE_SIDE or BLACK_SIDE
+    return WHITE_SIDE if piece_name[0] == "w" else BLACK_SIDE
+
+class Board:
+    def __init__(self) -> None:
+        self.squares: list[str | None] = [None] * 64 # Piece name per square
+        self.piece_squares: dict[str, int] = {} # Square index per piece
+        self.bitboards: dict[str, int] = {} # 64-bit set per piece kind ("w_pawn", ...)
+        self.occupancy = [0, 0] # 64-bit set per colour (WHITE_SIDE, BLACK_SIDE)
+        self.side_to_move = WHITE_SIDE
+        self.castling = 0 # CASTLE_* bitfield
+        self.ep_square: int | None = None # En passant target square
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.name_counter = 100 # Suffix for pieces created during play (promotions)
+        self.undo_stack: list[tuple] = [] # One record per make_move
+        self.hash = 0 # Zobrist key, updated incrementally
+
+    def clear(self) -> None:
+        self.squares = [None] * 64
+        self.piece_squares = {}
+        self.bitboards = {}
+        self.occupancy = [0, 0]
+        self.side_to_move = WHITE_SIDE
+        self.castling = 0
+        self.ep_square = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.name_counter = 100
+        self.undo_stack = []
+        self.hash = 0
+
+    def reset(self) -> None: # Standard starting position
+        self.clear()
+        for piece_name, square in WHITE_START_POSITIONS.items():
+            self.place_piece(piece_name, square)
+        for piece_name, square in BLACK_START_POSITIONS.items():
+            self.place_piece(piece_name, square)
+        self.castling = CASTLE_WHITE_KING | CASTLE_WHITE_QUEEN | CASTLE_BLACK_KING | CASTLE_BLACK_QUEEN
+        self.hash = self.compute_hash()
+
+    def compute_hash(self) -> int: # Full Zobrist key (incremental updates must match this)
+        key = 0
+        for piece_name, index in self.piece_squares.items():
+            key ^= PIECE_KEYS[get_piece_kind(piece_name)][index]
+        key ^= CASTLING_KEYS[self.castling]
+        if self.ep_square is not None:
+            key ^= EP_KEYS[self.ep_square % 8]
+        if self.side_to_move == BLACK_SIDE:
+            key ^= SIDE_KEY
+        return key
+
+    def load_fen(self, fen: str) -> None: # Forsyth-Edwards Notation
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Invalid FEN: {fen}")
+        placement, side, castling, ep_square = fields[:4]
+        rows = placement.split("/")
+        if len(rows) != 8:
+            raise ValueError(f"Invalid FEN: {fen}")
+
+        self.clear()
+        piece_counts = {}
+        for row, row_pieces in enumerate(rows):
+            rank = 7 - row
+            file = 0
+            for char in row_pieces:
+                if char.isdigit():
+                    file += int(char)
+                    continue
+                piece_type = FEN_PIECE_TYPES.get(char.lower())
+                if piece_type is None or file > 7:
+                    raise ValueError(f"Invalid FEN: {fen}")
+                kind = f"{'w' if char.isupper() else 'b'}_{piece_type}"
+                piece_counts[kind] = piece_counts.get(kind, 0) + 1
+                self.place_piece(f"{kind}{piece_counts[kind]}", rank * 8 + file)
+                file += 1
+            if file != 8:
+                raise ValueError(f"Invalid FEN: {fen}")
+
+        if side not in ("w", "b"):
+            raise ValueError(f"Invalid FEN: {fen}")
+        self.side_to_move = WHITE_SIDE if side == "w" else BLACK_SIDE
+        for char in castling:
+            if char != "-":
+                if char not in CASTLING_FLAGS:
+                    raise ValueError(f"Invalid FEN: {fen}")
+                self.castling |= CASTLING_FLAGS[char]
+        for right, king_square, rook_square in CASTLING_HOMES: # Rights need the king & rook at home
+            kind = "w_" if right & (CASTLE_WHITE_KING | CASTLE_WHITE_QUEEN) else "b_"
+            if (self.squares[king_square] or "")[:4] != f"{kind}ki" or (self.squares[rook_square] or "")[:3] != f"{kind}r":
+                self.castling &= ~right
+
+        if ep_square != "-":
+            index = square_index(ep_square)
+            if index is None or index // 8 != (5 if self.side_to_move == WHITE_SIDE else 2):
+                raise ValueError(f"Invalid FEN: {fen}")
+            if self.ep_capturable(index): # Same convention as make_move
+                self.ep_square = index
+        try:
+            if len(fields) >= 5:
+                self.halfmove_clock = int(fields[4])
+            if len(fields) >= 6:
+                self.fullmove_number = int(fields[5])
+        except ValueError:
+            raise ValueError(f"Invalid FEN: {fen}") from None
+        self.hash = self.compute_hash()
+
+    def ep_capturable(self, ep_square: int) -> bool: # A pawn of the side to move can capture on ep_square
+        pawn = "w_p" if self.side_to_move == WHITE_SIDE else "b_p"
+        pawn_rank = ep_square - 8 if self.side_to_move == WHITE_SIDE else ep_square + 8 # Rank of the capturing pawns
+        file = ep_square % 8
+        return (file > 0 and (self.squares[pawn_rank - 1] or "")[:3] == pawn) or \
+            (file < 7 and (self.squares[pawn_rank + 1] or "")[:3] == pawn)
+
+    def to_fen(self) -> str: # Forsyth-Edwards Notation of the current position
+        rows = []
+        for rank in range(7, -1, -1):
+            row, empty = "", 0
+            for file in range(8):
+                piece_name = self.squares[rank * 8 + file]
+                if piece_name is None:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                letter = FEN_PIECE_LETTERS[get_piece_type(piece_name)]
+                row += letter.upper() if piece_name[0] == "w" else letter
+            rows.append(row + (str(empty) if empty else ""))
+        castling = "".join(char for char, right in CASTLING_FLAGS.items() if self.castling & right) or "-"
+        ep_square = SQUARE_NAMES[self.ep_square] if self.ep_square is not None else "-"
+        side = "w" if self.side_to_move == WHITE_SIDE else "b"
+        return f"{'/'.join(rows)} {side} {castling} {ep_square} {self.halfmove_clock} {self.fullmove_number}"
+
+    def copy(self) -> "Board":
+        board = Board.__new__(Board)
+        board.squares = self.squares.copy()
+        board.piece_squares = self.piece_squares.copy()
+        board.bitboards = self.bitboards.copy()
+        board.occupancy = self.occupancy.copy()
+        board.side_to_move = self.side_to_move
+        board.castling = self.castling
+        board.ep_square = self.ep_square
+        board.halfmove_clock = self.halfmove_clock
+        board.fullmove_number = self.fullmove_number
+        board.name_counter = self.name_counter
+        board.undo_stack = self.undo_stack.copy()
+        board.hash = self.hash
+        return board
+
+    def new_piece_name(self, kind: str) -> str: # Unique name for a new piece ("w_queen" -> "w_queen100")
+        piece_name = f"{kind}{self.name_counter}"
+        self.name_counter += 1
+        return piece_name
+
+    def _set_bit(self, piece_name: str, index: int) -> None:
+        kind = get_piece_kind(piece_name)
+        self.bitboards[kind] = self.bitboards.get(kind, 0) | (1 << index)
+        self.occupancy[get_colour(piece_name)] |= 1 << index
+        self.hash ^= PIECE_KEYS[kind][index]
+
+    def _clear_bit(self, piece_name: str, index: int) -> None:
+        kind = get_piece_kind(piece_name)
+        self.bitboards[kind] &= ~(1 << index)
+        self.occupancy[get_colour(piece_name)] &= ~(1 << index)
+        self.hash ^= PIECE_KEYS[kind][index]
+
+    def place_piece(self, piece_name: str, square: str | int) -> None:
+        index = square_index(square)
+        if index is None:
+            raise ValueError(f"Invalid square: {square}")
+        occupant = self.squares[index]
+        if occupant is not None:
+            del self.piece_squares[occupant]
+            self._clear_bit(occupant, index)
+        self.squares[index] = piece_name
+        self.piece_squares[piece_name] = index
+        self._set_bit(piece_name, index)
+
+    def remove_piece(self, piece_name: str) -> int | None: # Returns the square index it stood on
+        index = self.piece_squares.pop(piece_name, None)
+        if index is not None:
+            self.squares[index] = None
+            self._clear_bit(piece_name, index)
+        return index
+
+    def move_piece(self, piece_name: str, square: str | int) -> str | None: # Returns captured piece (if any)
+        index = square_index(square)
+        if index is None:
+            raise ValueError(f"Invalid square: {square}")
+        captured = self.squares[index]
+        if captured is not None:
+            del self.piece_squares[captured]
+            self._clear_bit(captured, index)
+        origin = self.piece_squares[piece_name]
+        self._clear_bit(piece_name, origin)
+        self.squares[origin] = None
+        self.squares[index] = piece_name
+        self.piece_squares[piece_name] = index
+        self._set_bit(piece_name, index)
+        return captured
+
+    def _relocate(self, piece_name: str, origin: int, target: int) -> None: # Move onto an empty square
+        squares = self.squares
+        squares[origin] = None
+        squares[target] = piece_name
+        self.piece_squares[piece_name] = target
+        move_bits = (1 << origin) | (1 << target)
+        kind = get_piece_kind(piece_name)
+        self.bitboards[kind] ^= move_bits
+        self.occupancy[WHITE_SIDE if piece_name[0] == "w" else BLACK_SIDE] ^= move_bits
+        keys = PIECE_KEYS[kind]
+        self.hash ^= keys[origin] ^ keys[target]
+
+    def make_move(self, origin: int, target: int, promotion: str | None = None) -> None: # No legality check
+        squares = self.squares
+        piece_name = squares[origin]
+        white = piece_name[0] == "w"
+        is_pawn = piece_name[2] == "p"
+        captured = squares[target]
+        captured_square = target
+        if is_pawn and target == self.ep_square and captured is None: # En passant
+            captured_square = target - 8 if white else target + 8
+            captured = squares[captured_square]
+
+        self.undo_stack.append((origin, target, piece_name, captured, captured_square, promotion,
+                                self.castling, self.ep_square, self.halfmove_clock, self.hash))
+        if self.ep_square is not None:
+            self.hash ^= EP_KEYS[self.ep_square % 8]
+
+        if captured is not None:
+            self.remove_piece(captured)
+        self._relocate(piece_name, origin, target)
+        if piece_name[2:4] == "ki" and abs(target - origin) == 2: # Castling (rook jumps over)
+            rook_origin, rook_target = CASTLING_ROOK_MOVES[target]
+            self._relocate(squares[rook_origin], rook_origin, rook_target)
+        if promotion is not None:
+            self.remove_piece(piece_name)
+            self.place_piece(self.new_piece_name(f"{piece_name[:2]}{promotion}"), target)
+
+        castling = self.castling & CASTLING_RIGHTS_MASK[origin] & CASTLING_RIGHTS_MASK[target]
+        if castling != self.castling:
+            self.hash ^= CASTLING_KEYS[self.castling] ^ CASTLING_KEYS[castling]
+            self.castling = castling
+
+        # En passant square only when an enemy pawn can actually capture (keeps keys of equal positions equal)
+        self.ep_square = None
+        if is_pawn and abs(target - origin) == 16:
+            enemy_pawn = "b_p" if white else "w_p"
+            file = target % 8
+            if (file > 0 and (squares[target - 1] or "")[:3] == enemy_pawn) or \
+                    (file < 7 and (squares[target + 1] or "")[:3] == enemy_pawn):
+                self.ep_square = (origin + target) // 2
+                self.hash ^= EP_KEYS[file]
+
+        self.halfmove_clock = 0 if is_pawn or captured is not None else self.halfmove_clock + 1
+        if not white:
+            self.fullmove_number += 1
+        self.side_to_move ^= 1 # Toggled like the key: an off-turn test move is undone exactly
+        self.hash ^= SIDE_KEY
+
+    def unmake_move(self) -> None: # Take back the last make_move
+        origin, target, piece_name, captured, captured_square, promotion, castling, ep_square, halfmove_clock, key = self.undo_stack.pop()
+        squares = self.squares
+        if promotion is not None:
+            self.remove_piece(squares[target])
+            self.name_counter -= 1
+            self.place_piece(piece_name, target)
+        self._relocate(piece_name, target, origin)
+        if piece_name[2:4] == "ki" and abs(target - origin) == 2:
+            rook_origin, rook_target = CASTLING_ROOK_MOVES[target]
+            self._relocate(squares[rook_target], rook_target, rook_origin)
+        if captured is not None:
+            self.place_piece(captured, captured_square)
+
+        self.castling = castling
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self.hash = key
+        if piece_name[0] == "b":
+            self.fullmove_number -= 1
+        self.side_to_move ^= 1
+
+    def get_piece_name(self, square: str | int) -> str | None:
+        index = square_index(square)
+        if index is None:
+            return None
+        return self.squares[index]
+
+    def is_square_occupied(self, square: str | int) -> bool:
+        return self.get_piece_name(square) is not None
+
+    def get_piece_square(self, piece_name: str) -> str | None:
+        index = self.piece_squares.get(piece_name)
+        if index is None:
+            return None
+        return SQUARE_NAMES[index]
+
+    def friendly_piece(self, current_square: str | int, target_square: str | int) -> bool: # Check if piece is friendly
+        current_piece = self.get_piece_name(current_square)
+        target_piece = self.get_piece_name(target_square)
+        if current_piece is None or target_piece is None:
+            return False
+        return current_piece[0] == target_piece[0]
+
+# Global board state (mirrored by the sprites in chess_pieces_dict)
+board_state = Board()
@@ -0,0 +1,159 @@
+# Opening book
+#
+# Binary book in the Polyglot layout: 16-byte big-endian entries (position
+# key, move, weight, learn) sorted by key, several entries per position.
+# Keys are this program's Zobrist keys (zobrist.py) and moves are packed
+# moves (moves.py), so books are built with this tool rather than taken from
+# Polyglot. The file is memory-mapped and probed with a binary search: no
+# search time for book moves, and processes sharing a book share its pages.
+#
+#   python src/book.py build games.pgn more.pgn --output book.bin --plies 20
+#   python src/book.py probe book.bin --fen "<fen>"
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+from board import *
+from bitboard import init_tables
+from rules import generate_legal_moves
+from moves import pack_move, unpack_move, packed_move_name
+from pgn import read_games, movetext_sans, parse_san, GAME_RESULTS
+
+ENTRY = struct.Struct(">QHHI") # Key, packed move, weight, learn
+MAX_WEIGHT = 0xFFFF
+RESULT_POINTS = {"1-0": (2, 0), "0-1": (0, 2), "1/2-1/2": (1, 1)} # Weight per result for (white, black) moves
+
+class OpeningBook:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.entries = size // ENTRY.size
+
+    def close(self) -> None:
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.file.close()
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def key_at(self, index: int) -> int:
+        return struct.unpack_from(">Q", self.buffer, index * ENTRY.size)[0]
+
+    def probe(self, key: int) -> list[tuple[int, int]]: # [(packed move, weight)...] of a position key
+        low, high = 0, self.entries
+        while low < high: # First entry with a key >= key
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        for index in range(low, self.entries):
+            entry_key, move, weight, _ = ENTRY.unpack_from(self.buffer, index * ENTRY.size)
+            if entry_key != key:
+                break
+            moves.append((move, weight))
+        return moves
+
+    def moves(self, board: Board) -> list[tuple[tuple[int, int, str | None], int]]: # Legal book moves with weights
+        entries = self.probe(board.hash)
+        if not entries:
+            return []
+        legal_moves = generate_legal_moves(board) # Guards against key collisions and foreign books
+        return [(unpack_move(move), weight) for move, weight in entries if unpack_move(move) in legal_moves and weight]
+
+    def choose(self, board: Board, rng: random.Random = None) -> tuple[int, int, str | None] | None: # Weighted random pick
+        moves = self.moves(board)
+        if not moves:
+            return None
+        rng = rng if rng is not None else random
+        return rng.choices([move for move, _ in moves], [weight for _, weight in moves])[0]
+
+# Helper functions
+def collect_moves(paths: list[str], plies: int) -> dict[tuple[int, int], list[int]]: # (key, packed move) -> [weight, games]
+    counts = {}
+    board = Board()
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as file:
+            for game in read_games(file):
+                sans = list(movetext_sans(game["movetext"]))
+                result = sans[-1] if sans and sans[-1] in GAME_RESULTS else game["headers"].get("Result", "*")
+                points = RESULT_POINTS.get(result, (0, 0))
+                try:
+                    if "FEN" in game["headers"]:
+                        board.load_fen(game["headers"]["FEN"])
+                    else:
+                        board.reset()
+                except ValueError:
+                    continue
+                for san in sans[:plies]:
+                    if san in GAME_RESULTS:
+                        break
+                    try:
+                        move = parse_san(board, san)
+                    except ValueError:
+                        break # Rest of an invalid game is skipped
+                    entry = counts.setdefault((board.hash, pack_move(board, move)), [0, 0])
+                    entry[0] += points[board.side_to_move]
+                    entry[1] += 1
+                    board.make_move(*move)
+    return counts
+
+def build_book(paths: list[str], output: str, plies: int = 20, min_games: int = 1) -> int: # Returns the entry count
+    counts = collect_moves(paths, plies)
+    entries = [(key, move, weight) for (key, move), (weight, games) in counts.items() if games >= min_games and weight]
+    top = max((weight for _, _, weight in entries), default=0)
+    scale = MAX_WEIGHT / top if top > MAX_WEIGHT else 1
+    entries.sort(key=lambda entry: (entry[0], -entry[2])) # By key, best move first
+    with open(output, "wb") as file:
+        for key, move, weight in entries:
+            file.write(ENTRY.pack(key, move, max(1, int(weight * scale)), 0))
+    return len(entries)
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or probe an opening book")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="book from PGN files")
+    build.add_argument("pgn", nargs="+", help="PGN files")
+    build.add_argument("--output", default="book.bin")
+    build.add_argument("--plies", type=int, default=20, help="book depth (plies from the start of each game)")
+    build.add_argument("--min-games", type=int, default=1, help="leave out moves played in fewer games")
+    probe = commands.add_parser("probe", help="book moves of a position")
+    probe.add_argument("book", help="book file")
+    probe.add_argument("--fen", default=START_FEN)
+    args = parser.parse_args(argv)
+
+    init_tables()
+    if args.command == "build":
+        start = time.perf_counter()
+        entries = build_book(args.pgn, args.output, args.plies, args.min_games)
+        print(f"{entries} entries written to {args.output} in {time.perf_counter() - start:.2f}s")
+        return 0
+
+    board = Board()
+    board.load_fen(args.fen)
+    with OpeningBook(args.book) as book:
+        moves = book.moves(board)
+        total = sum(weight for _, weight in moves)
+        for move, weight in sorted(moves, key=lambda item: -item[1]):
+            print(f"{packed_move_name(pack_move(board, move)):>6} {weight:>6} {100 * weight / total:6.1f}%")
+        if not moves:
+            print("position not in book")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
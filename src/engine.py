@@ -0,0 +1,255 @@
+# Search engine
+#
+# Iterative deepening principal variation search (alpha-beta) with a
+# transposition table, quiescence search on captures and MVV-LVA / killer /
+# history move ordering. A search stops at its time or node limit and
+# returns the best move of the deepest finished iteration. Inside the search
+# moves are packed integers (moves.py) generated into one buffer per ply.
+
+import time
+
+from board import *
+from rules import generate_legal_moves, generate_legal_packed, in_check
+from evaluate import evaluate, PIECE_VALUES
+from tt import TranspositionTable, TT_EXACT, TT_LOWER, TT_UPPER
+from moves import MoveList, NO_MOVE, move_stack, make_move, unpack_move
+
+# Constants
+INFINITY = 32000
+MATE_SCORE = 30000
+MAX_PLY = 64
+CHECK_INTERVAL = 1024 # Nodes between clock checks
+MAX_TABLE_PIECES = 4 # Tablebase probes only with this many pieces or fewer
+MATE_BOUND = MATE_SCORE - 1000 # Scores beyond are mates (search or tablebase distances)
+
+# Helper functions
+def score_to_tt(score: int, ply: int) -> int: # Mate scores counted from the node instead of the root
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+def score_from_tt(score: int, ply: int) -> int: # Back to distances from the root of this search
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+class SearchTimeout(Exception):
+    pass
+
+class SearchResult:
+    def __init__(self, move: tuple | None, score: int, depth: int, nodes: int, elapsed: float, pv: list) -> None:
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.pv = pv
+
+    def __repr__(self) -> str:
+        return f"SearchResult(move={self.move}, score={self.score}, depth={self.depth}, nodes={self.nodes})"
+
+class Engine:
+    def __init__(self, hash_mb: float = 16, book=None, tablebases=None) -> None:
+        self.tt = TranspositionTable(hash_mb)
+        self.book = book # OpeningBook probed before searching (book.py)
+        self.tablebases = tablebases # Tablebases probed at the root and in the tree (tablebase.py)
+        self.move_lists = move_stack(MAX_PLY) # Move buffer per ply
+        self.nodes = 0
+        self.stop = False # Set from outside to abort the running search
+        self.stop_event = None # multiprocessing Event of a ParallelEngine (worker engines)
+
+    def prepare(self, board: Board, time_limit: float = None, node_limit: int = None) -> None: # Reset per-search state
+        self.board = board
+        self.nodes = 0
+        self.stop = False
+        self.start_time = time.perf_counter()
+        self.deadline = None if time_limit is None else self.start_time + time_limit
+        self.node_limit = node_limit
+        self.killers = [[NO_MOVE, NO_MOVE] for _ in range(MAX_PLY + 1)]
+        self.history = [0] * 4096 # Per (from, to)
+        self.root_best = NO_MOVE
+        self.tt.new_search()
+
+    def search(self, board: Board, max_depth: int = MAX_PLY, time_limit: float = None,
+               node_limit: int = None, on_iteration=None) -> SearchResult:
+        # time_limit in seconds; on_iteration(result) is called after every finished depth
+        self.prepare(board, time_limit, node_limit)
+        if self.book is not None:
+            move = self.book.choose(board)
+            if move is not None:
+                return SearchResult(move, 0, 0, 0, time.perf_counter() - self.start_time, [move]) # No search
+        if self.tablebases is not None:
+            entry = self.tablebases.best_move(board)
+            if entry is not None:
+                move, wdl, plies = entry
+                return SearchResult(move, wdl * (MATE_SCORE - plies), 0, 0, time.perf_counter() - self.start_time, [move])
+
+        root_moves = generate_legal_moves(board)
+        result = SearchResult(root_moves[0] if root_moves else None, 0, 0, 0, 0.0, [])
+        if len(root_moves) <= 1:
+            return result # Nothing to choose
+
+        undo_depth = len(board.undo_stack)
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self.negamax(depth, -INFINITY, INFINITY, 0)
+            except SearchTimeout:
+                while len(board.undo_stack) > undo_depth:
+                    board.unmake_move()
+                break
+            result = SearchResult(unpack_move(self.root_best), score, depth, self.nodes, time.perf_counter() - self.start_time, self.principal_variation(depth))
+            if on_iteration is not None:
+                on_iteration(result)
+            if abs(score) >= MATE_SCORE - MAX_PLY:
+                break # Forced mate found
+            if self.deadline is not None and time.perf_counter() > self.start_time + (self.deadline - self.start_time) / 2:
+                break # Next iteration would not finish in time
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - self.start_time
+        return result
+
+    def check_limits(self) -> None:
+        if self.stop or self.stop_event is not None and self.stop_event.is_set():
+            raise SearchTimeout
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchTimeout
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchTimeout
+
+    def is_repetition(self) -> bool: # Position seen before since the last capture / pawn move
+        board = self.board
+        key = board.hash
+        stack = board.undo_stack
+        for back in range(2, min(board.halfmove_clock, len(stack)) + 1, 2):
+            if stack[-back][9] == key:
+                return True
+        return False
+
+    def order_moves(self, moves: MoveList, tt_move: int, ply: int) -> list[int]:
+        squares = self.board.squares
+        killers = self.killers[ply]
+        history = self.history
+
+        def move_score(move):
+            if move == tt_move:
+                return 1_000_000
+            if move & 0x4000: # Capture: MVV-LVA (en passant takes a pawn)
+                victim = squares[move >> 6 & 0x3F]
+                victim_value = PIECE_VALUES[get_piece_type(victim)] if victim is not None else PIECE_VALUES["pawn"]
+                return 100_000 + 10 * victim_value - PIECE_VALUES[get_piece_type(squares[move & 0x3F])] // 10
+            if move & 0x8000:
+                return 90_000 + (move >> 12 & 0x3) # Queen first
+            if move == killers[0]:
+                return 80_000
+            if move == killers[1]:
+                return 79_000
+            return history[move & 0xFFF]
+
+        return sorted(moves, key=move_score, reverse=True)
+
+    def negamax(self, depth: int, alpha: int, beta: int, ply: int) -> int:
+        board = self.board
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self.check_limits()
+
+        if ply > 0 and (board.halfmove_clock >= 100 or self.is_repetition()):
+            return 0 # Draw
+        if ply > 0 and self.tablebases is not None and len(board.piece_squares) <= MAX_TABLE_PIECES:
+            entry = self.tablebases.probe(board)
+            if entry is not None: # Exact result, no search below
+                wdl, plies = entry
+                return wdl * (MATE_SCORE - ply - plies)
+
+        checked = in_check(board)
+        if checked and ply < MAX_PLY:
+            depth += 1 # Check extension
+        if depth <= 0 or ply >= MAX_PLY:
+            return self.quiescence(alpha, beta, ply)
+
+        # Transposition table
+        original_alpha = alpha
+        tt_move = NO_MOVE
+        entry = self.tt.probe(board.hash)
+        if entry is not None:
+            tt_move, tt_score, tt_depth, bound = entry
+            tt_score = score_from_tt(tt_score, ply)
+            if ply > 0 and tt_depth >= depth:
+                if bound == TT_EXACT or (bound == TT_LOWER and tt_score >= beta) or (bound == TT_UPPER and tt_score <= alpha):
+                    return tt_score
+
+        moves = generate_legal_packed(board, self.move_lists[ply])
+        if not moves.count:
+            return -(MATE_SCORE - ply) if checked else 0 # Checkmate / stalemate
+
+        best_score = -INFINITY
+        best_move = NO_MOVE
+        for count, move in enumerate(self.order_moves(moves, tt_move, ply)):
+            make_move(board, move)
+            if count == 0:
+                score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            else: # Principal variation search: null window first
+                score = -self.negamax(depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta:
+                    score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if ply == 0:
+                    self.root_best = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not move & 0xC000: # Quiet move caused a cutoff
+                    killers = self.killers[ply]
+                    if move != killers[0]:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                    self.history[move & 0xFFF] += depth * depth
+                break
+
+        bound = TT_LOWER if best_score >= beta else TT_EXACT if best_score > original_alpha else TT_UPPER
+        self.tt.store(board.hash, best_move, score_to_tt(best_score, ply), depth, bound)
+        return best_score
+
+    def quiescence(self, alpha: int, beta: int, ply: int) -> int:
+        board = self.board
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self.check_limits()
+
+        stand_pat = evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        for move in self.order_moves(generate_legal_packed(board, self.move_lists[ply], None, True), NO_MOVE, ply):
+            make_move(board, move)
+            score = -self.quiescence(-beta, -alpha, ply + 1)
+            board.unmake_move()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def principal_variation(self, depth: int) -> list: # Best line from the transposition table
+        board = self.board
+        pv = []
+        for _ in range(depth):
+            entry = self.tt.probe(board.hash)
+            move = self.root_best if not pv else (entry[0] if entry is not None else NO_MOVE)
+            if move == NO_MOVE or move not in generate_legal_packed(board, MoveList()):
+                break
+            pv.append(move)
+            make_move(board, move)
+        for _ in pv:
+            board.unmake_move()
+        return [unpack_move(move) for move in pv]
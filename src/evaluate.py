@@ -0,0 +1,148 @@
+# Static evaluation (centipawns, from the side to move's point of view)
+#
+# Material plus piece-square tables (Tomasz Michniewski's "simplified
+# evaluation function"). Tables are written from white's point of view with
+# a8 first, so a white piece on square index i reads entry i ^ 56.
+#
+# evaluate_position adds mobility and pawn structure terms; it is the scalar
+# version of the NumPy batch evaluator (batcheval.py) and gives the same
+# scores. The search uses the cheaper evaluate.
+
+from board import *
+from bitboard import KNIGHT_ATTACKS, rook_attacks, bishop_attacks, iter_bits, pop_count
+
+PIECE_VALUES = {"pawn": 100, "knight": 320, "bishop": 330, "rook": 500, "queen": 900, "king": 0}
+
+PIECE_SQUARE_TABLES = {
+    "pawn": [
+         0,  0,  0,  0,  0,  0,  0,  0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+         5,  5, 10, 25, 25, 10,  5,  5,
+         0,  0,  0, 20, 20,  0,  0,  0,
+         5, -5,-10,  0,  0,-10, -5,  5,
+         5, 10, 10,-20,-20, 10, 10,  5,
+         0,  0,  0,  0,  0,  0,  0,  0,
+    ],
+    "knight": [
+        -50,-40,-30,-30,-30,-30,-40,-50,
+        -40,-20,  0,  0,  0,  0,-20,-40,
+        -30,  0, 10, 15, 15, 10,  0,-30,
+        -30,  5, 15, 20, 20, 15,  5,-30,
+        -30,  0, 15, 20, 20, 15,  0,-30,
+        -30,  5, 10, 15, 15, 10,  5,-30,
+        -40,-20,  0,  5,  5,  0,-20,-40,
+        -50,-40,-30,-30,-30,-30,-40,-50,
+    ],
+    "bishop": [
+        -20,-10,-10,-10,-10,-10,-10,-20,
+        -10,  0,  0,  0,  0,  0,  0,-10,
+        -10,  0,  5, 10, 10,  5,  0,-10,
+        -10,  5,  5, 10, 10,  5,  5,-10,
+        -10,  0, 10, 10, 10, 10,  0,-10,
+        -10, 10, 10, 10, 10, 10, 10,-10,
+        -10,  5,  0,  0,  0,  0,  5,-10,
+        -20,-10,-10,-10,-10,-10,-10,-20,
+    ],
+    "rook": [
+          0,  0,  0,  0,  0,  0,  0,  0,
+          5, 10, 10, 10, 10, 10, 10,  5,
+         -5,  0,  0,  0,  0,  0,  0, -5,
+         -5,  0,  0,  0,  0,  0,  0, -5,
+         -5,  0,  0,  0,  0,  0,  0, -5,
+         -5,  0,  0,  0,  0,  0,  0, -5,
+         -5,  0,  0,  0,  0,  0,  0, -5,
+          0,  0,  0,  5,  5,  0,  0,  0,
+    ],
+    "queen": [
+        -20,-10,-10, -5, -5,-10,-10,-20,
+        -10,  0,  0,  0,  0,  0,  0,-10,
+        -10,  0,  5,  5,  5,  5,  0,-10,
+         -5,  0,  5,  5,  5,  5,  0, -5,
+          0,  0,  5,  5,  5,  5,  0, -5,
+        -10,  5,  5,  5,  5,  5,  0,-10,
+        -10,  0,  5,  0,  0,  0,  0,-10,
+        -20,-10,-10, -5, -5,-10,-10,-20,
+    ],
+    "king": [
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -20,-30,-30,-40,-40,-30,-30,-20,
+        -10,-20,-20,-20,-20,-20,-20,-10,
+         20, 20,  0,  0,  0,  0, 20, 20,
+         20, 30, 10,  0,  0, 10, 30, 20,
+    ],
+}
+
+# Score per piece kind and square index (material + table), white positive
+KIND_SQUARE_SCORES = {}
+for piece_type, table in PIECE_SQUARE_TABLES.items():
+    KIND_SQUARE_SCORES[f"w_{piece_type}"] = [PIECE_VALUES[piece_type] + table[index ^ 56] for index in range(64)]
+    KIND_SQUARE_SCORES[f"b_{piece_type}"] = [-(PIECE_VALUES[piece_type] + table[index]) for index in range(64)]
+
+def evaluate(board: Board) -> int:
+    score = 0
+    for piece_name, index in board.piece_squares.items():
+        score += KIND_SQUARE_SCORES[get_piece_kind(piece_name)][index]
+    return score if board.side_to_move == WHITE_SIDE else -score
+
+# Positional terms (white positive)
+MOBILITY_WEIGHTS = {"knight": 4, "bishop": 4, "rook": 2, "queen": 1} # Per square attacked by the pieces of a kind, own pieces excluded
+DOUBLED_PAWN = -10 # Per extra pawn on a file
+ISOLATED_PAWN = -15 # Per pawn without own pawns on the neighbouring files
+PASSED_PAWN_BONUS = [0, 5, 10, 20, 35, 60, 100, 0] # By rank, counted from the pawn's side
+
+def material_score(board: Board) -> int: # Material + piece-square tables
+    score = 0
+    for piece_name, index in board.piece_squares.items():
+        score += KIND_SQUARE_SCORES[get_piece_kind(piece_name)][index]
+    return score
+
+def mobility_score(board: Board, colour: int) -> int:
+    side = "wb"[colour]
+    bitboards = board.bitboards
+    occupied = board.occupancy[WHITE_SIDE] | board.occupancy[BLACK_SIDE]
+    score = 0
+    for piece_type, weight in MOBILITY_WEIGHTS.items():
+        attacks = 0 # Union over the pieces of the kind
+        for index in iter_bits(bitboards.get(f"{side}_{piece_type}", 0)):
+            if piece_type == "knight":
+                attacks |= KNIGHT_ATTACKS[index]
+            if piece_type in ("rook", "queen"):
+                attacks |= rook_attacks(index, occupied)
+            if piece_type in ("bishop", "queen"):
+                attacks |= bishop_attacks(index, occupied)
+        score += weight * pop_count(attacks & ~board.occupancy[colour])
+    return score
+
+def pawn_structure_score(board: Board, colour: int) -> int:
+    pawns = [[] for _ in range(8)] # Ranks per file
+    enemy_pawns = [[] for _ in range(8)]
+    for index in iter_bits(board.bitboards.get("w_pawn" if colour == WHITE_SIDE else "b_pawn", 0)):
+        pawns[index & 7].append(index >> 3)
+    for index in iter_bits(board.bitboards.get("b_pawn" if colour == WHITE_SIDE else "w_pawn", 0)):
+        enemy_pawns[index & 7].append(index >> 3)
+
+    score = 0
+    for file, ranks in enumerate(pawns):
+        if not ranks:
+            continue
+        neighbours = range(max(0, file - 1), min(8, file + 2))
+        score += DOUBLED_PAWN * (len(ranks) - 1)
+        if not any(pawns[other] for other in neighbours if other != file):
+            score += ISOLATED_PAWN * len(ranks)
+        for rank in ranks:
+            if colour == WHITE_SIDE:
+                passed = not any(enemy > rank for other in neighbours for enemy in enemy_pawns[other])
+            else:
+                passed = not any(enemy < rank for other in neighbours for enemy in enemy_pawns[other])
+            if passed:
+                score += PASSED_PAWN_BONUS[rank if colour == WHITE_SIDE else 7 - rank]
+    return score
+
+def evaluate_position(board: Board) -> int: # All terms, side to move's point of view
+    score = (material_score(board) + mobility_score(board, WHITE_SIDE) - mobility_score(board, BLACK_SIDE)
+             + pawn_structure_score(board, WHITE_SIDE) - pawn_structure_score(board, BLACK_SIDE))
+    return score if board.side_to_move == WHITE_SIDE else -score
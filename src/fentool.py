@@ -0,0 +1,122 @@
+# Streaming bulk FEN sweep
+#
+# Reads a file with one FEN per line through a memory map and writes one
+# result line per input line ("<line number>\t<result>"), without loading
+# the file into memory:
+#
+#   python src/fentool.py positions.fen --mode moves
+#   python src/fentool.py positions.fen --mode check --workers 4 --output status.txt
+#   python src/fentool.py positions.fen --mode perft --depth 2
+#
+# The file is split into byte chunks that end on a line break; workers
+# process the chunks and results are written in input order, so memory stays
+# bounded by the chunk size. Invalid lines give "error: <message>".
+
+import argparse
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from board import *
+from bitboard import init_tables
+from rules import generate_legal_packed, in_check
+from moves import MoveList, move_stack
+from perft import perft_packed
+
+MODES = ("moves", "check", "perft")
+CHUNK_BYTES = 1 << 22 # 4 MB of input per task
+
+_board = Board() # Reused by every line of a worker
+_move_list = MoveList()
+
+# Helper functions
+def position_result(board: Board, mode: str, depth: int) -> str:
+    if mode == "moves": # Legal move count
+        return str(generate_legal_packed(board, _move_list).count)
+    if mode == "perft":
+        return str(perft_packed(board, depth, move_stack(depth)))
+    checked = in_check(board)
+    if not generate_legal_packed(board, _move_list).count:
+        return "checkmate" if checked else "stalemate"
+    return "check" if checked else "-"
+
+def chunk_ranges(buffer: mmap.mmap, chunk_bytes: int = CHUNK_BYTES) -> list[tuple[int, int]]: # (start, end) on line breaks
+    ranges = []
+    start, size = 0, len(buffer)
+    while start < size:
+        end = buffer.find(b"\n", min(start + chunk_bytes, size) - 1)
+        end = size if end == -1 else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+def process_chunk(path: str, start: int, end: int, mode: str, depth: int) -> tuple[list[str], int]: # (results, errors)
+    results, errors = [], 0
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        buffer.seek(start)
+        while buffer.tell() < end:
+            line = buffer.readline().strip()
+            if not line or line.startswith(b"#"):
+                results.append("")
+                continue
+            try:
+                _board.load_fen(line.decode("ascii"))
+                results.append(position_result(_board, mode, depth))
+            except (ValueError, UnicodeDecodeError, KeyError, IndexError) as error:
+                results.append(f"error: {error}")
+                errors += 1
+    return results, errors
+
+def write_results(output, chunk: tuple[list[str], int], lines: int, errors: int) -> tuple[int, int]:
+    results, chunk_errors = chunk
+    output.write("".join(f"{lines + number}\t{result}\n" for number, result in enumerate(results, 1) if result))
+    return lines + len(results), errors + chunk_errors
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Legal move counts / check status for every FEN of a file")
+    parser.add_argument("path", help="file with one FEN per line")
+    parser.add_argument("--mode", choices=MODES, default="moves")
+    parser.add_argument("--depth", type=int, default=2, help="perft depth (--mode perft)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", default=None, help="result file (default: standard output)")
+    args = parser.parse_args(argv)
+
+    init_tables()
+    start_time = time.perf_counter()
+    if os.path.getsize(args.path) == 0:
+        ranges = []
+    else:
+        with open(args.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            ranges = chunk_ranges(buffer)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    pool = ProcessPoolExecutor(args.workers, initializer=init_tables) if args.workers > 1 else None
+    lines = errors = 0
+    try:
+        tasks = ((args.path, start, end, args.mode, args.depth) for start, end in ranges)
+        if pool is not None: # Ordered results, a bounded number of chunks in flight
+            pending = []
+            for task in tasks:
+                pending.append(pool.submit(process_chunk, *task))
+                if len(pending) > 2 * args.workers:
+                    lines, errors = write_results(output, pending.pop(0).result(), lines, errors)
+            for future in pending:
+                lines, errors = write_results(output, future.result(), lines, errors)
+        else:
+            for task in tasks:
+                lines, errors = write_results(output, process_chunk(*task), lines, errors)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - start_time
+    rate = lines / elapsed if elapsed > 0 else 0
+    print(f"{lines} lines, {errors} errors, {elapsed:.2f}s, {rate:,.0f} lines/s", file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
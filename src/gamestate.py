@@ -0,0 +1,85 @@
+# Game termination tracking (pygame independent)
+#
+# GameState follows a Board move by move and tells after every ply whether
+# the game is over: checkmate, stalemate, threefold repetition, fifty-move
+# rule or insufficient material. The GUI, self-play, PGN export and the game
+# server all read game results from here. The work per ply is bounded:
+# repetitions are counted in a table of position keys since the last pawn
+# move or capture (earlier positions cannot come back), mate / stalemate stop
+# at the first legal move and material is read from the piece bitboards.
+# Castling and en passant rights are the Board's bitfields (Board.castling,
+# Board.ep_square) and part of the position key.
+
+from board import *
+from rules import in_check, has_legal_move, insufficient_material
+
+FIFTY_MOVE_PLIES = 100
+REPETITION_LIMIT = 3
+
+class GameState:
+    def __init__(self, board: Board) -> None:
+        self.board = board
+        self.reset()
+
+    def reset(self) -> tuple[str, str] | None: # Track the board from its current position (new game, FEN, moves made elsewhere)
+        board = self.board
+        self.repetitions: dict[int, int] = {} # Position key -> times seen since the last irreversible move
+        stack = board.undo_stack
+        for back in range(1, min(board.halfmove_clock, len(stack)) + 1):
+            key = stack[-back][9]
+            self.repetitions[key] = self.repetitions.get(key, 0) + 1
+        self.repetitions[board.hash] = self.repetitions.get(board.hash, 0) + 1
+        return self.update()
+
+    def push(self, origin: int, target: int, promotion: str | None = None) -> tuple[str, str] | None: # Make a legal move
+        self.board.make_move(origin, target, promotion)
+        return self.record_move()
+
+    def record_move(self) -> tuple[str, str] | None: # The board's last make_move (played by the caller)
+        board = self.board
+        if board.halfmove_clock == 0: # Pawn move or capture: no earlier position can repeat
+            self.repetitions = {}
+        self.repetitions[board.hash] = self.repetitions.get(board.hash, 0) + 1
+        return self.update()
+
+    def pop(self) -> tuple[str, str] | None: # Take back the last move
+        board = self.board
+        irreversible = board.halfmove_clock == 0
+        count = self.repetitions.get(board.hash, 0) - 1
+        if count > 0:
+            self.repetitions[board.hash] = count
+        else:
+            self.repetitions.pop(board.hash, None)
+        board.unmake_move()
+        if irreversible: # Table of the previous stretch: at most FIFTY_MOVE_PLIES keys
+            return self.reset()
+        return self.update()
+
+    def update(self) -> tuple[str, str] | None: # (result, termination) or None, also in self.outcome
+        board = self.board
+        self.check = in_check(board)
+        if not has_legal_move(board):
+            if self.check:
+                self.outcome = ("0-1" if board.side_to_move == WHITE_SIDE else "1-0"), "checkmate"
+            else:
+                self.outcome = "1/2-1/2", "stalemate"
+        elif board.halfmove_clock >= FIFTY_MOVE_PLIES:
+            self.outcome = "1/2-1/2", "fifty-move rule"
+        elif self.repetitions.get(board.hash, 0) >= REPETITION_LIMIT:
+            self.outcome = "1/2-1/2", "threefold repetition"
+        elif insufficient_material(board):
+            self.outcome = "1/2-1/2", "insufficient material"
+        else:
+            self.outcome = None
+        return self.outcome
+
+    @property
+    def game_over(self) -> bool:
+        return self.outcome is not None
+
+    def status_text(self) -> str: # "White to move", "Check", "Checkmate, 1-0", ...
+        if self.outcome is not None:
+            result, termination = self.outcome
+            return f"{termination.capitalize()}, {result}"
+        side = "White" if self.board.side_to_move == WHITE_SIDE else "Black"
+        return f"{side} to move, check" if self.check else f"{side} to move"
@@ -0,0 +1,134 @@
+# Load generator for the game server (server.py)
+#
+#   python src/loadgen.py --spawn --connections 8 --games 200 --seconds 10
+#
+# Every connection keeps its games busy: one random legal move per game is
+# sent in a batch, then the replies are read (pipelined, in order). Finished
+# games (or games past --plies) are closed and replaced by new ones until the
+# time is up. Reports moves/s, round trip latency as seen by the client and
+# the server's own move handling percentiles (its "stats" command). --spawn
+# starts a server on localhost for the run.
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+from board import *
+from bitboard import init_tables
+from rules import generate_legal_moves
+from moves import tuple_move_name
+from server import DEFAULT_HOST, DEFAULT_PORT
+
+CONNECT_ATTEMPTS = 50 # Spawned server start up: 50 x 0.1s
+
+def percentile(ordered: list[float], percent: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))] if ordered else 0.0
+
+async def connect(host: str, port: int) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    for _ in range(CONNECT_ATTEMPTS - 1):
+        try:
+            return await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(0.1)
+    return await asyncio.open_connection(host, port)
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, lines: list[str]) -> list[list[str]]:
+    writer.write("".join(line + "\n" for line in lines).encode())
+    await writer.drain()
+    return [(await reader.readline()).decode().split() for _ in lines]
+
+async def new_games(reader, writer, count: int, time_control: list[str]) -> dict[int, Board]:
+    games = {}
+    for reply in await request(reader, writer, [" ".join(["new"] + time_control)] * count):
+        if reply[:1] != ["game"]:
+            raise RuntimeError(f"server refused a game: {' '.join(reply)}")
+        board = Board()
+        board.reset()
+        games[int(reply[1])] = board # Client copy of the position
+    return games
+
+async def run_connection(host: str, port: int, args: argparse.Namespace, deadline: float, rng: random.Random,
+                         latencies: list[float], totals: dict) -> None:
+    reader, writer = await connect(host, port)
+    games = await new_games(reader, writer, args.games, args.clock or [])
+    while time.perf_counter() < deadline:
+        moves = {game_id: rng.choice(generate_legal_moves(board)) for game_id, board in games.items()}
+        start = time.perf_counter()
+        replies = await request(reader, writer, [f"move {game_id} {tuple_move_name(move)}" for game_id, move in moves.items()])
+        done = time.perf_counter()
+        finished = []
+        for (game_id, move), reply in zip(moves.items(), replies):
+            latencies.append(done - start) # Whole batch round trip: what a client of this connection waits
+            if reply[:1] != ["ok"]:
+                totals["errors"] += 1
+                finished.append(game_id)
+                continue
+            totals["moves"] += 1
+            board = games[game_id]
+            board.make_move(*move)
+            if len(reply) > 5 or len(board.undo_stack) >= args.plies: # Result and termination appended
+                finished.append(game_id)
+                totals["games"] += 1
+        if finished:
+            await request(reader, writer, [f"close {game_id}" for game_id in finished])
+            for game_id in finished:
+                del games[game_id]
+            games.update(await new_games(reader, writer, len(finished), args.clock or []))
+    await request(reader, writer, [f"close {game_id}" for game_id in games])
+    writer.close()
+
+async def run(args: argparse.Namespace) -> dict:
+    latencies, totals = [], {"moves": 0, "games": 0, "errors": 0}
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    await asyncio.gather(*(run_connection(args.host, args.port, args, deadline, random.Random(rng.random()),
+                                          latencies, totals) for _ in range(args.connections)))
+    elapsed = time.perf_counter() - start
+    reader, writer = await connect(args.host, args.port)
+    server_stats = (await request(reader, writer, ["stats"]))[0]
+    writer.close()
+    latencies.sort()
+    return {"elapsed": elapsed, **totals, "rtt_p50": percentile(latencies, 50), "rtt_p99": percentile(latencies, 99),
+            "server": dict(zip(server_stats[1::2], server_stats[2::2]))}
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the game server with many concurrent games")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--spawn", action="store_true", help="start a server on localhost for the run")
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--games", type=int, default=100, help="concurrent games per connection")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--plies", type=int, default=200, help="plies before a game is replaced")
+    parser.add_argument("--clock", nargs=2, metavar=("BASE", "INCREMENT"), default=None, help="time control (seconds)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    init_tables()
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+                                   "--host", args.host, "--port", str(args.port),
+                                   "--max-games", str(args.connections * args.games * 2)])
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    server_stats = result["server"]
+    print(f"{args.connections} connections x {args.games} games, {result['elapsed']:.1f}s")
+    print(f"{result['moves']} moves ({result['moves'] / result['elapsed']:,.0f} moves/s), "
+          f"{result['games']} games finished, {result['errors']} errors")
+    print(f"client round trip p50 {result['rtt_p50'] * 1000:.2f} ms  p99 {result['rtt_p99'] * 1000:.2f} ms")
+    print(f"server move handling p50 {server_stats.get('move_p50_ms')} ms  p99 {server_stats.get('move_p99_ms')} ms")
+    return 1 if result["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,50 +3,62 @@ import pygame
 from utils import *
 from pieces import *
 from UI import *
-
-queen_count = 1
-positions_dict = {}
-
-def add_queen(piece_name: str, pos: tuple) -> None:
-    global queen_count
-    if is_white(piece_name):
-        piece_name_updated = "w_queen"
-        piece_obj = Sprite(white_pieces_surface.get(piece_name_updated), pos)
-        all_pieces_group.add(piece_obj)
-        piece_name_count = f"{piece_name_updated}{queen_count}"
-        queen_count += 1
-        chess_pieces_dict[piece_name_count] = piece_obj
-    else:
-        piece_name_updated = "b_queen"
-        piece_obj = Sprite(black_pieces_surface.get(piece_name_updated), pos)
-        all_pieces_group.add(piece_obj)
-        piece_name_count = f"{piece_name_updated}{queen_count}"
-        queen_count += 1
-        chess_pieces_dict[piece_name_count] = piece_obj
-
-def remove_piece(piece_name: str) -> None: # Remove piece from board
+from bitboard import BITBOARD_PIECE_CLASS_DICT
+from attacks import AttackMap
+from rules import legal_allowed_moves
+from movecache import MoveCache
+from gamestate import GameState
+
+
+# Move generator backends of the attack map (same moves/captures/promotions output)
+MOVE_GENERATORS = {
+    "board": PIECE_CLASS_DICT,
+    "bitboard": BITBOARD_PIECE_CLASS_DICT
+}
+piece_class_dict = BITBOARD_PIECE_CLASS_DICT
+
+def set_move_generator(name: str) -> None: # Select backend used by the attack map
+    global piece_class_dict
+    if name not in MOVE_GENERATORS:
+        raise ValueError(f"Unknown move generator: {name}")
+    piece_class_dict = MOVE_GENERATORS[name]
+    move_cache.clear()
+    attack_map.piece_class_dict = piece_class_dict
+    attack_map.rebuild()
+
+attack_map = AttackMap(board_state, piece_class_dict) # Allowed moves & attacks of every piece
+move_cache = MoveCache() # get_allowed_moves answers by (position hash, square)
+game_state = GameState(board_state) # Check, mate, draws after every move
+
+def add_piece(piece_name: str) -> None: # Create the sprite of a piece on the board
+    piece_obj = Sprite(piece_image(piece_name), get_square_center(board_state.get_piece_square(piece_name)))
+    all_pieces_group.add(piece_obj)
+    chess_pieces_dict[piece_name] = piece_obj
+
+def remove_piece(piece_name: str) -> None: # Remove piece sprite
     all_pieces_group.remove(chess_pieces_dict.get(piece_name)) # Remeving from group
     del chess_pieces_dict[piece_name] # Removing piece from dictionary
 
-def capture_piece(piece_rect: pygame.Rect, target: str, target_square: tuple) -> None: # Handle piece capture
-    remove_piece(target)
-    piece_rect.center = target_square
-    PIECE_CAPTURE_SOUND.play()
+def sync_pieces(piece_names) -> None: # Mirror the board for the given pieces (moved, captured, promoted)
+    for piece_name in piece_names:
+        square = board_state.get_piece_square(piece_name)
+        if square is None:
+            if piece_name in chess_pieces_dict:
+                remove_piece(piece_name)
+        elif piece_name not in chess_pieces_dict:
+            add_piece(piece_name)
+        else:
+            chess_pieces_dict[piece_name].get_rect().center = get_square_center(square)
 
-def piece_can_move(piece_name: str, dest: tuple) -> bool: # Check if piece can move (based on its characteristics)
-    current_square = get_square_coord(chess_pieces_dict.get(piece_name).rect.center)
+def piece_can_move(piece_name: str, dest: tuple) -> bool: # Check if piece can move (legal moves only)
+    current_square = board_state.get_piece_square(piece_name)
     dest_square = get_square_coord(dest)
-    piece_name_formatted = piece_name[2:-1]
     can_move = False
 
     if current_square == dest_square:
         return False
-    
-    piece_rect: pygame.Rect = chess_pieces_dict.get(piece_name).get_rect()
-    piece_obj: Piece = PIECE_CLASS_DICT.get(piece_name_formatted)
-    piece: Piece = piece_obj(piece_name, piece_rect.center, dest)
 
-    moves = piece.get_allowed_moves()
+    moves = get_allowed_moves(piece_name)
     if moves:
         for move_list in moves.values():
             if dest_square in move_list:
@@ -54,81 +66,73 @@ def piece_can_move(piece_name: str, dest: tuple) -> bool: # Check if piece can m
 
     return can_move
 
-def get_allowed_moves(piece_name: str, current_pos: tuple) -> dict: # Return available moves by the piece (move and captures)
-    piece_name_formatted = piece_name[2:-1]
-    piece_obj: Piece = PIECE_CLASS_DICT.get(piece_name_formatted)
-    piece: Piece = piece_obj(piece_name, current_pos)
-    moves = piece.get_allowed_moves()
-    return moves
-
-def can_promote(piece_name: str, current_pos: tuple):
-    moves = get_allowed_moves(piece_name, current_pos)
-    promotions = moves.get("promotions", [])
-    if promotions:
-        return True
-    return False
-
-def promote(piece_name: str, target_square: tuple):
-    remove_piece(piece_name)
-    add_queen(piece_name, target_square)
-    PAWN_PROMOTION_SOUND.play()
+def get_allowed_moves(piece_name: str, current_pos: tuple = None) -> dict: # Return legal moves by the piece (move and captures)
+    key = (board_state.hash, board_state.piece_squares[piece_name])
+    moves = move_cache.get(key)
+    if moves is None:
+        moves = legal_allowed_moves(board_state, piece_name, attack_map.mobility[piece_name]) # Pseudo-legal moves kept by the map
+        move_cache.put(key, moves)
+    return moves # Shared with the cache: read only
 
-def move_piece(current_piece: str, mouse_pos: tuple) -> str:
-    piece_sprite: Sprite = chess_pieces_dict.get(current_piece)
-    piece_rect: pygame.Rect = piece_sprite.get_rect()
+def can_promote(piece_name: str, target_square: str) -> bool:
+    moves = get_allowed_moves(piece_name)
+    return target_square in moves.get("promotions", [])
 
+def move_piece(current_piece: str, mouse_pos: tuple) -> str:
+    origin_square = board_state.get_piece_square(current_piece)
     target_square = get_square_coord(mouse_pos)
-    target_square_center = get_square_center(target_square)
-    isOccupied = is_square_occupied(mouse_pos)
-    can_move = piece_can_move(current_piece, target_square_center)
 
-    if not can_move:
-        ILLEGAL_MOVE_SOUND.play()
+    if target_square is None or not piece_can_move(current_piece, get_square_center(target_square)):
+        resources.play("illegal_move")
         return
-    
-    # Move or capture
-    if not isOccupied:
-        if can_promote(current_piece, piece_rect.center):
-            promote(current_piece, target_square_center)
-        else:
-            piece_rect.center = target_square_center
-            PIECE_MOVE_SOUND.play()
-            print("Moved: %s -> %s" % (current_piece, get_square_coord(piece_rect.center))) # DEBUG
+
+    promotion = "queen" if can_promote(current_piece, target_square) else None
+    return play_move(SQUARE_INDEX[origin_square], SQUARE_INDEX[target_square], promotion)
+
+def play_move(origin: int, target: int, promotion: str | None = None) -> str: # Play a legal move (player or engine)
+    current_piece = board_state.squares[origin]
+    previous_ep_square = board_state.ep_square
+    board_state.make_move(origin, target, promotion)
+    game_state.record_move()
+    _, _, _, captured, captured_square, _, _, _, _, _ = board_state.undo_stack[-1]
+
+    # Mirror the move on the sprites
+    changed_squares = {origin, target, captured_square}
+    changed_pieces = [current_piece, board_state.squares[target]]
+    if captured is not None:
+        changed_pieces.append(captured)
+    if get_piece_type(current_piece) == "king" and abs(target - origin) == 2: # Castling rook
+        rook_origin, rook_target = CASTLING_ROOK_MOVES[target]
+        changed_squares |= {rook_origin, rook_target}
+        changed_pieces.append(board_state.squares[rook_target])
+    sync_pieces(changed_pieces)
+
+    # En passant rights changed: pawns next to the old / new target square
+    for ep_square in (previous_ep_square, board_state.ep_square):
+        if ep_square is not None:
+            changed_squares.add(ep_square)
+    attack_map.update(changed_squares) # Only pieces watching these squares
+
+    if promotion is not None:
+        resources.play("pawn_promotion")
+    elif captured is not None:
+        resources.play("piece_capture")
     else:
-        if can_promote(current_piece, piece_rect.center):
-            occupied_piece = get_piece_name(target_square_center)
-            capture_piece(piece_rect, occupied_piece, target_square_center)
-            promote(current_piece, target_square_center)
-        else:
-            occupied_piece = get_piece_name(target_square_center)
-            capture_piece(piece_rect, occupied_piece, target_square_center)
-            print("Removed: ", occupied_piece) # DEBUG
-    
-    update_positions()
-    return f"{current_piece[2]}{target_square}"
-
-def king_in_check() -> tuple[bool, dict]:
+        resources.play("piece_move")
+    return f"{current_piece[2]}{SQUARE_NAMES[target]}"
+
+def king_in_check() -> tuple[bool, dict]: # Kings attacked according to the attack map -> (any, {king: checker})
     in_check = False
     check_dict = {}
-    for piece, moves in positions_dict.items():
-        if moves is None:
-            continue
-        for square in moves:
-            target_piece = get_piece_name(square)
-            if target_piece is None:
-                continue
-            if "king" in target_piece and piece[0] != target_piece[0]:
-                check_dict[target_piece] = piece
-                in_check = True
+    for colour, king_kind in ((WHITE_SIDE, "w_king"), (BLACK_SIDE, "b_king")):
+        checkers = attack_map.checkers(colour)
+        if checkers:
+            king = board_state.get_piece_name(board_state.bitboards[king_kind].bit_length() - 1)
+            check_dict[king] = checkers[0]
+            in_check = True
     return in_check, check_dict
 
-def update_positions():
-    global positions_dict
-    for piece, piece_obj in chess_pieces_dict.items():
-        current_pos: pygame.Rect = piece_obj.get_rect()
-        allowed_moves = get_allowed_moves(piece, current_pos.center)
-        posiitons = []
-        for value in allowed_moves.values():
-            if value is not None:
-                posiitons += value
-        positions_dict[piece] = posiitons
\ No newline at end of file
+def update_positions(): # Full rebuild of the attack map (new game / loaded position)
+    move_cache.clear()
+    game_state.reset()
+    attack_map.rebuild()
@@ -1,10 +1,21 @@
 import pygame
 import os
+import sys
+import argparse
+import cProfile
+import datetime
+import shlex
+import time
 
 from utils import *
 from pieces import *
 from UI import *
 import logic
+from render import Renderer
+from pgn import board_pgn
+from uci import UCIClient, parse_move
+from atlas import SpriteAtlas
+from profiler import profiler
 
 # Initialize pygame
 pygame.init()
@@ -18,8 +29,11 @@ WIDTH, HEIGHT = 1000, 800 # Temp
 WINDOW = pygame.display.set_mode([WIDTH, HEIGHT], pygame.RESIZABLE)
 pygame.display.set_caption("Chess Game")
 pygame.display.set_icon(pygame.image.load(os.path.join("assets", "chess-icon.png")))
+resources.init() # Fonts & sounds
 
 
+PANEL_INTERVAL = 0.5 # Seconds between profiling overlay refreshes
+
 # Variable initialization
 selected_piece: Sprite = None
 selected_piece_name: str = None
@@ -29,84 +43,127 @@ played_moves = []
 ui = UI() # Instance initialize
 chess_board, square_rects = ui.chess_board()
 all_pieces = ui.initialize_pieces()
-
-def show_allowed_moves() -> None: # Highlights allowed moves (by piece)
-    if not allowed_moves:
-        return
-    
-    moves = allowed_moves.get("moves", [])
-    captures = allowed_moves.get("captures", [])
-    promotions = allowed_moves.get("promotions", [])
-    
-    if moves:
-        for square in moves:
-            if square in promotions:
-                continue
-            square_rect: pygame.Rect = square_rects_dict.get(square)
-            pygame.draw.circle(WINDOW, DARK_GRAY, square_rect.center, 10) # Highlight available moves
-    
-    if captures:
-        capture_highlight_surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-        capture_highlight_surface.fill(RED)
-        capture_highlight_surface.set_alpha(90)
-        for capture_square in captures:
-            capture_square_rect: pygame.Rect = square_rects_dict.get(capture_square)
-            WINDOW.blit(capture_highlight_surface, capture_square_rect.topleft) # Highlight capture moves
-
-    if promotions:
-        for square in promotions:
-            square_rect: pygame.Rect = square_rects.get(square)
-            pygame.draw.line(WINDOW, DARK_GRAY, (square_rect.centerx - 10, square_rect.centery), (square_rect.centerx + 10, square_rect.centery), 5)
-            pygame.draw.line(WINDOW, DARK_GRAY, (square_rect.centerx, square_rect.centery - 10), (square_rect.centerx, square_rect.centery + 10), 5)
-
-def piece_highlight() -> None: # Highlight selection of piece
-    if selected_piece is not None:
-        piece_rect: pygame.Rect = selected_piece.get_rect()
-        square_rect = get_square_rect(piece_rect.center)
-
-        overlay_color = (255, 255, 0)
-        overlay_surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-        overlay_surface.fill(overlay_color)
-        overlay_surface.set_alpha(70)
-
-        show_allowed_moves()
-        WINDOW.blit(overlay_surface, square_rect.topleft)
+logic.update_positions()
+renderer = Renderer(WINDOW, chess_board, square_rects)
 
 def display_moves(): # TODO: Fix design
     background_rect = pygame.Rect(WIDTH - 500, 50, 300, 300)
     pygame.draw.rect(WINDOW, (30, 30, 30), background_rect, border_radius = 20)
     text_y = background_rect.top + 10
     for move in played_moves:
-        text_surface = FONT32.render(move, True, (255, 255, 255))
+        text_surface = resources.font(32).render(move, True, (255, 255, 255))
         WINDOW.blit(text_surface, (background_rect.left + 10, text_y))
         text_y += 30
 
-def add_graphics() -> None: # Graphics section (board and more...)
-    WINDOW.fill(GRAY)
-    WINDOW.blit(chess_board, (BOARD_OFFSET_X, BOARD_OFFSET_Y)) # Loading chess board
-
-    piece_highlight() # Piece selection
-    #display_moves() # Highlight moves and captures
+def add_graphics() -> None: # Graphics section (board and more...), redraws changed areas only
+    _, check_dict = logic.king_in_check()
+    checked_squares = [board_state.get_piece_square(king) for king in check_dict] # Kings in check
+    if selected_piece is not None: # Piece selection, allowed moves and captures
+        renderer.set_highlights(get_square_coord(selected_piece.get_rect().center), allowed_moves, checked_squares)
+    else:
+        renderer.set_highlights(None, {}, checked_squares)
+    #display_moves()
 
     all_pieces.update() # Update pieces on board
-    all_pieces.draw(WINDOW)
-    pygame.display.update() # Display update
+    renderer.draw(all_pieces)
+
+def engine_move(engine: UCIClient, move_time: float) -> bool: # Computer plays for the side to move, True once moved
+    if not engine.thinking:
+        engine.go(board_state, move_time) # The engine process searches, the window keeps running
+        return False
+    move = engine.poll()
+    if move is None:
+        return False
+    played_moves.append(logic.play_move(*parse_move(board_state, move)))
+    if profiler.enabled and engine.last_info is not None and " nps " in engine.last_info:
+        profiler.set_value("engine nodes/s", int(engine.last_info.split(" nps ")[1].split()[0]))
+    return True
+
+def profiling_panel() -> pygame.Surface: # Profiling overlay text on a translucent panel
+    font = resources.font(18)
+    lines = [font.render(line, True, WHITE) for line in profiler.overlay_lines()]
+    panel = pygame.Surface((max(line.get_width() for line in lines) + 16, 20 * len(lines) + 12), pygame.SRCALPHA)
+    panel.fill((20, 20, 20, 200))
+    for index, line in enumerate(lines):
+        panel.blit(line, (8, 6 + 20 * index))
+    return panel
+
+def register_profiling_hooks() -> None: # Hot paths timed while profiling (P key / --profile)
+    for owner, attribute in ((logic, "get_allowed_moves"), (logic, "play_move"), (logic, "update_positions"),
+                             (logic, "king_in_check"), (sys.modules[__name__], "add_graphics"),
+                             (SpriteAtlas, "load_theme"), (SpriteAtlas, "build"), (ResourceManager, "font"),
+                             (ResourceManager, "sound")):
+        profiler.register(owner, attribute)
+
+def update_status(note: str = None) -> None: # Side to move / check / game result (and a note) in the window title
+    status = logic.game_state.status_text()
+    pygame.display.set_caption(f"Chess Game - {status} ({note})" if note else f"Chess Game - {status}")
 
-def main(): # Main function/loop
+def update_view() -> None: # Board view changed (resize, flip): redraw the board, move the sprites
+    global chess_board
+    chess_board, _ = ui.chess_board()
+    ui.relayout_pieces()
+    renderer.set_board(chess_board)
+
+def save_pgn(path: str, engine_side: int = None) -> None: # Game so far as PGN (appended, one game per save)
+    players = ["Player", "Player"]
+    if engine_side is not None:
+        players[engine_side] = "Engine"
+    headers = {"Event": "Casual game", "Site": "Chess Game", "Date": datetime.date.today().strftime("%Y.%m.%d"),
+               "Round": "-", "White": players[WHITE_SIDE], "Black": players[BLACK_SIDE]}
+    with open(path, "a") as file:
+        file.write(board_pgn(board_state, headers, logic.game_state) + "\n")
+
+def next_events(clock: pygame.time.Clock, animating: bool, event_driven: bool) -> list[pygame.event.Event]:
+    if animating or not event_driven: # Fixed frame rate
+        pygame.event.set_allowed(pygame.MOUSEMOTION)
+        clock.tick(FPS)
+        return pygame.event.get()
+    pygame.event.set_blocked(pygame.MOUSEMOTION) # Mouse moves alone don't wake the loop
+    return [pygame.event.wait()] + pygame.event.get() # Sleep until input / timer events
+
+def main(engine_side: int = None, move_time: float = 0.3, engine_command: list[str] = None, engine_options: dict = None,
+         event_driven: bool = True, auto_flip: bool = False, pgn_path: str = None): # Main function/loop
     global selected_piece, selected_piece_name, allowed_moves
-    previous_turn = 0 # Black - 0, White - 1
     clicked = False
     selected = False
+    engine = None
+    if engine_side is not None:
+        engine = UCIClient(engine_command, engine_options) # UCI engine process (src/uci.py by default)
 
     clock = pygame.time.Clock()
     running = True
+    panel_time = 0.0
+    update_status()
+    add_graphics()
     while running: # Main loop
-        clock.tick(FPS)
+        game_over = logic.game_state.game_over
+        engine_turn = engine is not None and board_state.side_to_move == engine_side and not game_over
+        # Frame rate only while dragging / engine to move / profiling
+        events = next_events(clock, clicked or engine_turn or profiler.enabled, event_driven)
+        frame_start = time.perf_counter()
         mouse_pos = pygame.mouse.get_pos()
 
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            if event.type == pygame.VIDEORESIZE:
+                renderer.window = pygame.display.get_surface()
+                if board_view.resize(event.size):
+                    update_view()
+                else:
+                    renderer.invalidate()
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                renderer.invalidate() # Window contents lost
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_f: # Flip the board
+                board_view.flip()
+                update_view()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_p: # Profiling on / off with its overlay
+                if not profiler.toggle():
+                    renderer.set_panel(None)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_s and pgn_path is not None: # Save the game
+                save_pgn(pgn_path, engine_side)
+                update_status(f"saved to {pgn_path}")
             if event.type == pygame.MOUSEBUTTONDOWN and clicked == False:
                 clicked = True
                 clicked_square = get_square_coord(mouse_pos)
@@ -115,7 +172,6 @@ def main(): # Main function/loop
                     if friendly_piece(piece_rect.center, mouse_pos):
                         piece_name = get_piece_name(mouse_pos) # Switch selection if clicked on friendly piece
                         if piece_name is not None:
-                            #if (previous_turn == 0 and is_white(piece_name)) or (previous_turn == 1 and not is_white(piece_name)): # Check for turn
                             selected = True
                             selected_piece, selected_piece_name = chess_pieces_dict.get(piece_name), piece_name # Record selection
                             allowed_moves = logic.get_allowed_moves(piece_name, mouse_pos)
@@ -123,26 +179,83 @@ def main(): # Main function/loop
                         move = logic.move_piece(piece_name, mouse_pos) # Move piece
                         if move is not None:
                             played_moves.append(move) # Record move
-                            if is_white(piece_name):
-                                previous_turn = 1
-                            else:
-                                previous_turn = 0                 
+                            update_status()
+                            if profiler.enabled:
+                                profiler.count("moves played")
                         selected = False
                         selected_piece = None # Reset selection
                 elif clicked_square is not None:
                     piece_name = get_piece_name(mouse_pos) # Switch selection if clicked on friendly piece
-                    if piece_name is not None:
-                        #if (previous_turn == 0 and is_white(piece_name)) or (previous_turn == 1 and not is_white(piece_name)): # Check for turn
+                    if (piece_name is not None and get_colour(piece_name) == board_state.side_to_move and not engine_turn
+                            and not game_over): # Check for turn
                         selected = True
                         selected_piece, selected_piece_name = chess_pieces_dict.get(piece_name), piece_name # Record selection
                         allowed_moves = logic.get_allowed_moves(piece_name, mouse_pos)
             if event.type == pygame.MOUSEBUTTONUP and clicked == True:
                 clicked = False
-                print("Clicked square: ", get_square_coord(mouse_pos)) # DEBUG
 
+        if auto_flip and board_view.flipped != (board_state.side_to_move == BLACK_SIDE): # Side to move at the bottom
+            board_view.flip()
+            update_view()
         add_graphics()
 
+        if engine_turn and board_state.side_to_move == engine_side and engine_move(engine, move_time):
+            update_status()
+            selected = False
+            selected_piece = None # Reset selection
+            add_graphics()
+        if profiler.enabled:
+            profiler.frame(time.perf_counter() - frame_start)
+            if frame_start - panel_time >= PANEL_INTERVAL:
+                panel_time = frame_start
+                profiler.set_value("move cache hit %", 100 * logic.move_cache.hit_rate())
+                renderer.set_panel(profiling_panel())
+                renderer.draw(all_pieces)
+
+    if engine is not None:
+        engine.close()
+    if pgn_path is not None and board_state.undo_stack:
+        save_pgn(pgn_path, engine_side)
     pygame.quit()
 
+register_profiling_hooks()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Chess Game")
+    parser.add_argument("--engine", choices=["white", "black"], default=None, help="side played by the computer")
+    parser.add_argument("--movetime", type=int, default=300, help="engine time per move (ms)")
+    parser.add_argument("--workers", type=int, default=1, help="engine search processes")
+    parser.add_argument("--engine-command", default=None, help="UCI engine to play against (default: src/uci.py)")
+    parser.add_argument("--fen", default=None, help="start position (Forsyth-Edwards Notation)")
+    parser.add_argument("--flip", action="store_true", help="start with black at the bottom (F key flips)")
+    parser.add_argument("--autoflip", action="store_true", help="flip the board after each turn")
+    parser.add_argument("--book", default=None, help="opening book file for the engine (src/book.py builds one)")
+    parser.add_argument("--tablebases", default=None, help="endgame tablebase directory (src/tablebase.py builds them)")
+    parser.add_argument("--pgn", default=None, help="append the game to this PGN file on exit (S key saves)")
+    parser.add_argument("--profile", action="store_true", help="start with profiling and its overlay on (P key toggles)")
+    parser.add_argument("--profile-json", default=None, help="write the profiling stats to this JSON file on exit")
+    parser.add_argument("--pstats", default=None, help="run under cProfile and write a pstats file")
+    parser.add_argument("--poll", action="store_true", help="redraw loop at a fixed frame rate instead of waiting for events")
+    args = parser.parse_args()
+    if args.fen is not None: # Start from a position
+        ui.initialize_pieces(args.fen)
+        logic.update_positions()
+    if args.flip:
+        board_view.flip()
+        update_view()
+    options = {"Threads": args.workers} if args.workers != 1 else {}
+    if args.book is not None:
+        options["BookFile"] = os.path.abspath(args.book)
+    if args.tablebases is not None:
+        options["TablebasePath"] = os.path.abspath(args.tablebases)
+    if args.profile or args.profile_json:
+        profiler.enable()
+    run_args = (None if args.engine is None else (WHITE_SIDE if args.engine == "white" else BLACK_SIDE), args.movetime / 1000,
+                shlex.split(args.engine_command) if args.engine_command else None, options, not args.poll, args.autoflip,
+                args.pgn)
+    if args.pstats is not None:
+        cProfile.run("main(*run_args)", args.pstats) # Read with python -m pstats <file>
+    else:
+        main(*run_args)
+    if args.profile_json is not None:
+        profiler.dump_json(args.profile_json)
\ No newline at end of file
@@ -0,0 +1,42 @@
+# Allowed-move cache (pygame independent)
+#
+# Answers of logic.get_allowed_moves keyed by (position hash, square). A new
+# position has a new Zobrist key, so moves never need explicit invalidation;
+# positions that come back (take-backs, repetitions) hit again. Entries are
+# evicted least recently used first. Cached dicts are shared: callers must
+# not modify them.
+
+MOVE_CACHE_SIZE = 4096 # Entries (one per piece and position)
+
+class MoveCache:
+    def __init__(self, capacity: int = MOVE_CACHE_SIZE) -> None:
+        self.capacity = capacity
+        self.entries: dict[tuple[int, int], dict] = {} # LRU order, most recent last
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple[int, int]) -> dict | None:
+        moves = self.entries.pop(key, None)
+        if moves is None:
+            self.misses += 1
+            return None
+        self.entries[key] = moves # Most recently used last
+        self.hits += 1
+        return moves
+
+    def put(self, key: tuple[int, int], moves: dict) -> None:
+        self.entries.pop(key, None)
+        while len(self.entries) >= self.capacity:
+            del self.entries[next(iter(self.entries))] # Least recently used
+        self.entries[key] = moves
+
+    def clear(self) -> None: # Position replaced (new game, loaded FEN, other move generator)
+        self.entries = {}
+
+    def hit_rate(self) -> float:
+        queries = self.hits + self.misses
+        return self.hits / queries if queries else 0.0
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hit_rate(), 4)}
@@ -0,0 +1,134 @@
+# Packed moves (pygame independent)
+#
+# A move is a 16-bit integer: origin square (bits 0 - 5), target square
+# (bits 6 - 11) and four flag bits (12 - 15) telling the move kind, with the
+# promotion piece in the two low flag bits of promotions:
+#
+#   0 quiet           4 capture               8 - 11 promotion (knight, bishop, rook, queen)
+#   1 double push     5 en passant capture   12 - 15 capturing promotion
+#   2 king castle
+#   3 queen castle
+#
+# Move generation writes packed moves into preallocated array buffers, one
+# per ply, so the search does not build a list of tuples at every node.
+# 0 (a1 to a1) is never a legal move and stands for "no move".
+
+from array import array
+
+from board import *
+
+# Move flags
+QUIET, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EP_CAPTURE = 0, 1, 2, 3, 4, 5
+PROMOTION, PROMOTION_CAPTURE = 8, 12
+CAPTURE_FLAG, PROMOTION_FLAG = 4, 8 # Flag bits
+
+NO_MOVE = 0
+MAX_MOVES = 256 # Legal moves of a position never exceed 218
+PROMOTION_PIECES = ("knight", "bishop", "rook", "queen") # Order of the low flag bits
+PROMOTION_CODES = {promotion: code for code, promotion in enumerate(PROMOTION_PIECES)}
+
+# Helper functions
+def encode_move(origin: int, target: int, flags: int = QUIET) -> int:
+    return origin | target << 6 | flags << 12
+
+def move_origin(move: int) -> int:
+    return move & 0x3F
+
+def move_target(move: int) -> int:
+    return move >> 6 & 0x3F
+
+def move_flags(move: int) -> int:
+    return move >> 12
+
+def move_promotion(move: int) -> str | None: # Promotion piece type
+    return PROMOTION_PIECES[move >> 12 & 0x3] if move & 0x8000 else None
+
+def is_capture(move: int) -> bool: # Captures, en passant & capturing promotions
+    return bool(move & 0x4000)
+
+def is_quiet(move: int) -> bool: # No capture, no promotion
+    return not move & 0xC000
+
+def pack_move(board: Board, move: tuple[int, int, str | None] | None) -> int: # (from, to, promotion) -> packed (flags from the board)
+    if move is None:
+        return NO_MOVE
+    origin, target, promotion = move
+    piece_name = board.squares[origin]
+    captured = board.squares[target] is not None
+    if promotion is not None:
+        flags = (PROMOTION_CAPTURE if captured else PROMOTION) | PROMOTION_CODES[promotion]
+    elif captured:
+        flags = CAPTURE
+    elif piece_name[2] == "p" and target == board.ep_square:
+        flags = EP_CAPTURE
+    elif piece_name[2] == "p" and abs(target - origin) == 16:
+        flags = DOUBLE_PUSH
+    elif piece_name[2:4] == "ki" and abs(target - origin) == 2:
+        flags = KING_CASTLE if target > origin else QUEEN_CASTLE
+    else:
+        flags = QUIET
+    return origin | target << 6 | flags << 12
+
+def unpack_move(move: int) -> tuple[int, int, str | None] | None: # Packed -> (from, to, promotion)
+    if move == NO_MOVE:
+        return None
+    return move & 0x3F, move >> 6 & 0x3F, PROMOTION_PIECES[move >> 12 & 0x3] if move & 0x8000 else None
+
+def make_move(board: Board, move: int) -> None:
+    board.make_move(move & 0x3F, move >> 6 & 0x3F, PROMOTION_PIECES[move >> 12 & 0x3] if move & 0x8000 else None)
+
+def tuple_move_name(move: tuple[int, int, str | None]) -> str: # (12, 28, None) -> "e2e4" (UCI long algebraic)
+    origin, target, promotion = move
+    suffix = "" if promotion is None else ("n" if promotion == "knight" else promotion[0])
+    return f"{SQUARE_NAMES[origin]}{SQUARE_NAMES[target]}{suffix}"
+
+def packed_move_name(move: int) -> str: # Packed -> "e7e8q"
+    return tuple_move_name(unpack_move(move))
+
+class MoveList: # Fixed size buffer of packed moves; count is the number in use
+    def __init__(self, capacity: int = MAX_MOVES) -> None:
+        self.moves = array("H", bytes(2 * capacity))
+        self.count = 0
+
+    def clear(self) -> None:
+        self.count = 0
+
+    def append(self, move: int) -> None:
+        self.moves[self.count] = move
+        self.count += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> int:
+        if not -self.count <= index < self.count:
+            raise IndexError("move index out of range")
+        return self.moves[index % self.count]
+
+    def __iter__(self):
+        return iter(self.moves[:self.count])
+
+    def __contains__(self, move: int) -> bool:
+        return move in self.moves[:self.count]
+
+    def to_tuples(self) -> list[tuple[int, int, str | None]]:
+        return [unpack_move(move) for move in self.moves[:self.count]]
+
+def move_stack(plies: int) -> list[MoveList]: # One buffer per ply of a search
+    return [MoveList() for _ in range(plies + 1)]
+
+def moves_to_dict(moves: MoveList, origin: int) -> dict: # UI shape of the moves of one piece
+    allowed_moves = {}
+    promotions = []
+    for move in moves:
+        if move & 0x3F != origin:
+            continue
+        target = SQUARE_NAMES[move >> 6 & 0x3F]
+        if move & 0x8000:
+            if target in promotions:
+                continue # One entry per square (the piece is chosen separately)
+            promotions.append(target)
+        allowed_moves.setdefault("captures" if move & 0x4000 else "moves", []).append(target)
+    if promotions:
+        allowed_moves["promotions"] = promotions
+    return allowed_moves
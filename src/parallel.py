@@ -0,0 +1,175 @@
+# Multi-process search (root splitting)
+#
+# Python threads share one interpreter lock, so the parallel search runs in
+# worker processes. Each iteration of the iterative deepening loop splits the
+# root moves round-robin across the workers (best moves of the previous
+# iteration first); every worker searches its share with its own engine and
+# transposition table, which persist between searches. The expected best
+# move is searched first to get a bound; the other moves are then searched
+# with a null window against it (PVS at the root). With one worker the
+# search runs in-process and gives exactly the serial Engine result.
+# Workers are spawned, not forked: a fork copies the locks other threads hold
+# (the UCI stdin reader sits in readline) and the child can deadlock on them.
+# Setting stop raises an event shared with the workers, which their engines
+# poll with their limits, so a running depth ends as soon as it is set.
+# clear() restarts the workers, which is how their tables are emptied.
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from board import *
+from engine import Engine, SearchResult, SearchTimeout, INFINITY, MATE_SCORE, MAX_PLY
+from rules import generate_legal_moves
+from bitboard import init_tables
+
+_worker_engine: Engine | None = None # One engine per worker process
+
+def _init_worker(hash_mb: float, stop_event) -> None:
+    global _worker_engine
+    init_tables()
+    _worker_engine = Engine(hash_mb)
+    _worker_engine.stop_event = stop_event
+
+def _search_root_moves(board: Board, moves: list, depth: int, alpha: int, deadline: float | None,
+                       node_limit: int | None) -> tuple:
+    # Returns ([(move, score)...], nodes); scores not above alpha are upper bounds. deadline is wall clock (time.time())
+    engine = _worker_engine
+    time_limit = None if deadline is None else max(0.0, deadline - time.time())
+    engine.prepare(board, time_limit, node_limit)
+    scores = []
+    try:
+        for move in moves:
+            board.make_move(*move)
+            try:
+                if alpha == -INFINITY:
+                    score = -engine.negamax(depth - 1, -INFINITY, INFINITY, 1)
+                else: # Null window against the best score so far, full search only if the move is better
+                    score = -engine.negamax(depth - 1, -alpha - 1, -alpha, 1)
+                    if score > alpha:
+                        score = -engine.negamax(depth - 1, -INFINITY, -alpha, 1)
+            finally:
+                board.unmake_move()
+            scores.append((move, score))
+            alpha = max(alpha, score)
+    except SearchTimeout:
+        return None, engine.nodes
+    return scores, engine.nodes
+
+class ParallelEngine:
+    def __init__(self, workers: int = None, hash_mb: float = 16, book=None, tablebases=None) -> None:
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.hash_mb = hash_mb
+        self.book = book # Book and tablebases are probed here only, never sent to the workers
+        self.tablebases = tablebases
+        self.context = multiprocessing.get_context("spawn")
+        self.stop_event = self.context.Event() # Shared with the workers
+        if self.workers == 1:
+            self.engine = Engine(hash_mb) # Deterministic single-worker mode
+            self.pool = None
+        else:
+            self.engine = None
+            self.pool = self.start_pool()
+
+    def start_pool(self) -> ProcessPoolExecutor: # Workers start with empty transposition tables
+        return ProcessPoolExecutor(self.workers, mp_context=self.context, initializer=_init_worker,
+                                   initargs=(self.hash_mb, self.stop_event))
+
+    @property
+    def stop(self) -> bool:
+        return self.stop_event.is_set()
+
+    @stop.setter
+    def stop(self, value: bool) -> None: # Set from outside to abort the running search
+        if value:
+            self.stop_event.set()
+        else:
+            self.stop_event.clear()
+        if self.engine is not None:
+            self.engine.stop = value
+
+    def clear(self) -> None: # New game: forget every table (a worker's table lives in its process)
+        if self.engine is not None:
+            self.engine.tt.clear()
+        else:
+            self.close()
+            self.pool = self.start_pool()
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def __enter__(self) -> "ParallelEngine":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def search(self, board: Board, max_depth: int = MAX_PLY, time_limit: float = None,
+               node_limit: int = None, on_iteration=None) -> SearchResult:
+        if self.book is not None:
+            move = self.book.choose(board)
+            if move is not None:
+                return SearchResult(move, 0, 0, 0, 0.0, [move])
+        if self.tablebases is not None:
+            entry = self.tablebases.best_move(board)
+            if entry is not None:
+                move, wdl, plies = entry
+                return SearchResult(move, wdl * (MATE_SCORE - plies), 0, 0, 0.0, [move])
+        self.stop = False
+        if self.engine is not None:
+            return self.engine.search(board, max_depth, time_limit, node_limit, on_iteration)
+
+        start_time = time.perf_counter()
+        deadline = None if time_limit is None else time.time() + time_limit
+        worker_node_limit = None if node_limit is None else max(1, node_limit // self.workers)
+        root_moves = generate_legal_moves(board)
+        result = SearchResult(root_moves[0] if root_moves else None, 0, 0, 0, 0.0, [])
+        if len(root_moves) <= 1:
+            return result
+
+        nodes = 0
+        for depth in range(1, max_depth + 1):
+            if self.stop:
+                break
+            # First (expected best) move alone for a bound, then the rest split across the workers
+            first_scores, first_nodes = self.pool.submit(_search_root_moves, board, root_moves[:1], depth, -INFINITY,
+                                                         deadline, worker_node_limit).result()
+            nodes += first_nodes
+            if first_scores is None:
+                break
+            alpha = first_scores[0][1]
+            rest = root_moves[1:]
+            shares = [rest[index::self.workers] for index in range(self.workers)]
+            futures = [self.pool.submit(_search_root_moves, board, share, depth, alpha, deadline, worker_node_limit)
+                       for share in shares if share]
+            scores = first_scores
+            finished = True
+            for future in futures:
+                share_scores, share_nodes = future.result()
+                nodes += share_nodes
+                if share_scores is None:
+                    finished = False
+                else:
+                    scores += share_scores
+            if not finished:
+                break # Depth not completed by every worker: keep the previous result
+
+            order = {move: index for index, move in enumerate(root_moves)}
+            scores.sort(key=lambda item: (-item[1], order[item[0]])) # Ties keep the previous order
+            root_moves = [move for move, _ in scores]
+            best_move, best_score = scores[0]
+            result = SearchResult(best_move, best_score, depth, nodes, time.perf_counter() - start_time, [best_move])
+            if on_iteration is not None:
+                on_iteration(result)
+            if abs(best_score) >= MATE_SCORE - MAX_PLY:
+                break
+            if deadline is not None and time.time() > deadline - time_limit / 2:
+                break # Next iteration would not finish in time
+            if node_limit is not None and nodes >= node_limit:
+                break
+        result.nodes = nodes
+        result.elapsed = time.perf_counter() - start_time
+        return result
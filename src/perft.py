@@ -0,0 +1,130 @@
+# Perft (performance test) for the move generator
+#
+# Counts the leaf nodes of the move tree to a fixed depth and compares them
+# with the published reference counts. Runs headless:
+#
+#   python src/perft.py --depth 4
+#   python src/perft.py --fen "<fen>" --depth 3 --divide
+#   python src/perft.py --suite --depth 3 --backend bitboard
+
+import argparse
+import sys
+import time
+
+from board import *
+from pieces import PIECE_CLASS_DICT
+from bitboard import init_tables
+from rules import generate_legal_moves, generate_legal_packed
+from moves import MoveList, move_stack, make_move, tuple_move_name
+
+# Reference positions (https://www.chessprogramming.org/Perft_Results)
+PERFT_SUITE = {
+    "start": (START_FEN, [20, 400, 8902, 197281, 4865609, 119060324]),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603, 193690690]),
+    "position3": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624, 11030083]),
+    "position4": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333, 15833292]),
+    "position5": ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487, 89941194]),
+    "position6": ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890, 3894594, 164075551]),
+}
+
+# Helper functions
+MOVE_GENERATORS = {
+    "board": PIECE_CLASS_DICT, # Ray walkers (pieces.py)
+    "bitboard": None # Bitboard fast path (packed moves, bitboard.generate_packed_moves)
+}
+
+def perft_packed(board: Board, depth: int, move_lists: list[MoveList]) -> int: # Packed moves, one buffer per depth
+    moves = generate_legal_packed(board, move_lists[depth])
+    if depth == 1:
+        return moves.count
+    nodes = 0
+    for move in moves:
+        make_move(board, move)
+        nodes += perft_packed(board, depth - 1, move_lists)
+        board.unmake_move()
+    return nodes
+
+def perft(board: Board, depth: int, piece_class_dict: dict = None) -> int:
+    if piece_class_dict is None:
+        return perft_packed(board, depth, move_stack(depth))
+    moves = generate_legal_moves(board, None, piece_class_dict)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.make_move(*move)
+        nodes += perft(board, depth - 1, piece_class_dict)
+        board.unmake_move()
+    return nodes
+
+def divide(board: Board, depth: int, piece_class_dict: dict = None) -> dict[str, int]: # Node count per root move
+    counts = {}
+    for move in generate_legal_moves(board, None, piece_class_dict):
+        if depth == 1:
+            counts[tuple_move_name(move)] = 1
+        else:
+            board.make_move(*move)
+            counts[tuple_move_name(move)] = perft(board, depth - 1, piece_class_dict)
+            board.unmake_move()
+    return counts
+
+def run_perft(fen: str, depth: int, backend: str, show_divide: bool = False, expected: list[int] = None) -> bool:
+    board = Board()
+    board.load_fen(fen)
+    generate = MOVE_GENERATORS[backend]
+    passed = True
+
+    for current_depth in range(1, depth + 1):
+        start = time.perf_counter()
+        if show_divide and current_depth == depth:
+            counts = divide(board, current_depth, generate)
+            nodes = sum(counts.values())
+        else:
+            nodes = perft(board, current_depth, generate)
+        elapsed = time.perf_counter() - start
+
+        status = ""
+        if expected is not None and current_depth <= len(expected):
+            ok = nodes == expected[current_depth - 1]
+            passed = passed and ok
+            status = "ok" if ok else f"MISMATCH (expected {expected[current_depth - 1]})"
+        nps = nodes / elapsed if elapsed > 0 else 0
+        print(f"  depth {current_depth}: {nodes:>12} nodes {elapsed:8.3f}s {nps:>12,.0f} nodes/s {status}")
+
+    if show_divide:
+        for name in sorted(counts):
+            print(f"    {name}: {counts[name]}")
+    return passed
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Perft node counts for the move generator")
+    parser.add_argument("--fen", default=None, help="position to search (default: standard start)")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--divide", action="store_true", help="node count per root move")
+    parser.add_argument("--suite", action="store_true", help="run every reference position")
+    parser.add_argument("--backend", choices=sorted(MOVE_GENERATORS), default="bitboard")
+    args = parser.parse_args(argv)
+
+    if args.backend == "bitboard":
+        init_tables() # Keep table building out of the timings
+
+    if args.suite:
+        positions = PERFT_SUITE.items()
+    elif args.fen is not None:
+        known = {fen: counts for fen, counts in PERFT_SUITE.values()}
+        positions = [("fen", (args.fen, known.get(args.fen)))]
+    else:
+        positions = [("start", PERFT_SUITE["start"])]
+
+    passed = True
+    for name, (fen, expected) in positions:
+        print(f"{name}: {fen}")
+        passed = run_perft(fen, args.depth, args.backend, args.divide, expected) and passed
+
+    if not passed:
+        print("FAILED: node counts differ from the reference values")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# Standard algebraic notation (SAN) and PGN input / output (pygame independent)
+#
+# SAN needs the legal moves of the position (disambiguation) and of the
+# position after the move (check / mate suffix), so move_san is called
+# before the move is made on the board. The reader is a generator over the
+# lines of a file: games are parsed one at a time and SAN is resolved
+# against the legal move generator, never by loading a whole database.
+
+import re
+
+from board import *
+from rules import generate_legal_moves, in_check
+from gamestate import GameState
+
+PIECE_LETTERS = {"pawn": "", "knight": "N", "bishop": "B", "rook": "R", "queen": "Q", "king": "K"}
+SAN_PIECE_TYPES = {letter: piece_type for piece_type, letter in PIECE_LETTERS.items() if letter}
+PGN_HEADER_ORDER = ("Event", "Site", "Date", "Round", "White", "Black", "Result") # Seven tag roster
+GAME_RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+MOVETEXT_PATTERN = re.compile(r"\{[^}]*\}?|;[^\n]*|\(|\)|\$\d+|\d+\.+|[^\s(){};$]+") # Comments, variations, NAGs, move numbers, words
+MOVE_NUMBER_PATTERN = re.compile(r"\d+\.+") # "12." / "12..." (not "0-0")
+
+# Helper functions
+def move_san(board: Board, move: tuple[int, int, str | None], legal_moves: list = None) -> str: # (12, 28, None) -> "e4"
+    origin, target, promotion = move
+    legal_moves = generate_legal_moves(board) if legal_moves is None else legal_moves
+    piece_type = get_piece_type(board.squares[origin])
+    capture = board.squares[target] is not None or (piece_type == "pawn" and target == board.ep_square)
+
+    if piece_type == "king" and abs(target - origin) == 2:
+        san = "O-O" if target > origin else "O-O-O"
+    elif piece_type == "pawn":
+        san = f"{FILES[origin % 8]}x" if capture else ""
+        san += SQUARE_NAMES[target]
+        if promotion is not None:
+            san += f"={PIECE_LETTERS[promotion]}"
+    else:
+        rivals = [other for other, other_target, _ in legal_moves # Same piece kind reaching the same square
+                  if other != origin and other_target == target
+                  and get_piece_kind(board.squares[other]) == get_piece_kind(board.squares[origin])]
+        disambiguation = ""
+        if rivals:
+            if all(other % 8 != origin % 8 for other in rivals):
+                disambiguation = FILES[origin % 8]
+            elif all(other // 8 != origin // 8 for other in rivals):
+                disambiguation = RANKS[origin // 8]
+            else:
+                disambiguation = SQUARE_NAMES[origin]
+        san = PIECE_LETTERS[piece_type] + disambiguation + ("x" if capture else "") + SQUARE_NAMES[target]
+
+    board.make_move(origin, target, promotion)
+    if in_check(board):
+        san += "#" if not generate_legal_moves(board) else "+"
+    board.unmake_move()
+    return san
+
+def escape_tag(value) -> str: # Tag values are quoted strings
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+def game_pgn(headers: dict, sans: list[str], result: str = "*", fullmove: int = 1,
+             black_first: bool = False) -> str: # Headers, SAN moves & result -> PGN text
+    headers = dict(headers)
+    headers["Result"] = result
+    tags = [key for key in PGN_HEADER_ORDER if key in headers] + [key for key in headers if key not in PGN_HEADER_ORDER]
+    lines = [f'[{key} "{escape_tag(headers[key])}"]' for key in tags]
+
+    words = []
+    for index, san in enumerate(sans):
+        ply = index + black_first
+        if ply % 2 == 0:
+            words.append(f"{fullmove + ply // 2}.")
+        elif index == 0:
+            words.append(f"{fullmove}...") # Game starts with black to move
+        words.append(san)
+    words.append(result)
+
+    movetext = [] # Export format: lines of at most 80 characters
+    line = ""
+    for word in words:
+        if line and len(line) + 1 + len(word) > 80:
+            movetext.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    movetext.append(line)
+    return "\n".join(lines) + "\n\n" + "\n".join(movetext) + "\n"
+
+def parse_san(board: Board, san: str, legal_moves: list = None) -> tuple[int, int, str | None]: # "Nbd7" -> (57, 51, None)
+    token = san.rstrip("+#!?")
+    legal_moves = generate_legal_moves(board) if legal_moves is None else legal_moves
+    squares = board.squares
+    if token in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        step = -2 if len(token) == 5 else 2
+        for move in legal_moves:
+            if get_piece_type(squares[move[0]]) == "king" and move[1] - move[0] == step:
+                return move
+        raise ValueError(f"illegal castling '{san}'")
+
+    promotion = None
+    if "=" in token:
+        token, letter = token.split("=", 1)
+        promotion = SAN_PIECE_TYPES.get(letter[:1].upper())
+        if promotion in (None, "king"):
+            raise ValueError(f"bad promotion piece in '{san}'")
+    elif len(token) > 2 and token[0] in FILES and token[-1] in "QRBN": # "e8Q"
+        token, promotion = token[:-1], SAN_PIECE_TYPES[token[-1]]
+    piece_type = SAN_PIECE_TYPES.get(token[:1], "pawn") if token[:1].isupper() else "pawn"
+    body = (token[1:] if piece_type != "pawn" else token).replace("x", "").replace(":", "").replace("-", "")
+    target = SQUARE_INDEX.get(body[-2:])
+    if target is None:
+        raise ValueError(f"cannot read move '{san}'")
+    hint = body[:-2] # Disambiguation: file and / or rank of the origin
+
+    candidates = []
+    for move in legal_moves:
+        origin, move_target, move_promotion = move
+        if move_target != target or move_promotion != promotion or get_piece_type(squares[origin]) != piece_type:
+            continue
+        if any((char in FILES and origin % 8 != FILES.index(char)) or (char in RANKS and origin // 8 != RANKS.index(char))
+               for char in hint):
+            continue
+        candidates.append(move)
+    if len(candidates) != 1:
+        raise ValueError(f"{'ambiguous' if candidates else 'illegal'} move '{san}'")
+    return candidates[0]
+
+def read_games(lines) -> "Iterator[dict]": # Lines of a PGN file -> {"headers", "movetext", "line"} per game
+    headers, movetext, start_line = {}, [], None
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if line.startswith("%"):
+            continue # Escape line
+        if line.startswith("["):
+            if movetext: # Tags after movetext start the next game
+                yield {"headers": headers, "movetext": " ".join(movetext), "line": start_line}
+                headers, movetext, start_line = {}, [], None
+            match = TAG_PATTERN.match(line)
+            if match is not None:
+                headers[match.group(1)] = re.sub(r"\\(.)", r"\1", match.group(2))
+            start_line = start_line or number
+        elif line:
+            movetext.append(line)
+            start_line = start_line or number
+    if headers or movetext:
+        yield {"headers": headers, "movetext": " ".join(movetext), "line": start_line}
+
+def movetext_sans(movetext: str) -> "Iterator[str]": # SAN words of the main line (result token last, if any)
+    depth = 0 # Variation nesting
+    for match in MOVETEXT_PATTERN.finditer(movetext):
+        token = match.group()
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(0, depth - 1)
+        elif depth == 0 and token[0] not in "{;$" and not MOVE_NUMBER_PATTERN.fullmatch(token):
+            yield token
+
+def validate_game(game: dict) -> dict: # Replays a game; {"plies", "result", "error"} (error None if valid)
+    board = Board()
+    try:
+        if "FEN" in game["headers"]:
+            board.load_fen(game["headers"]["FEN"])
+        else:
+            board.reset()
+    except ValueError as error:
+        return {"plies": 0, "result": None, "error": f"bad FEN tag: {error}"}
+
+    plies, result = 0, None
+    for san in movetext_sans(game["movetext"]):
+        if san in GAME_RESULTS:
+            result = san
+            break
+        try:
+            move = parse_san(board, san)
+        except ValueError as error:
+            return {"plies": plies, "result": result, "error": f"ply {plies + 1}: {error}"}
+        board.make_move(*move)
+        plies += 1
+
+    error = None
+    tag_result = game["headers"].get("Result")
+    if result is not None and tag_result is not None and tag_result != result:
+        error = f"result tag {tag_result} differs from movetext result {result}"
+    elif result in ("1-0", "0-1"):
+        outcome = GameState(board).outcome
+        if outcome is not None and outcome[1] == "checkmate" and outcome[0] != result:
+            error = f"result {result} but the game ends in checkmate for the other side"
+    return {"plies": plies, "result": result, "error": error}
+
+def board_history(board: Board) -> tuple[str, list[str]]: # (start FEN, SAN moves) of the moves made on the board
+    game = board.copy()
+    moves = []
+    while game.undo_stack:
+        origin, target, _, _, _, promotion, *_ = game.undo_stack[-1]
+        moves.append((origin, target, promotion))
+        game.unmake_move()
+    start_fen = game.to_fen()
+    sans = []
+    for move in reversed(moves):
+        sans.append(move_san(game, move))
+        game.make_move(*move)
+    return start_fen, sans
+
+def board_pgn(board: Board, headers: dict = None, state: GameState = None) -> str: # PGN of the game played on the board
+    start_fen, sans = board_history(board)
+    start = Board()
+    start.load_fen(start_fen)
+    headers = dict(headers or {})
+    if start_fen != START_FEN:
+        headers["SetUp"] = "1"
+        headers["FEN"] = start_fen
+    outcome = (state if state is not None else GameState(board)).outcome # The tracker of the board, if it has one
+    result = outcome[0] if outcome is not None else "*"
+    if outcome is not None:
+        headers.setdefault("Termination", outcome[1])
+    return game_pgn(headers, sans, result, start.fullmove_number, start.side_to_move == BLACK_SIDE)
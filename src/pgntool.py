@@ -0,0 +1,86 @@
+# Streaming PGN database validator
+#
+# Reads a PGN file game by game (never the whole file), replays every game
+# against the legal move generator and reports the invalid ones with their
+# game number, line and ply:
+#
+#   python src/pgntool.py games.pgn
+#   python src/pgntool.py games.pgn --workers 4 --batch 200
+#
+# Games are validated in batches on a process pool with a bounded number of
+# batches in flight; reports are printed in file order.
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import init_tables
+from pgn import read_games, validate_game
+
+BATCH_GAMES = 100 # Games per task
+
+# Helper functions
+def validate_batch(games: list[dict]) -> list[dict]:
+    return [validate_game(game) for game in games]
+
+def batches(games, size: int):
+    batch = []
+    for game in games:
+        batch.append(game)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def report_batch(batch: list[dict], results: list[dict], counts: dict, quiet: bool) -> None:
+    for game, result in zip(batch, results):
+        counts["games"] += 1
+        counts["plies"] += result["plies"]
+        if result["error"] is not None:
+            counts["invalid"] += 1
+            if not quiet:
+                headers = game["headers"]
+                players = f"{headers.get('White', '?')} - {headers.get('Black', '?')}"
+                print(f"game {counts['games']} (line {game['line']}, {players}): {result['error']}")
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check every game of a PGN file for illegal moves")
+    parser.add_argument("path", help="PGN file")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=BATCH_GAMES, help="games per worker task")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+
+    init_tables()
+    counts = {"games": 0, "plies": 0, "invalid": 0}
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(args.workers, initializer=init_tables) if args.workers > 1 else None
+    try:
+        with open(args.path, encoding="utf-8", errors="replace") as file:
+            tasks = batches(read_games(file), max(1, args.batch))
+            if pool is not None: # Ordered reports, a bounded number of batches in flight
+                pending = []
+                for batch in tasks:
+                    pending.append((batch, pool.submit(validate_batch, batch)))
+                    if len(pending) > 2 * args.workers:
+                        batch, future = pending.pop(0)
+                        report_batch(batch, future.result(), counts, args.quiet)
+                for batch, future in pending:
+                    report_batch(batch, future.result(), counts, args.quiet)
+            else:
+                for batch in tasks:
+                    report_batch(batch, validate_batch(batch), counts, args.quiet)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    rate = counts["games"] / elapsed if elapsed > 0 else 0
+    print(f"{counts['games']} games, {counts['invalid']} invalid, {counts['plies']} plies, "
+          f"{elapsed:.2f}s, {rate:,.1f} games/s", file=sys.stderr)
+    return 1 if counts["invalid"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
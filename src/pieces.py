@@ -1,11 +1,12 @@
-from utils import *
+from board import *
 
 # Abstract piece class
 class Piece:
-    def __init__(self, piece_name: str, current_pos: tuple, dest_pos: tuple = None) -> None:
+    def __init__(self, piece_name: str, current_square: str, dest_square: str = None, board: Board = None) -> None:
         self.piece_name = piece_name
-        self.current_pos = current_pos
-        self.dest_pos = dest_pos
+        self.current_square = current_square
+        self.dest_square = dest_square
+        self.board = board if board is not None else board_state
         self.moves = {}
         self.capture_moves = []
 
@@ -13,141 +14,101 @@ class Piece:
         raise NotImplementedError("This method must be overridden in derived classes")
     
 # Constants
-ASCII_A = ord('a')
-ASCII_H = ord('h')
 RANK_MIN = 1
 RANK_MAX = 8
 
+LINEAR_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0)) # Up, down, right, left
+DIAGONAL_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1)) # Right up, right down, left up, left down
+KNIGHT_OFFSETS = ((-1, 2), (1, 2), (2, 1), (2, -1), (-1, -2), (1, -2), (-2, 1), (-2, -1))
+KING_OFFSETS = ((-1, 1), (-1, 0), (-1, -1), (0, 1), (0, -1), (1, 1), (1, 0), (1, -1))
+
+# Precomputed lookup tables (square index -> reachable square indexes)
+def _build_rays(directions: tuple) -> list[tuple]:
+    rays = []
+    for index in range(64):
+        file, rank = index % 8, index // 8
+        square_rays = []
+        for df, dr in directions:
+            ray = []
+            next_file, next_rank = file + df, rank + dr
+            while 0 <= next_file < 8 and 0 <= next_rank < 8:
+                ray.append(next_rank * 8 + next_file)
+                next_file += df
+                next_rank += dr
+            square_rays.append(tuple(ray))
+        rays.append(tuple(square_rays))
+    return rays
+
+def _build_steps(offsets: tuple) -> list[tuple]:
+    steps = []
+    for index in range(64):
+        file, rank = index % 8, index // 8
+        steps.append(tuple((rank + dr) * 8 + file + df for df, dr in offsets
+                           if 0 <= file + df < 8 and 0 <= rank + dr < 8))
+    return steps
+
+LINEAR_RAYS = _build_rays(LINEAR_DIRECTIONS)
+DIAGONAL_RAYS = _build_rays(DIAGONAL_DIRECTIONS)
+KNIGHT_STEPS = _build_steps(KNIGHT_OFFSETS)
+KING_STEPS = _build_steps(KING_OFFSETS)
+
 # Helper functions
-def can_capture(current_square: str, check_square: str) -> bool:
-    if square_rects_dict.get(check_square) is None:
-        return False
-    if not is_square_occupied(check_square):
+def can_capture(board: Board, current_square: str, check_square: str) -> bool:
+    target_piece = board.get_piece_name(check_square)
+    if target_piece is None:
         return False
-    if friendly_piece(current_square, check_square):
-        return False
-    return True
+    return not board.friendly_piece(current_square, check_square)
 
-def linear_movement(current_square: str) -> tuple[list, list]:
-    file = ord(current_square[0])
-    rank = int(current_square[1])
+def ray_movement(board: Board, current_square: str, rays: list[tuple]) -> tuple[list, list]:
+    squares = board.squares
+    origin = SQUARE_INDEX[current_square]
+    colour = squares[origin][0]
     moves_list = []
     capture_list = []
 
-    # Vertical (up)
-    for rank_up in range(rank + 1, RANK_MAX + 1):
-        next_coord = f"{chr(file)}{rank_up}"
-        if square_rects_dict.get(next_coord) is None:
-            break
-        if can_capture(current_square, next_coord):
-            capture_list.append(next_coord)
-            break
-        if is_square_occupied(next_coord):
-            break
-        moves_list.append(next_coord)
-    
-    # Vertical (down)
-    for rank_down in range(rank - 1, RANK_MIN - 1, -1):
-        next_coord = f"{chr(file)}{rank_down}"
-        if square_rects_dict.get(next_coord) is None:
-            break
-        if can_capture(current_square, next_coord):
-            capture_list.append(next_coord)
-            break
-        if is_square_occupied(next_coord):
-            break
-        moves_list.append(next_coord)
-    
-    # Horizontal (right)
-    for file_right in range(file + 1, ASCII_H + 1, 1):
-        next_coord = f"{chr(file_right)}{rank}"
-        if square_rects_dict.get(next_coord) is None:
-            break
-        if can_capture(current_square, next_coord):
-            capture_list.append(next_coord)
-            break
-        if is_square_occupied(next_coord):
-            break
-        moves_list.append(next_coord)
-    
-    # Horizontal (left)
-    for file_left in range(file - 1, ASCII_A - 1, -1):
-        next_coord = f"{chr(file_left)}{rank}"
-        if square_rects_dict.get(next_coord) is None:
-            break
-        if can_capture(current_square, next_coord):
-            capture_list.append(next_coord)
-            break
-        if is_square_occupied(next_coord):
-            break
-        moves_list.append(next_coord)
-    
+    for ray in rays[origin]:
+        for index in ray:
+            target_piece = squares[index]
+            if target_piece is None:
+                moves_list.append(SQUARE_NAMES[index])
+                continue
+            if target_piece[0] != colour:
+                capture_list.append(SQUARE_NAMES[index])
+            break # Path blocked
+
     return moves_list, capture_list
 
-def diagonal_movement(current_square: str) -> tuple[list, list]:
-    file = ord(current_square[0])
-    rank = int(current_square[1])
+def step_movement(board: Board, current_square: str, steps: list[tuple]) -> tuple[list, list]:
+    squares = board.squares
+    origin = SQUARE_INDEX[current_square]
+    colour = squares[origin][0]
     moves_list = []
     capture_list = []
 
-    # Right Diagonal (up)
-    file_step = 0
-    for rank_up in range(rank + 1, RANK_MAX + 1):
-        file_step += 1
-        next_coord = f"{chr(file + file_step)}{rank_up}"
-        if square_rects_dict.get(next_coord) is None:
-            break
-        if can_capture(current_square, next_coord):
-            capture_list.append(next_coord)
-            break
-        if is_square_occupied(next_coord):
-            break
-        moves_list.append(next_coord)
-
-    # Right Diagonal (down)
-    file_step = 0
-    for rank_down in range(rank - 1, RANK_MIN - 1, -1):
-        file_step += 1
-        next_coord = f"{chr(file + file_step)}{rank_down}"
-        if square_rects_dict.get(next_coord) is None:
-            break
-        if can_capture(current_square, next_coord):
-            capture_list.append(next_coord)
-            break
-        if is_square_occupied(next_coord):
-            break
-        moves_list.append(next_coord)
-    
-    # Left Diagonal (up)
-    file_step = 0
-    for rank_up in range(rank + 1, RANK_MAX + 1):
-        file_step -= 1
-        next_coord = f"{chr(file + file_step)}{rank_up}"
-        if square_rects_dict.get(next_coord) is None:
-            break
-        if can_capture(current_square, next_coord):
-            capture_list.append(next_coord)
-            break
-        if is_square_occupied(next_coord):
-            break
-        moves_list.append(next_coord)
-
-    # Left Diagonal (down)
-    file_step = 0
-    for rank_down in range(rank - 1, RANK_MIN - 1, -1):
-        file_step -= 1
-        next_coord = f"{chr(file + file_step)}{rank_down}"
-        if square_rects_dict.get(next_coord) is None:
-            break
-        if can_capture(current_square, next_coord):
-            capture_list.append(next_coord)
-            break
-        if is_square_occupied(next_coord):
-            break
-        moves_list.append(next_coord)
-    
+    for index in steps[origin]:
+        target_piece = squares[index]
+        if target_piece is None:
+            moves_list.append(SQUARE_NAMES[index])
+        elif target_piece[0] != colour:
+            capture_list.append(SQUARE_NAMES[index])
+
     return moves_list, capture_list
 
+def castling_movement(board: Board, origin: int) -> list: # King targets of castling (path must be empty)
+    moves_list = []
+    if not board.castling:
+        return moves_list
+    for right, king_square, target, path in CASTLING_PATHS:
+        if board.castling & right and origin == king_square and all(board.squares[index] is None for index in path):
+            moves_list.append(SQUARE_NAMES[target])
+    return moves_list
+
+def linear_movement(board: Board, current_square: str) -> tuple[list, list]:
+    return ray_movement(board, current_square, LINEAR_RAYS)
+
+def diagonal_movement(board: Board, current_square: str) -> tuple[list, list]:
+    return ray_movement(board, current_square, DIAGONAL_RAYS)
+
 # Piece objects
 class Pawn(Piece):
 
@@ -155,55 +116,49 @@ class Pawn(Piece):
     Calculate and return possible moves for the pawn piece
 
     Move Type:
-        - 2 squares forward (if pawn not moved)
+        - 2 squares forward (from its starting rank)
         - 1 square forward
     
     Captures:
         - Left forward diagonal (1 square)
         - Right forward diagonal (1 square)
+        - En passant (pawn that just moved 2 squares)
     """
 
     def get_allowed_moves(self) -> dict:
-        current_square = get_square_coord(self.current_pos)
-        file = ord(current_square[0])
-        rank = int(current_square[1])
-        obstructed = False
+        squares = self.board.squares
+        origin = SQUARE_INDEX[self.current_square]
+        file, rank = origin % 8, origin // 8 + 1
+        white = is_white(self.piece_name)
         moves_list = []
 
         # Vertical movement
-        rank_gap1 = 1 if is_white(self.piece_name) else -1
+        rank_gap1 = 1 if white else -1
         next_square_rank = rank + rank_gap1
         if RANK_MIN <= next_square_rank <= RANK_MAX:
-            next_square_coord = f"{current_square[0]}{next_square_rank}"
-            if not is_square_occupied(next_square_coord):
-                moves_list.append(next_square_coord)
-            else:
-                obstructed = True
-
-        if not has_moved(self.piece_name, current_square):
-            rank_gap2 = 2 if is_white(self.piece_name) else -2
-            next_square_rank = rank + rank_gap2
-            if RANK_MIN <= next_square_rank <= RANK_MAX:
-                next_square_coord = f"{current_square[0]}{next_square_rank}"
-                
+            next_index = origin + 8 * rank_gap1
+            if squares[next_index] is None:
+                moves_list.append(SQUARE_NAMES[next_index])
+
                 # Check for obstruction along path
-                if not obstructed and not is_square_occupied(next_square_coord):
-                    moves_list.append(next_square_coord)
-            
-        # Possible captures in diagonals
-        left_diagonal = f"{chr(file - 1)}{rank + rank_gap1}"
-        right_diagonal = f"{chr(file + 1)}{rank + rank_gap1}"
-
-        if can_capture(current_square, left_diagonal):
-            self.capture_moves.append(left_diagonal)
-        if can_capture(current_square, right_diagonal):
-            self.capture_moves.append(right_diagonal)  
-        
+                if rank == (RANK_MIN + 1 if white else RANK_MAX - 1): # Pawn still on its starting rank
+                    next_index += 8 * rank_gap1
+                    if 0 <= next_index < 64 and squares[next_index] is None:
+                        moves_list.append(SQUARE_NAMES[next_index])
+
+            # Possible captures in diagonals
+            for df in (-1, 1):
+                if 0 <= file + df < 8:
+                    target_piece = squares[origin + 8 * rank_gap1 + df]
+                    if target_piece is not None and target_piece[0] != self.piece_name[0]:
+                        self.capture_moves.append(SQUARE_NAMES[origin + 8 * rank_gap1 + df])
+                    elif origin + 8 * rank_gap1 + df == self.board.ep_square and self.board.side_to_move == get_colour(self.piece_name):
+                        self.capture_moves.append(SQUARE_NAMES[self.board.ep_square]) # En passant
+
         # Promotion check
-        if is_white(self.piece_name) and rank == RANK_MAX - 1 and (moves_list or self.capture_moves):
-            self.moves["promotions"] = [f"{chr(file)}{RANK_MAX}"]
-        elif not is_white(self.piece_name) and rank == RANK_MIN + 1 and (moves_list or self.capture_moves):
-            self.moves["promotions"] = [f"{chr(file)}{RANK_MIN}"]
+        last_rank = RANK_MAX if white else RANK_MIN
+        if next_square_rank == last_rank and (moves_list or self.capture_moves):
+            self.moves["promotions"] = moves_list + self.capture_moves
 
         if moves_list:
             self.moves["moves"] = moves_list
@@ -225,9 +180,7 @@ class Rook(Piece):
     """
 
     def get_allowed_moves(self) -> dict:
-        current_square = get_square_coord(self.current_pos)
-        
-        moves_list, self.capture_moves = linear_movement(current_square)
+        moves_list, self.capture_moves = linear_movement(self.board, self.current_square)
         
         if moves_list:
             self.moves["moves"] = moves_list
@@ -248,9 +201,7 @@ class Bishop(Piece):
     """
 
     def get_allowed_moves(self) -> dict:
-        current_square = get_square_coord(self.current_pos)
-        
-        moves_list, self.capture_moves = diagonal_movement(current_square)
+        moves_list, self.capture_moves = diagonal_movement(self.board, self.current_square)
 
         if moves_list:
             self.moves["moves"] = moves_list
@@ -271,34 +222,7 @@ class Knight(Piece):
     """
 
     def get_allowed_moves(self) -> dict:
-        current_square = get_square_coord(self.current_pos)
-        file = ord(current_square[0])
-        rank = int(current_square[1])
-        moves_list = []
-
-        # Possible knight movement
-        directions = {
-            "forward_left": (file - 1, rank + 2),
-            "forward_right": (file + 1, rank + 2),
-            "right_up": (file + 2, rank + 1),
-            "right_down": (file + 2, rank - 1),
-            "downward_left": (file - 1, rank - 2),
-            "downward_right": (file + 1, rank - 2),
-            "left_up": (file - 2, rank + 1),
-            "left_down": (file - 2, rank - 1),
-        }
-
-        for (df, dr) in directions.values():
-            if ASCII_A <= df <= ASCII_H and RANK_MIN <= dr <= RANK_MAX:
-                next_coord = f"{chr(df)}{dr}"
-                if square_rects_dict.get(next_coord) is None:
-                    continue
-                if can_capture(current_square, next_coord):
-                    self.capture_moves.append(next_coord)
-                else:
-                    if is_square_occupied(next_coord):
-                        continue
-                    moves_list.append(next_coord)
+        moves_list, self.capture_moves = step_movement(self.board, self.current_square, KNIGHT_STEPS)
 
         if moves_list:
             self.moves["moves"] = moves_list
@@ -320,10 +244,8 @@ class Queen(Piece):
     """
     
     def get_allowed_moves(self) -> dict:
-        current_square = get_square_coord(self.current_pos)
-
-        linear_moves, linear_captures = linear_movement(current_square)
-        diagonal_moves, diagonal_captures = diagonal_movement(current_square)
+        linear_moves, linear_captures = linear_movement(self.board, self.current_square)
+        diagonal_moves, diagonal_captures = diagonal_movement(self.board, self.current_square)
 
         moves_list = linear_moves + diagonal_moves
         self.capture_moves = linear_captures + diagonal_captures
@@ -342,39 +264,14 @@ class King(Piece):
 
     Move Type:
         - One square (In all direction)
+        - Castling (2 squares towards a rook, if rights remain)
     
     Captures: Along its path
     """
 
     def get_allowed_moves(self) -> dict:
-        current_square = get_square_coord(self.current_pos)
-        file = ord(current_square[0])
-        rank = int(current_square[1])
-        moves_list = []
-
-        # Possible king movement
-        directions = {
-        "left_up": (file - 1, rank + 1),
-        "left": (file - 1, rank),
-        "left_down": (file - 1, rank - 1),
-        "up": (file, rank + 1),
-        "down": (file, rank - 1),
-        "right_up": (file + 1, rank + 1),
-        "right": (file + 1, rank),
-        "right_down": (file + 1, rank - 1)
-        }
-
-        for (df, dr) in directions.values():
-            if ASCII_A <= df <= ASCII_H and RANK_MIN <= dr <= RANK_MAX:
-                next_coord = f"{chr(df)}{dr}"
-                if square_rects_dict.get(next_coord) is None:
-                    continue
-                if can_capture(current_square, next_coord):
-                    self.capture_moves.append(next_coord)
-                else:
-                    if is_square_occupied(next_coord):
-                        continue
-                    moves_list.append(next_coord)
+        moves_list, self.capture_moves = step_movement(self.board, self.current_square, KING_STEPS)
+        moves_list += castling_movement(self.board, SQUARE_INDEX[self.current_square])
 
         if moves_list:
             self.moves["moves"] = moves_list
@@ -391,4 +288,4 @@ PIECE_CLASS_DICT = {
     "knight": Knight,
     "queen": Queen,
     "king": King
-}
\ No newline at end of file
+}
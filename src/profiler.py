@@ -0,0 +1,128 @@
+# Opt-in instrumentation (pygame independent)
+#
+# Timers and call counters for the hot paths of the game (move generation,
+# attack map updates, drawing, asset loading). Functions are registered as
+# (owner, attribute) pairs and only wrapped while profiling is enabled:
+# disabled, the original functions are in place and cost nothing extra.
+# Each function keeps its last SAMPLE_LIMIT call times for percentiles.
+# report() / dump_json() give the numbers; a full call profile comes from
+# cProfile (main.py --pstats).
+
+import json
+import time
+from collections import deque
+
+SAMPLE_LIMIT = 1000 # Call times kept per function
+PERCENTILES = (50, 95, 99)
+
+class TimerStats:
+    def __init__(self, limit: int = SAMPLE_LIMIT) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=limit) # Seconds, newest last
+
+    def add(self, seconds: float) -> None:
+        self.calls += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def percentile(self, percent: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def summary(self) -> dict: # Milliseconds
+        summary = {"calls": self.calls, "total_ms": round(self.total * 1000, 3)}
+        for percent in PERCENTILES:
+            summary[f"p{percent}_ms"] = round(self.percentile(percent) * 1000, 3)
+        return summary
+
+class Profiler:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.hooks: list[tuple[object, str, str]] = [] # (owner, attribute, label)
+        self.originals: dict[str, object] = {} # Label -> function replaced while enabled
+        self.reset()
+
+    def reset(self) -> None:
+        self.timers: dict[str, TimerStats] = {}
+        self.frames = TimerStats()
+        self.counters: dict[str, int] = {}
+        self.values: dict[str, float] = {} # Latest gauges (e.g. engine nodes/s)
+        self.started = time.perf_counter()
+
+    def register(self, owner: object, attribute: str, label: str = None) -> None: # Module / class function to time
+        label = label or attribute
+        self.hooks.append((owner, attribute, label))
+        if self.enabled:
+            self.patch(owner, attribute, label)
+
+    def patch(self, owner: object, attribute: str, label: str) -> None:
+        function = getattr(owner, attribute)
+        stats = self.timers.setdefault(label, TimerStats())
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.add(time.perf_counter() - start)
+
+        timed.__wrapped__ = function
+        self.originals[label] = function
+        setattr(owner, attribute, timed)
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        self.enabled = True
+        self.reset()
+        for owner, attribute, label in self.hooks:
+            self.patch(owner, attribute, label)
+
+    def disable(self) -> None: # Originals back in place
+        if not self.enabled:
+            return
+        self.enabled = False
+        for owner, attribute, label in self.hooks:
+            setattr(owner, attribute, self.originals.pop(label))
+
+    def toggle(self) -> bool:
+        self.disable() if self.enabled else self.enable()
+        return self.enabled
+
+    def frame(self, seconds: float) -> None: # Work time of one main loop pass
+        self.frames.add(seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_value(self, name: str, value: float) -> None:
+        self.values[name] = value
+
+    def report(self) -> dict:
+        return {"seconds": round(time.perf_counter() - self.started, 3), "frames": self.frames.summary(),
+                "functions": {label: stats.summary() for label, stats in sorted(self.timers.items())},
+                "counters": dict(self.counters), "values": dict(self.values)}
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+    def overlay_lines(self) -> list[str]: # Text of the in-window overlay
+        frames = self.frames
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        lines = [f"frame p50 {frames.percentile(50) * 1000:.2f} ms  p95 {frames.percentile(95) * 1000:.2f} ms",
+                 f"{frames.calls / elapsed:.1f} loops/s"]
+        for name, value in sorted(self.values.items()):
+            lines.append(f"{name} {value:,.0f}")
+        for label, stats in sorted(self.timers.items()):
+            if stats.calls:
+                lines.append(f"{label} x{stats.calls} p50 {stats.percentile(50) * 1000:.2f} "
+                             f"p95 {stats.percentile(95) * 1000:.2f} p99 {stats.percentile(99) * 1000:.2f} ms")
+        for name, count in sorted(self.counters.items()):
+            lines.append(f"{name} {count}")
+        return lines
+
+profiler = Profiler()
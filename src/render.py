@@ -0,0 +1,108 @@
+# Dirty rectangle renderer
+#
+# The window background and the board are composited once into a static
+# layer; the highlight overlays (check, selection, moves, captures, promotions)
+# come from the sprite atlas. Every frame only the areas that changed are
+# redrawn: squares whose highlight changed and the old / new rects of
+# sprites that moved, appeared or disappeared. Only those rects are pushed to the display, and a
+# frame without changes draws nothing. An optional text panel (profiling
+# overlay) is drawn on top of everything in the top right corner.
+
+import pygame
+
+from utils import *
+from atlas import sprite_atlas, OVERLAY_NAMES
+
+class Renderer:
+    def __init__(self, window: pygame.Surface, board_surface: pygame.Surface, square_rects: dict[str, pygame.Rect]) -> None:
+        self.window = window
+        self.board_surface = board_surface
+        self.square_rects = square_rects
+        self.highlights: dict[str, tuple[str, ...]] = {} # Square -> overlay names, as drawn
+        self.sprite_rects: dict[pygame.sprite.Sprite, tuple[pygame.Rect, pygame.Surface]] = {} # As drawn
+        self.dirty: list[pygame.Rect] = []
+        self.panel: tuple[pygame.Surface, pygame.Rect] | None = None # Drawn last
+        self.build_overlays()
+        self.invalidate()
+
+    def build_overlays(self) -> None: # Overlay cells of the atlas for the current square size
+        self.overlays = {name: sprite_atlas.image(name) for name in OVERLAY_NAMES}
+
+    def set_board(self, board_surface: pygame.Surface) -> None: # Board redrawn for a new view (resize, flip)
+        self.board_surface = board_surface
+        self.highlights = {}
+        self.build_overlays()
+        self.invalidate()
+
+    def invalidate(self) -> None: # Full redraw on the next frame (start, resize, expose)
+        self.background = pygame.Surface(self.window.get_size())
+        self.background.fill(GRAY)
+        self.background.blit(self.board_surface, (BOARD_OFFSET_X, BOARD_OFFSET_Y))
+        self.dirty = [self.window.get_rect()]
+
+    def set_highlights(self, selected_square: str | None, allowed_moves: dict, checked_squares: list[str] = ()) -> None:
+        highlights = {square: ("check",) for square in checked_squares}
+        if selected_square is not None:
+            promotions = allowed_moves.get("promotions", [])
+            for square in allowed_moves.get("moves", []):
+                if square not in promotions:
+                    highlights[square] = highlights.get(square, ()) + ("move",)
+            for square in allowed_moves.get("captures", []):
+                highlights[square] = highlights.get(square, ()) + ("capture",)
+            for square in promotions:
+                highlights[square] = highlights.get(square, ()) + ("promotion",)
+            highlights[selected_square] = highlights.get(selected_square, ()) + ("selection",)
+
+        for square in highlights.keys() | self.highlights.keys():
+            if highlights.get(square) != self.highlights.get(square):
+                self.dirty.append(self.square_rects[square])
+        self.highlights = highlights
+
+    def set_panel(self, surface: pygame.Surface | None) -> None: # Replace / remove the top right panel
+        if self.panel is not None:
+            self.dirty.append(self.panel[1])
+        self.panel = None
+        if surface is not None:
+            rect = surface.get_rect(topright=(self.window.get_width() - 10, 10))
+            self.panel = surface, rect
+            self.dirty.append(rect)
+
+    def track_sprites(self, sprites: pygame.sprite.Group) -> None: # Dirty old & new rects of changed sprites
+        current = {}
+        for sprite in sprites:
+            current[sprite] = (sprite.rect.copy(), sprite.image)
+            drawn = self.sprite_rects.get(sprite)
+            if drawn != current[sprite]:
+                self.dirty.append(current[sprite][0])
+                if drawn is not None:
+                    self.dirty.append(drawn[0])
+        for sprite, (rect, _) in self.sprite_rects.items():
+            if sprite not in current:
+                self.dirty.append(rect)
+        self.sprite_rects = current
+
+    def draw(self, sprites: pygame.sprite.Group) -> None:
+        self.track_sprites(sprites)
+        if not self.dirty:
+            return # Nothing changed: no drawing, no display update
+
+        window = self.window
+        window_rect = window.get_rect()
+        dirty = [rect.clip(window_rect) for rect in self.dirty]
+        dirty = [rect for rect in dirty if rect.width and rect.height]
+        for rect in dirty:
+            window.set_clip(rect)
+            window.blit(self.background, rect, rect)
+            for square, names in self.highlights.items():
+                square_rect = self.square_rects[square]
+                if square_rect.colliderect(rect):
+                    for name in names:
+                        window.blit(self.overlays[name], square_rect.topleft)
+            for sprite, (sprite_rect, image) in self.sprite_rects.items():
+                if sprite_rect.colliderect(rect):
+                    window.blit(image, sprite_rect)
+            if self.panel is not None and self.panel[1].colliderect(rect):
+                window.blit(*self.panel)
+        window.set_clip(None)
+        pygame.display.update(dirty)
+        self.dirty = []
@@ -0,0 +1,187 @@
+# Legal move generation (pygame independent)
+#
+# The piece classes produce pseudo-legal moves (moves that ignore the safety
+# of the own king). This module filters them with make_move / unmake_move on
+# the board: a move is legal when the own king is not attacked afterwards.
+# Pieces that are not pinned can skip the make / unmake test unless the king
+# is already in check, which keeps the common case cheap.
+
+from board import *
+from bitboard import (KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN, PROMOTION_TYPES,
+                      bit, iter_bits, rook_attacks, bishop_attacks, generate_moves as generate_bitboard_moves,
+                      generate_packed_moves)
+from moves import MoveList, moves_to_dict
+
+DARK_SQUARES = sum(1 << index for index in range(64) if (index // 8 + index % 8) % 2 == 0) # a1 is dark
+MATING_KINDS = ("w_pawn", "b_pawn", "w_rook", "b_rook", "w_queen", "b_queen")
+
+# Helper functions
+def is_square_attacked(board: Board, square: int, by_colour: int) -> bool:
+    bitboards = board.bitboards
+    prefix = "w" if by_colour == WHITE_SIDE else "b"
+    if PAWN_ATTACKS[by_colour ^ 1][square] & bitboards.get(f"{prefix}_pawn", 0):
+        return True
+    if KNIGHT_ATTACKS[square] & bitboards.get(f"{prefix}_knight", 0):
+        return True
+    if KING_ATTACKS[square] & bitboards.get(f"{prefix}_king", 0):
+        return True
+    occupied = board.occupancy[WHITE_SIDE] | board.occupancy[BLACK_SIDE]
+    queens = bitboards.get(f"{prefix}_queen", 0)
+    if rook_attacks(square, occupied) & (bitboards.get(f"{prefix}_rook", 0) | queens):
+        return True
+    return bool(bishop_attacks(square, occupied) & (bitboards.get(f"{prefix}_bishop", 0) | queens))
+
+def king_square(board: Board, colour: int) -> int | None:
+    king = board.bitboards.get("w_king" if colour == WHITE_SIDE else "b_king", 0)
+    return king.bit_length() - 1 if king else None
+
+def in_check(board: Board, colour: int = None) -> bool:
+    colour = board.side_to_move if colour is None else colour
+    square = king_square(board, colour)
+    return square is not None and is_square_attacked(board, square, colour ^ 1)
+
+def pinned_pieces(board: Board, colour: int, king: int) -> int: # Own pieces pinned to the king (bitboard)
+    bitboards = board.bitboards
+    prefix = "b" if colour == WHITE_SIDE else "w"
+    queens = bitboards.get(f"{prefix}_queen", 0)
+    snipers = rook_attacks(king, 0) & (bitboards.get(f"{prefix}_rook", 0) | queens)
+    snipers |= bishop_attacks(king, 0) & (bitboards.get(f"{prefix}_bishop", 0) | queens)
+    occupied = board.occupancy[WHITE_SIDE] | board.occupancy[BLACK_SIDE]
+    own = board.occupancy[colour]
+    pinned = 0
+    for sniper in iter_bits(snipers):
+        blockers = BETWEEN[king][sniper] & occupied
+        if blockers and blockers & (blockers - 1) == 0 and blockers & own: # Exactly one own piece in between
+            pinned |= blockers
+    return pinned
+
+def generate_pseudo_moves(board: Board, colour: int, piece_class_dict: dict = None) -> list[tuple[int, int, str | None]]:
+    if piece_class_dict is None:
+        return generate_bitboard_moves(board, colour)
+
+    moves = [] # Same moves through the piece classes (dict shape)
+    prefix = "w" if colour == WHITE_SIDE else "b"
+    for piece_name, index in list(board.piece_squares.items()):
+        if piece_name[0] != prefix:
+            continue
+        piece = piece_class_dict[get_piece_type(piece_name)](piece_name, SQUARE_NAMES[index], board=board)
+        allowed_moves = piece.get_allowed_moves()
+        promotions = allowed_moves.get("promotions", [])
+        for square in allowed_moves.get("moves", []) + allowed_moves.get("captures", []):
+            if square in promotions:
+                for promotion in PROMOTION_TYPES:
+                    moves.append((index, SQUARE_INDEX[square], promotion))
+            else:
+                moves.append((index, SQUARE_INDEX[square], None))
+    return moves
+
+def is_legal(board: Board, move: tuple[int, int, str | None], colour: int, king: int | None,
+             pinned: int, checked: bool) -> bool:
+    return _is_legal(board, move[0], move[1], colour, king, pinned, checked)
+
+def _is_legal(board: Board, origin: int, target: int, colour: int, king: int | None, pinned: int, checked: bool) -> bool:
+    if king is None:
+        return True # No king on the board (test positions)
+    if origin == king:
+        if abs(target - origin) == 2: # Castling: not out of, through or into check
+            if checked or is_square_attacked(board, (origin + target) // 2, colour ^ 1):
+                return False
+    elif not checked and not pinned & bit(origin) and not (target == board.ep_square and board.squares[origin][2] == "p"):
+        return True # Nothing to test (en passant can expose the king along the rank)
+
+    board.make_move(origin, target) # The promotion piece does not matter for the own king
+    legal = not is_square_attacked(board, target if origin == king else king, colour ^ 1)
+    board.unmake_move()
+    return legal
+
+def generate_legal_moves(board: Board, colour: int = None, piece_class_dict: dict = None) -> list[tuple[int, int, str | None]]:
+    colour = board.side_to_move if colour is None else colour
+    king = king_square(board, colour)
+    pinned = pinned_pieces(board, colour, king) if king is not None else 0
+    checked = king is not None and is_square_attacked(board, king, colour ^ 1)
+    return [move for move in generate_pseudo_moves(board, colour, piece_class_dict)
+            if is_legal(board, move, colour, king, pinned, checked)]
+
+def is_legal_move(board: Board, move: tuple[int, int, str | None], colour: int = None) -> bool: # One move, one king test
+    colour = board.side_to_move if colour is None else colour
+    if move not in generate_bitboard_moves(board, colour):
+        return False
+    king = king_square(board, colour)
+    pinned = pinned_pieces(board, colour, king) if king is not None else 0
+    checked = king is not None and is_square_attacked(board, king, colour ^ 1)
+    return is_legal(board, move, colour, king, pinned, checked)
+
+def has_legal_move(board: Board, colour: int = None) -> bool: # Stops at the first legal move (mate / stalemate test)
+    colour = board.side_to_move if colour is None else colour
+    king = king_square(board, colour)
+    pinned = pinned_pieces(board, colour, king) if king is not None else 0
+    checked = king is not None and is_square_attacked(board, king, colour ^ 1)
+    return any(_is_legal(board, origin, target, colour, king, pinned, checked)
+               for origin, target, _ in generate_bitboard_moves(board, colour))
+
+def generate_legal_captures(board: Board, colour: int = None) -> list[tuple[int, int, str | None]]: # Captures & queen promotions
+    colour = board.side_to_move if colour is None else colour
+    king = king_square(board, colour)
+    pinned = pinned_pieces(board, colour, king) if king is not None else 0
+    checked = king is not None and is_square_attacked(board, king, colour ^ 1)
+    return [move for move in generate_bitboard_moves(board, colour, True)
+            if is_legal(board, move, colour, king, pinned, checked)]
+
+def generate_legal_packed(board: Board, move_list: MoveList, colour: int = None, captures_only: bool = False) -> MoveList:
+    # Legal packed moves into move_list (cleared first); captures_only: captures & queen promotions
+    colour = board.side_to_move if colour is None else colour
+    move_list.count = 0
+    generate_packed_moves(board, colour, move_list, captures_only)
+    king = king_square(board, colour)
+    pinned = pinned_pieces(board, colour, king) if king is not None else 0
+    checked = king is not None and is_square_attacked(board, king, colour ^ 1)
+    moves = move_list.moves
+    count = 0
+    for index in range(move_list.count): # Compact the legal moves in place
+        move = moves[index]
+        if _is_legal(board, move & 0x3F, move >> 6 & 0x3F, colour, king, pinned, checked):
+            moves[count] = move
+            count += 1
+    move_list.count = count
+    return move_list
+
+def get_legal_moves(board: Board, piece_name: str, piece_class_dict: dict = None) -> dict: # Allowed moves dict of one piece
+    index = board.piece_squares[piece_name]
+    colour = get_colour(piece_name)
+    if piece_class_dict is None: # Packed generator through the dict adapter
+        return moves_to_dict(generate_legal_packed(board, MoveList(), colour), index)
+    allowed_moves = piece_class_dict[get_piece_type(piece_name)](piece_name, SQUARE_NAMES[index], board=board).get_allowed_moves()
+    return legal_allowed_moves(board, piece_name, allowed_moves)
+
+def legal_allowed_moves(board: Board, piece_name: str, allowed_moves: dict) -> dict: # Keep the king-safe pseudo-legal moves
+    index = board.piece_squares[piece_name]
+    colour = get_colour(piece_name)
+    king = king_square(board, colour)
+    pinned = pinned_pieces(board, colour, king) if king is not None else 0
+    checked = king is not None and is_square_attacked(board, king, colour ^ 1)
+    promotions = allowed_moves.get("promotions", [])
+    legal_moves = {}
+    for move_type, squares in allowed_moves.items():
+        if move_type == "promotions":
+            continue
+        legal_squares = [square for square in squares
+                         if is_legal(board, (index, SQUARE_INDEX[square], "queen" if square in promotions else None),
+                                     colour, king, pinned, checked)]
+        if legal_squares:
+            legal_moves[move_type] = legal_squares
+    legal_promotions = [square for square in promotions
+                        if square in legal_moves.get("moves", []) or square in legal_moves.get("captures", [])]
+    if legal_promotions:
+        legal_moves["promotions"] = legal_promotions
+    return legal_moves
+
+def insufficient_material(board: Board) -> bool: # No mate possible: bare kings, one minor piece, bishops all on one colour
+    bitboards = board.bitboards
+    if any(bitboards.get(kind, 0) for kind in MATING_KINDS):
+        return False
+    knights = bitboards.get("w_knight", 0) | bitboards.get("b_knight", 0)
+    bishops = bitboards.get("w_bishop", 0) | bitboards.get("b_bishop", 0)
+    minors = knights | bishops
+    if minors & (minors - 1) == 0: # At most one minor piece
+        return True
+    return not knights and (not bishops & DARK_SQUARES or not bishops & ~DARK_SQUARES)
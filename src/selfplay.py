@@ -0,0 +1,209 @@
+# Headless self-play game farm
+#
+# Plays batches of games between engine / random players on a process pool
+# without pygame, streams every finished game to PGN and / or JSONL files
+# and reports throughput (games/s, plies per game, time per phase):
+#
+#   python src/selfplay.py --games 1000 --white engine --black random --pgn games.pgn
+#   python src/selfplay.py --games 200 --depth 2 --workers 4 --jsonl games.jsonl --swap
+#
+# Games are written in game order. Random players are seeded per game, so a
+# batch of random / depth limited games is reproducible with the same --seed.
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from board import *
+from bitboard import init_tables
+from rules import generate_legal_moves
+from gamestate import GameState
+from engine import Engine
+from pgn import move_san, game_pgn
+from moves import tuple_move_name
+from book import OpeningBook
+from tablebase import Tablebases, MAX_PIECES
+
+PLAYERS = ("engine", "random")
+PHASES = ("movegen", "search", "notation", "make") # Timed parts of a game (worker seconds)
+
+_engines: dict[float, Engine] = {} # Engine per hash size, one set per process
+_books: dict[str, OpeningBook] = {} # Memory-mapped books, one mapping per process
+_tablebases: dict[str, Tablebases] = {} # Per directory
+
+# Helper functions
+def get_engine(hash_mb: float) -> Engine:
+    engine = _engines.get(hash_mb)
+    if engine is None:
+        engine = _engines[hash_mb] = Engine(hash_mb)
+    return engine
+
+def get_book(path: str) -> OpeningBook:
+    book = _books.get(path)
+    if book is None:
+        book = _books[path] = OpeningBook(path)
+    return book
+
+def play_game(task: dict) -> dict: # Plays one game, returns its record
+    board = Board()
+    board.load_fen(task["fen"])
+    players = (task["white"], task["black"])
+    rng = random.Random(f"{task['seed']}:{task['game']}")
+    engine = None
+    book = get_book(task["book"]) if task["book"] is not None else None
+    tablebases = None
+    if task["tablebases"] is not None:
+        tablebases = _tablebases.setdefault(task["tablebases"], Tablebases(task["tablebases"]))
+    if "engine" in players:
+        engine = get_engine(task["hash_mb"])
+        engine.tt.clear() # Same start state for every game
+    timings = dict.fromkeys(PHASES, 0.0)
+    moves, sans = [], []
+    state = GameState(board) # Mate / draw status, updated after every move
+    outcome = state.outcome
+
+    while outcome is None:
+        if tablebases is not None and len(board.piece_squares) <= MAX_PIECES:
+            entry = tablebases.probe(board) # Adjudicate known endgames
+            if entry is not None:
+                wdl = entry[0] if board.side_to_move == WHITE_SIDE else -entry[0]
+                outcome = {1: "1-0", 0: "1/2-1/2", -1: "0-1"}[wdl], "tablebase"
+                break
+        if len(moves) >= task["max_plies"]:
+            outcome = "1/2-1/2" if task["adjudicate"] else "*", "ply limit"
+            break
+
+        start = time.perf_counter()
+        legal_moves = generate_legal_moves(board)
+        timings["movegen"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        book_move = book.choose(board, rng) if book is not None and players[board.side_to_move] == "engine" else None
+        if players[board.side_to_move] == "random" or len(legal_moves) == 1:
+            move = rng.choice(legal_moves)
+        elif book_move is not None:
+            move = book_move
+        else:
+            move = engine.search(board, task["depth"], task["movetime"], task["nodes"]).move
+        timings["search"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        sans.append(move_san(board, move, legal_moves))
+        moves.append(tuple_move_name(move))
+        timings["notation"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        board.make_move(*move)
+        timings["make"] += time.perf_counter() - start
+        start = time.perf_counter()
+        outcome = state.record_move()
+        timings["movegen"] += time.perf_counter() - start # Mate / stalemate test
+
+    result, termination = outcome
+    return {"game": task["game"], "white": players[0], "black": players[1], "fen": task["fen"], "result": result,
+            "termination": termination, "plies": len(moves), "moves": moves, "san": sans, "timings": timings}
+
+def game_record_pgn(record: dict, date: str) -> str:
+    board = Board()
+    board.load_fen(record["fen"])
+    headers = {"Event": "Self-play", "Site": "selfplay", "Date": date, "Round": record["game"] + 1,
+               "White": record["white"], "Black": record["black"], "Termination": record["termination"],
+               "PlyCount": record["plies"]}
+    if record["fen"] != START_FEN:
+        headers["SetUp"] = "1"
+        headers["FEN"] = record["fen"]
+    return game_pgn(headers, record["san"], record["result"], board.fullmove_number, board.side_to_move == BLACK_SIDE)
+
+def make_tasks(args: argparse.Namespace) -> list[dict]:
+    tasks = []
+    for game in range(args.games):
+        white, black = args.white, args.black
+        if args.swap and game % 2:
+            white, black = black, white
+        tasks.append({"game": game, "white": white, "black": black, "fen": args.fen, "seed": args.seed,
+                      "depth": args.depth, "movetime": None if args.movetime is None else args.movetime / 1000,
+                      "nodes": args.nodes, "hash_mb": args.hash, "max_plies": args.max_plies,
+                      "adjudicate": args.adjudicate, "book": args.book,
+                      "tablebases": args.tablebases})
+    return tasks
+
+def print_report(records: list[dict], elapsed: float, final: bool = False) -> None:
+    games = len(records)
+    plies = sum(record["plies"] for record in records)
+    rate = games / elapsed if elapsed > 0 else 0
+    print(f"{games} games {elapsed:8.2f}s {rate:8.2f} games/s {plies / max(games, 1):6.1f} plies/game")
+    if not final:
+        return
+
+    results, terminations = {}, {}
+    for record in records:
+        results[record["result"]] = results.get(record["result"], 0) + 1
+        terminations[record["termination"]] = terminations.get(record["termination"], 0) + 1
+    print("  results:", ", ".join(f"{result} {count}" for result, count in sorted(results.items())))
+    print("  terminations:", ", ".join(f"{name} {count}" for name, count in sorted(terminations.items())))
+    for phase in PHASES: # Summed over the workers
+        seconds = sum(record["timings"][phase] for record in records)
+        print(f"  {phase:>9}: {seconds:10.3f}s {1e6 * seconds / max(plies, 1):10.1f} us/ply")
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless self-play games")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--white", choices=PLAYERS, default="engine")
+    parser.add_argument("--black", choices=PLAYERS, default="random")
+    parser.add_argument("--swap", action="store_true", help="alternate colours every game")
+    parser.add_argument("--fen", default=START_FEN, help="start position")
+    parser.add_argument("--depth", type=int, default=64, help="engine depth limit")
+    parser.add_argument("--movetime", type=int, default=None, help="engine time per move (ms)")
+    parser.add_argument("--nodes", type=int, default=None, help="engine node limit per move")
+    parser.add_argument("--hash", type=float, default=4, help="transposition table size per engine (MB)")
+    parser.add_argument("--max-plies", type=int, default=400, help="stop games after this many plies")
+    parser.add_argument("--adjudicate", action="store_true", help="score games stopped at the ply limit as draws")
+    parser.add_argument("--book", default=None, help="opening book for the engine players")
+    parser.add_argument("--tablebases", default=None, help="tablebase directory: adjudicate endgames found there")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pgn", default=None, help="PGN output file")
+    parser.add_argument("--jsonl", default=None, help="JSON lines output file")
+    parser.add_argument("--report-every", type=int, default=100, help="progress line every N games (0: off)")
+    args = parser.parse_args(argv)
+    if "engine" in (args.white, args.black) and args.depth == 64 and args.movetime is None and args.nodes is None:
+        args.depth = 2 # Unlimited search would never finish a game
+
+    init_tables()
+    tasks = make_tasks(args)
+    date = datetime.date.today().strftime("%Y.%m.%d")
+    pgn_file = open(args.pgn, "w") if args.pgn else None
+    jsonl_file = open(args.jsonl, "w") if args.jsonl else None
+    pool = ProcessPoolExecutor(args.workers, initializer=init_tables) if args.workers > 1 else None
+
+    records = []
+    start = time.perf_counter()
+    try:
+        games = pool.map(play_game, tasks, chunksize=max(1, min(16, len(tasks) // (4 * args.workers)))) if pool else map(play_game, tasks)
+        for record in games:
+            records.append(record)
+            if pgn_file is not None:
+                pgn_file.write(game_record_pgn(record, date) + "\n")
+                pgn_file.flush()
+            if jsonl_file is not None:
+                jsonl_file.write(json.dumps(record) + "\n")
+                jsonl_file.flush()
+            if args.report_every and len(records) % args.report_every == 0 and len(records) < len(tasks):
+                print_report(records, time.perf_counter() - start)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        for file in (pgn_file, jsonl_file):
+            if file is not None:
+                file.close()
+
+    print_report(records, time.perf_counter() - start, final=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
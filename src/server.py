@@ -0,0 +1,199 @@
+# Multi-game server (asyncio, plain TCP, pygame independent)
+#
+#   python src/server.py --host 127.0.0.1 --port 8765
+#
+# One process hosts many games. A game is a Board, its GameState (check,
+# mate, draws) and optional clocks: no sprites, no window. Moves are
+# validated by the rules layer with a single legality test. Clients speak
+# one command per line and get one reply line per command:
+#
+#   new [<base seconds> <increment seconds>]  -> game <id>
+#   move <id> <uci move>      -> ok <id> <move> <white ms> <black ms> [<result> <termination>]
+#   fen <id> / moves <id>     -> fen <id> <fen> / moves <id> <uci moves...>
+#   resign <id> / close <id>  -> over <id> <result> resignation / closed <id>
+#   stats                     -> stats games <n> moves <n> move_p50_ms <ms> move_p99_ms <ms>
+#   quit
+#
+# Errors are answered "error <id|-> <message>"; a failing command does not
+# end the connection. A time control is both values (finite seconds, base
+# above zero, increment zero or more); untimed games show "-" for the
+# clocks. The clock of the side to move is charged when that side sends a
+# move (or asks for the position), so a flag fall is noticed then. Games
+# belong to the connection that created them and end with it: other
+# connections get "error <id> not your game" for them.
+
+import argparse
+import asyncio
+import math
+import sys
+import time
+
+from board import *
+from bitboard import init_tables
+from rules import generate_legal_moves
+from gamestate import GameState
+from moves import tuple_move_name
+from profiler import TimerStats
+from uci import parse_move
+
+DEFAULT_HOST = "127.0.0.1" # Local only unless asked otherwise
+DEFAULT_PORT = 8765
+MAX_GAMES = 20000
+LATENCY_SAMPLES = 100000 # Move handling times kept for the percentiles
+
+class Game:
+    __slots__ = ("board", "state", "clocks", "increment", "last_time", "result")
+
+    def __init__(self, base: float = None, increment: float = 0.0) -> None:
+        self.board = Board()
+        self.board.reset()
+        self.state = GameState(self.board)
+        self.clocks = [base, base] if base is not None else None # Seconds left, [WHITE_SIDE, BLACK_SIDE]
+        self.increment = increment
+        self.last_time = time.monotonic()
+        self.result = None # (result, termination) decided off the board (resignation, time)
+
+    @property
+    def outcome(self) -> tuple[str, str] | None:
+        return self.result or self.state.outcome
+
+    def tick(self, now: float) -> None: # Charge the side to move, flag at zero
+        if self.clocks is None or self.outcome is not None:
+            return
+        side = self.board.side_to_move
+        self.clocks[side] -= now - self.last_time
+        self.last_time = now
+        if self.clocks[side] <= 0:
+            self.clocks[side] = 0.0
+            self.result = ("0-1" if side == WHITE_SIDE else "1-0"), "time forfeit"
+
+    def play(self, text: str, now: float) -> None: # Raises ValueError for illegal moves / finished games
+        self.tick(now)
+        if self.outcome is not None:
+            raise ValueError(f"game over {' '.join(self.outcome)}")
+        side = self.board.side_to_move
+        self.state.push(*parse_move(self.board, text))
+        if self.clocks is not None:
+            self.clocks[side] += self.increment
+
+    def clock_text(self) -> str:
+        if self.clocks is None:
+            return "- -"
+        return " ".join(str(int(seconds * 1000)) for seconds in self.clocks)
+
+class GameServer:
+    def __init__(self, max_games: int = MAX_GAMES) -> None:
+        self.max_games = max_games
+        self.games: dict[int, Game] = {}
+        self.next_id = 1
+        self.moves = 0
+        self.move_times = TimerStats(LATENCY_SAMPLES) # Validation + move + termination check
+
+    def command(self, words: list[str], owned: set[int]) -> str | None: # Reply line, None on quit
+        if not words:
+            return "error - empty command"
+        name, args = words[0], words[1:]
+        if name == "quit":
+            return None
+        if name == "stats":
+            stats = self.move_times
+            return (f"stats games {len(self.games)} moves {self.moves} move_p50_ms {stats.percentile(50) * 1000:.3f} "
+                    f"move_p99_ms {stats.percentile(99) * 1000:.3f}")
+        if name == "new":
+            return self.new_game(args, owned)
+
+        game_id = int(args[0]) if args and args[0].isdigit() else None
+        game = self.games.get(game_id)
+        if game is None:
+            return f"error {args[0] if args else '-'} unknown game"
+        if game_id not in owned:
+            return f"error {game_id} not your game"
+        now = time.monotonic()
+        if name == "move":
+            if len(args) != 2:
+                return f"error {game_id} usage: move <id> <uci move>"
+            start = time.perf_counter()
+            try:
+                game.play(args[1], now)
+            except ValueError as error:
+                return f"error {game_id} {error}"
+            finally:
+                self.move_times.add(time.perf_counter() - start)
+            self.moves += 1
+            reply = f"ok {game_id} {args[1]} {game.clock_text()}"
+            return f"{reply} {' '.join(game.outcome)}" if game.outcome is not None else reply
+        if name == "fen":
+            game.tick(now)
+            return f"fen {game_id} {game.board.to_fen()}"
+        if name == "moves":
+            moves = generate_legal_moves(game.board) if game.outcome is None else []
+            return f"moves {game_id} {' '.join(tuple_move_name(move) for move in moves)}".rstrip()
+        if name == "resign":
+            if game.outcome is None:
+                game.result = ("0-1" if game.board.side_to_move == WHITE_SIDE else "1-0"), "resignation"
+            return f"over {game_id} {' '.join(game.outcome)}"
+        if name == "close":
+            del self.games[game_id]
+            owned.discard(game_id)
+            return f"closed {game_id}"
+        return f"error {game_id} unknown command {name}"
+
+    def new_game(self, args: list[str], owned: set[int]) -> str:
+        if len(self.games) >= self.max_games:
+            return "error - server full"
+        base, increment = None, 0.0
+        if args:
+            try:
+                base, increment = map(float, args) # ValueError for anything but two numbers
+            except ValueError:
+                return "error - bad time control"
+            if not (math.isfinite(base) and math.isfinite(increment) and base > 0 and increment >= 0):
+                return "error - bad time control"
+        game_id = self.next_id
+        self.next_id += 1
+        self.games[game_id] = Game(base, increment)
+        owned.add(game_id)
+        return f"game {game_id}"
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        owned: set[int] = set() # Games of this connection
+        try:
+            while line := await reader.readline():
+                try:
+                    reply = self.command(line.decode(errors="replace").split(), owned)
+                except Exception as error: # One bad request must not drop the connection and its games
+                    reply = f"error - {type(error).__name__}: {error}"
+                if reply is None:
+                    break
+                writer.write(reply.encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in owned:
+                self.games.pop(game_id, None)
+            writer.close()
+
+async def serve(host: str, port: int, max_games: int) -> None:
+    game_server = GameServer(max_games)
+    server = await asyncio.start_server(game_server.handle_client, host, port)
+    print(f"Serving games on {host}:{port}", file=sys.stderr, flush=True)
+    async with server:
+        await server.serve_forever()
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Host many chess games over a line protocol")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-games", type=int, default=MAX_GAMES)
+    args = parser.parse_args(argv)
+
+    init_tables()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_games))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+# Endgame tablebases
+#
+# Retrograde analysis of small endgames (KQvK, KRvK, KPvK, up to four pieces)
+# over every placement of the pieces, with the moves of the legal move
+# generator. A table stores one byte per position, from the side to move:
+#
+#   0 draw, 1 - 127 mates in that many plies, 128 + n is mated in n plies,
+#   255 illegal position
+#
+# Positions are indexed by (side to move, strong king, other pieces) with
+# the strong king mapped into a1-d1-d4 (a-d files when there are pawns) by
+# board symmetry; the strong side is stored as white. Tables are
+# "<material>.tb" files probed in O(1) through a memory map. Castling and en
+# passant rights are not part of the index.
+#
+#   python src/tablebase.py KQvK KRvK KPvK --workers 4
+#   python src/tablebase.py --probe "8/8/8/4k3/8/8/8/KQ6 w - - 0 1"
+#
+# Successor lists are generated in parallel chunks; the retrograde pass
+# (mates first, then positions one ply further out) runs in the main process.
+
+import argparse
+import mmap
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from board import *
+from bitboard import init_tables, iter_bits
+from rules import generate_legal_packed, in_check
+from moves import MoveList, make_move, unpack_move, tuple_move_name
+
+TABLE_DIR = "tablebases"
+MAX_PIECES = 4
+PIECE_ORDER = "KQRBNP" # Letter order in material names
+LETTER_TYPES = {"K": "king", "Q": "queen", "R": "rook", "B": "bishop", "N": "knight", "P": "pawn"}
+TYPE_LETTERS = {piece_type: letter for letter, piece_type in LETTER_TYPES.items()}
+INSUFFICIENT = ("KvK", "KBvK", "KNvK") # Draws without a table
+DRAW, LOSS, ILLEGAL = 0, 128, 255 # Stored values (wins are 1 - 127)
+MAX_PLIES = 126
+CHUNK_POSITIONS = 4096 # Positions per worker task
+
+# Position states while generating
+NORMAL, INVALID, MATED, STALEMATE = 0, 1, 2, 3
+
+def _symmetries() -> list[list[int]]: # The 8 board symmetries as square maps (identity first)
+    maps = []
+    for diagonal in (False, True):
+        for flip_rank in (0, 56):
+            for flip_file in (0, 7):
+                maps.append([((square & 7) << 3 | square >> 3 if diagonal else square) ^ flip_rank ^ flip_file
+                             for square in range(64)])
+    return maps
+
+SYMMETRIES = _symmetries()
+TRIANGLE = [square for square in range(64) if square >> 3 <= (square & 7) <= 3] # a1 b1 b2 c1 c2 c3 d1 d2 d3 d4
+HALF = [square for square in range(64) if square & 7 <= 3] # a - d files
+PAWNLESS_MAPS = [next(m for m in SYMMETRIES if m[king] in TRIANGLE) for king in range(64)] # Per strong king square
+PAWN_MAPS = [next(m for m in SYMMETRIES[:2] if m[king] in HALF) for king in range(64)] # Left-right mirror only
+
+# Helper functions
+def side_letters(board: Board, colour: int) -> str: # "KQ"
+    letters = [TYPE_LETTERS[get_piece_type(name)] for name in board.piece_squares if get_colour(name) == colour]
+    return "".join(sorted(letters, key=PIECE_ORDER.index))
+
+def strength(letters: str) -> tuple:
+    return len(letters), [-PIECE_ORDER.index(letter) for letter in letters]
+
+def material_key(board: Board) -> tuple[str, bool]: # ("KQvK", colours swapped: black is the strong side)
+    white, black = side_letters(board, WHITE_SIDE), side_letters(board, BLACK_SIDE)
+    if strength(black) > strength(white):
+        return f"{black}v{white}", True
+    return f"{white}v{black}", False
+
+def normalize_material(name: str) -> str: # "kqk" / "KQvK" -> "KQvK"
+    name = name.upper().replace("V", "v")
+    if "v" not in name:
+        second_king = name.find("K", 1)
+        name = f"{name[:second_king]}v{name[second_king:]}"
+    strong, weak = name.split("v")
+    for side in (strong, weak):
+        if not side.startswith("K") or "K" in side[1:] or any(letter not in PIECE_ORDER for letter in side):
+            raise ValueError(f"bad material: {name}")
+    if len(strong) + len(weak) > MAX_PIECES:
+        raise ValueError(f"at most {MAX_PIECES} pieces: {name}")
+    strong, weak = ("".join(sorted(side, key=PIECE_ORDER.index)) for side in (strong, weak))
+    if strength(weak) > strength(strong):
+        strong, weak = weak, strong
+    return f"{strong}v{weak}"
+
+def decode_value(value: int) -> tuple[int, int] | None: # (1 win / 0 draw / -1 loss, plies to mate) or None if illegal
+    if value == ILLEGAL:
+        return None
+    if value >= LOSS:
+        return -1, value - LOSS
+    return (1, value) if value else (0, 0)
+
+class Table: # Index layout of one material
+    def __init__(self, material: str) -> None:
+        self.material = material
+        strong, weak = material.split("v")
+        self.pieces = ([(WHITE_SIDE, "king"), (BLACK_SIDE, "king")] + [(WHITE_SIDE, LETTER_TYPES[letter]) for letter in strong[1:]]
+                       + [(BLACK_SIDE, LETTER_TYPES[letter]) for letter in weak[1:]])
+        self.pawns = "P" in material
+        self.king_squares = HALF if self.pawns else TRIANGLE
+        self.king_maps = PAWN_MAPS if self.pawns else PAWNLESS_MAPS
+        self.king_slots = {square: slot for slot, square in enumerate(self.king_squares)}
+        self.size = 2 * len(self.king_squares) * 64 ** (len(self.pieces) - 1)
+        self.values = None # Stored bytes (mmap) once loaded
+
+    def index(self, side_to_move: int, squares: list[int]) -> int: # squares in piece order, any orientation
+        mapping = self.king_maps[squares[0]]
+        index = side_to_move * len(self.king_squares) + self.king_slots[mapping[squares[0]]]
+        for square in squares[1:]:
+            index = index * 64 + mapping[square]
+        return index
+
+    def decode(self, index: int) -> tuple[int, list[int]]: # -> (side to move, squares in piece order)
+        squares = []
+        for _ in range(len(self.pieces) - 1):
+            index, square = divmod(index, 64)
+            squares.append(square)
+        side_to_move, slot = divmod(index, len(self.king_squares))
+        return side_to_move, [self.king_squares[slot]] + squares[::-1]
+
+    def valid_squares(self, squares: list[int]) -> bool: # One piece per square, no pawn on the first / last rank
+        if len(set(squares)) != len(squares):
+            return False
+        return all(piece_type != "pawn" or 8 <= square < 56 for (_, piece_type), square in zip(self.pieces, squares))
+
+    def board_squares(self, board: Board, swapped: bool) -> list[int]: # Piece squares of a board in piece order
+        squares = []
+        remaining = {}
+        for colour, piece_type in self.pieces:
+            kind = f"{'wb'[colour ^ swapped]}_{piece_type}"
+            if kind not in remaining:
+                remaining[kind] = list(iter_bits(board.bitboards.get(kind, 0)))
+            square = remaining[kind].pop(0)
+            squares.append(square ^ 56 if swapped else square)
+        return squares
+
+    def load(self, path: str) -> None:
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size != self.size:
+                raise ValueError(f"{path}: expected {self.size} bytes")
+            self.values = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+class Tablebases: # The tables of a directory, loaded on first use
+    def __init__(self, directory: str = TABLE_DIR) -> None:
+        self.directory = directory
+        self.tables: dict[str, Table | None] = {}
+
+    def table(self, material: str) -> Table | None:
+        if material not in self.tables:
+            path = os.path.join(self.directory, f"{material}.tb")
+            table = None
+            if os.path.exists(path):
+                table = Table(material)
+                table.load(path)
+            self.tables[material] = table
+        return self.tables[material]
+
+    def probe(self, board: Board) -> tuple[int, int] | None: # (wdl, plies to mate) for the side to move, or None
+        if len(board.piece_squares) > MAX_PIECES or board.castling:
+            return None
+        material, swapped = material_key(board)
+        if material in INSUFFICIENT:
+            return 0, 0
+        table = self.table(material)
+        if table is None:
+            return None
+        return decode_value(table.values[table.index(board.side_to_move ^ swapped, table.board_squares(board, swapped))])
+
+    def best_move(self, board: Board) -> tuple[tuple[int, int, str | None], int, int] | None: # (move, wdl, plies)
+        root = self.probe(board)
+        if root is None:
+            return None
+        best = None
+        for move in generate_legal_packed(board, MoveList()):
+            make_move(board, move)
+            child = self.probe(board)
+            board.unmake_move()
+            if child is None:
+                return None # Some line leaves the tables
+            wdl, plies = -child[0], child[1] + 1
+            key = (wdl, -plies if wdl > 0 else plies) # Fastest win, slowest loss
+            if best is None or key > best[0]:
+                best = key, unpack_move(move), wdl, plies
+        if best is None:
+            return None
+        return best[1], best[2], best[3] if best[2] else 0
+
+_worker_tablebases: dict[str, Tablebases] = {} # Per process (tables of the captures / promotions)
+
+def generate_chunk(material: str, start: int, stop: int, directory: str) -> tuple:
+    # Successors of positions start - stop: (states, internal successor counts, successors, external results)
+    table = Table(material)
+    tablebases = _worker_tablebases.setdefault(directory, Tablebases(directory))
+    board = Board()
+    move_list = MoveList()
+    names = [board.new_piece_name(f"{'wb'[colour]}_{piece_type}") for colour, piece_type in table.pieces]
+    states, counts, successors, external = array("B"), array("H"), array("I"), {}
+    for index in range(start, stop):
+        side_to_move, squares = table.decode(index)
+        count = 0
+        state = INVALID
+        if table.valid_squares(squares):
+            board.clear()
+            for name, square in zip(names, squares):
+                board.place_piece(name, square)
+            board.side_to_move = side_to_move
+            if not in_check(board, side_to_move ^ 1):
+                state = NORMAL
+        if state == NORMAL:
+            moves = generate_legal_packed(board, move_list)
+            if not moves.count:
+                state = MATED if in_check(board, side_to_move) else STALEMATE
+            win, loss_plies, not_losing = None, 0, 0
+            for move in moves:
+                make_move(board, move)
+                if move & 0xC000: # Capture / promotion: another material
+                    result = tablebases.probe(board)
+                    if result is None:
+                        raise ValueError(f"{material} needs the table {material_key(board)[0]} (build it first)")
+                    wdl, plies = result
+                    if wdl < 0:
+                        win = plies + 1 if win is None else min(win, plies + 1)
+                    if wdl > 0:
+                        loss_plies = max(loss_plies, plies + 1)
+                    else:
+                        not_losing += 1
+                else:
+                    successors.append(table.index(side_to_move ^ 1, [board.piece_squares[name] for name in names]))
+                    count += 1
+                board.unmake_move()
+            if moves.count > count:
+                external[index] = (win, loss_plies, not_losing)
+        states.append(state)
+        counts.append(count)
+    return states, counts, successors, external
+
+def solve(size: int, states: array, counts: array, successors: array, external: dict) -> bytearray:
+    # Retrograde pass over the successor graph: positions decided in order of plies to mate
+    predecessor_start = array("I", bytes(4 * (size + 1)))
+    for successor in successors:
+        predecessor_start[successor + 1] += 1
+    for index in range(size):
+        predecessor_start[index + 1] += predecessor_start[index]
+    fill = array("I", predecessor_start)
+    predecessors = array("I", bytes(4 * len(successors)))
+    offset = 0
+    for index in range(size):
+        for successor in successors[offset:offset + counts[index]]:
+            predecessors[fill[successor]] = index
+            fill[successor] += 1
+        offset += counts[index]
+
+    values = bytearray(size)
+    decided = bytearray(size)
+    remaining = array("H", counts) # Moves not yet known to lose
+    longest = bytearray(size) # Longest loss seen so far
+    wins = [[] for _ in range(MAX_PLIES + 2)] # Candidates per ply count
+    losses = [[] for _ in range(MAX_PLIES + 2)]
+    for index in range(size):
+        state = states[index]
+        if state == INVALID:
+            values[index], decided[index] = ILLEGAL, 1
+        elif state == MATED:
+            losses[0].append(index)
+        elif state == STALEMATE:
+            decided[index] = 1
+    for index, (win, loss_plies, not_losing) in external.items():
+        remaining[index] += not_losing
+        longest[index] = loss_plies
+        if win is not None:
+            wins[win].append(index)
+        elif not remaining[index]: # Every move leaves the table and loses
+            losses[loss_plies].append(index)
+
+    for plies in range(MAX_PLIES + 1):
+        for index in losses[plies]:
+            if decided[index]:
+                continue
+            values[index], decided[index] = LOSS + plies, 1
+            for predecessor in predecessors[predecessor_start[index]:predecessor_start[index + 1]]:
+                if not decided[predecessor]:
+                    wins[plies + 1].append(predecessor)
+        for index in wins[plies]:
+            if decided[index]:
+                continue
+            values[index], decided[index] = plies, 1
+            for predecessor in predecessors[predecessor_start[index]:predecessor_start[index + 1]]:
+                if decided[predecessor]:
+                    continue
+                remaining[predecessor] -= 1
+                longest[predecessor] = max(longest[predecessor], plies + 1)
+                if not remaining[predecessor]:
+                    losses[longest[predecessor]].append(predecessor)
+    if wins[MAX_PLIES + 1] or losses[MAX_PLIES + 1]:
+        raise ValueError(f"mates longer than {MAX_PLIES} plies do not fit a table byte")
+    return values # Undecided positions stay 0 (draw)
+
+def build_table(material: str, directory: str = TABLE_DIR, workers: int = 1) -> str: # Returns the table path
+    table = Table(material)
+    ranges = [(material, start, min(start + CHUNK_POSITIONS, table.size), directory)
+              for start in range(0, table.size, CHUNK_POSITIONS)]
+    states, counts, successors, external = array("B"), array("H"), array("I"), {}
+    pool = ProcessPoolExecutor(workers, initializer=init_tables) if workers > 1 else None
+    try:
+        chunks = pool.map(generate_chunk, *zip(*ranges)) if pool is not None else (generate_chunk(*task) for task in ranges)
+        for chunk_states, chunk_counts, chunk_successors, chunk_external in chunks:
+            states.extend(chunk_states)
+            counts.extend(chunk_counts)
+            successors.extend(chunk_successors)
+            external.update(chunk_external)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    values = solve(table.size, states, counts, successors, external)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{material}.tb")
+    with open(path, "wb") as file:
+        file.write(values)
+    return path
+
+def table_stats(values) -> str:
+    wins = losses = draws = longest = 0
+    for value in values:
+        if value == ILLEGAL:
+            continue
+        if value >= LOSS:
+            losses += 1
+            longest = max(longest, value - LOSS)
+        elif value:
+            wins += 1
+        else:
+            draws += 1
+    return f"{wins} wins, {draws} draws, {losses} losses, longest mate {longest} plies"
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or probe endgame tablebases")
+    parser.add_argument("materials", nargs="*", help="tables to build, in dependency order (KQvK KRvK KPvK)")
+    parser.add_argument("--directory", default=TABLE_DIR)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--probe", default=None, help="FEN to look up")
+    args = parser.parse_args(argv)
+
+    init_tables()
+    for name in args.materials:
+        material = normalize_material(name)
+        start = time.perf_counter()
+        path = build_table(material, args.directory, args.workers)
+        with open(path, "rb") as file:
+            stats = table_stats(file.read())
+        print(f"{material}: {path} in {time.perf_counter() - start:.1f}s ({stats})")
+
+    if args.probe is not None:
+        board = Board()
+        board.load_fen(args.probe)
+        tablebases = Tablebases(args.directory)
+        result = tablebases.probe(board)
+        if result is None:
+            print("position not in the tablebases")
+            return 1
+        wdl, plies = result
+        print({1: f"win, mate in {plies} plies", 0: "draw", -1: f"loss, mated in {plies} plies"}[wdl])
+        best = tablebases.best_move(board)
+        if best is not None:
+            print("best move:", tuple_move_name(best[0]))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
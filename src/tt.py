@@ -0,0 +1,109 @@
+# Transposition table
+#
+# Fixed-size hash table of search results keyed by the board's Zobrist key.
+# Memory is set in MB up front; entries live in two flat arrays (key, packed
+# data) of two-entry buckets. On a store the bucket keeps the deeper result:
+# an entry from an older search (age) or the shallower entry is replaced.
+
+from array import array
+
+from moves import NO_MOVE
+
+# Bound types
+TT_EXACT, TT_LOWER, TT_UPPER = 1, 2, 3
+
+ENTRY_BYTES = 16 # 8 byte key + 8 byte data
+BUCKET_SIZE = 2
+SCORE_OFFSET = 1 << 15 # Scores are stored as unsigned 16-bit
+AGE_MASK = 0x3F
+
+class TranspositionTable:
+    def __init__(self, size_mb: float = 16) -> None:
+        self.resize(size_mb)
+
+    def resize(self, size_mb: float) -> None:
+        buckets = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE))
+        buckets = 1 << (buckets.bit_length() - 1) # Power of two, never above the budget
+        self.size_mb = size_mb
+        self.bucket_mask = buckets - 1
+        self.keys = array("Q", bytes(8 * buckets * BUCKET_SIZE))
+        self.data = array("Q", bytes(8 * buckets * BUCKET_SIZE))
+        self.age = 0
+        self.reset_stats()
+
+    def clear(self) -> None:
+        self.data = array("Q", bytes(8 * len(self.data)))
+        self.age = 0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0 # Stores that evicted a different position
+
+    def new_search(self) -> None: # Entries of older searches become preferred victims
+        self.age = (self.age + 1) & AGE_MASK
+
+    def probe(self, key: int) -> tuple | None: # (packed move, score, depth, bound) or None
+        self.probes += 1
+        slot = (key & self.bucket_mask) * BUCKET_SIZE
+        for index in (slot, slot + 1):
+            data = self.data[index]
+            if data and self.keys[index] == key:
+                self.hits += 1
+                return (data & 0xFFFF, (data >> 16 & 0xFFFF) - SCORE_OFFSET,
+                        data >> 32 & 0xFF, data >> 40 & 0x3)
+        return None
+
+    def store(self, key: int, move: int, score: int, depth: int, bound: int) -> None:
+        slot = (key & self.bucket_mask) * BUCKET_SIZE
+        keys, table = self.keys, self.data
+        victim = None
+        for index in (slot, slot + 1):
+            if table[index] and keys[index] == key: # Same position: keep the deeper result of this search
+                stored_depth = table[index] >> 32 & 0xFF
+                if depth < stored_depth and bound != TT_EXACT and table[index] >> 42 & AGE_MASK == self.age:
+                    return
+                if move == NO_MOVE:
+                    move = table[index] & 0xFFFF # Keep the known best move
+                victim = index
+                break
+        if victim is None:
+            victim = min((slot, slot + 1), key=self._replacement_priority)
+            if table[victim]:
+                self.replacements += 1
+
+        score = max(-SCORE_OFFSET, min(SCORE_OFFSET - 1, score))
+        keys[victim] = key
+        table[victim] = (move | (score + SCORE_OFFSET) << 16 | min(depth, 0xFF) << 32
+                         | bound << 40 | self.age << 42)
+        self.stores += 1
+
+    def _replacement_priority(self, index: int) -> int: # Lowest value is replaced first
+        data = self.data[index]
+        if not data:
+            return -1 # Empty slot
+        age_gap = (self.age - (data >> 42 & AGE_MASK)) & AGE_MASK
+        return (data >> 32 & 0xFF) - 8 * age_gap # Depth, minus a penalty per search of age
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    def usage(self) -> float: # Filled fraction (sampled)
+        sample = self.data[:min(len(self.data), 2000)]
+        return sum(1 for data in sample if data) / len(sample)
+
+    def stats(self) -> dict:
+        return {
+            "size_mb": self.size_mb,
+            "entries": len(self.data),
+            "probes": self.probes,
+            "hits": self.hits,
+            "misses": self.probes - self.hits,
+            "hit_rate": round(self.hit_rate, 4),
+            "stores": self.stores,
+            "replacements": self.replacements,
+            "usage": round(self.usage(), 4),
+        }
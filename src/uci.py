@@ -0,0 +1,337 @@
+# UCI (Universal Chess Interface) engine
+#
+# Speaks UCI over stdin / stdout so the engine runs as its own process: the
+# GUI (main.py) and tournament managers start it as a subprocess.
+#
+#   python src/uci.py
+#
+# Commands are read by an asyncio loop while the search runs in a worker
+# thread; "stop", "ponderhit" and "isready" are answered during a search
+# (the engine checks its stop flag every few thousand nodes). "go ponder" and
+# "go infinite" search without a time limit and report "bestmove" only after
+# "stop" / "ponderhit". UCIClient is the GUI side: it starts an engine
+# process and never blocks on its replies.
+
+import asyncio
+import os
+import queue
+import subprocess
+import sys
+import threading
+
+from board import *
+from bitboard import init_tables
+from rules import is_legal_move
+from engine import Engine, MATE_SCORE, MAX_PLY
+from parallel import ParallelEngine
+from book import OpeningBook
+from tablebase import Tablebases
+from moves import tuple_move_name
+
+ENGINE_NAME = "Chess Game"
+ENGINE_AUTHOR = "Chess Game developers"
+MOVE_OVERHEAD = 0.05 # Seconds kept back per move (process / pipe latency)
+DEFAULT_MOVES_TO_GO = 30
+UCI_PROMOTIONS = {"q": "queen", "r": "rook", "b": "bishop", "n": "knight"}
+
+# UCI options: name -> (type, default, extra)
+OPTIONS = {
+    "Hash": ("spin", 16, "min 1 max 1024"),
+    "Threads": ("spin", 1, "min 1 max 64"),
+    "Ponder": ("check", "false", ""),
+    "BookFile": ("string", "<empty>", ""),
+    "TablebasePath": ("string", "<empty>", ""),
+}
+
+# Helper functions
+def parse_move(board: Board, text: str) -> tuple[int, int, str | None]: # "e7e8q" -> legal move tuple
+    promotion = UCI_PROMOTIONS.get(text[4:], "") if len(text) == 5 else None
+    move = (SQUARE_INDEX.get(text[:2]), SQUARE_INDEX.get(text[2:4]), promotion)
+    if len(text) not in (4, 5) or None in move[:2] or promotion == "" or not is_legal_move(board, move):
+        raise ValueError(f"illegal move: {text}")
+    return move
+
+def position_command(board: Board) -> str: # "position fen <start> moves ..." for the moves made on the board
+    start = board.copy()
+    moves = []
+    while start.undo_stack:
+        origin, target, _, _, _, promotion, *_ = start.undo_stack[-1]
+        moves.append(tuple_move_name((origin, target, promotion)))
+        start.unmake_move()
+    command = "position startpos" if start.to_fen() == START_FEN else f"position fen {start.to_fen()}"
+    return f"{command} moves {' '.join(reversed(moves))}" if moves else command
+
+def score_text(score: int) -> str:
+    if abs(score) >= MATE_SCORE - MAX_PLY: # Mate in moves, negative when mated
+        plies = MATE_SCORE - abs(score)
+        return f"mate {(plies + 1) // 2 if score > 0 else -(plies // 2)}"
+    return f"cp {score}"
+
+def move_time(args: dict, side_to_move: int) -> float | None: # Seconds for this move, None without a time limit
+    if "movetime" in args:
+        return max(0.01, args["movetime"] / 1000 - MOVE_OVERHEAD)
+    remaining = args.get("wtime" if side_to_move == WHITE_SIDE else "btime")
+    if remaining is None:
+        return None
+    increment = args.get("winc" if side_to_move == WHITE_SIDE else "binc", 0)
+    budget = remaining / args.get("movestogo", DEFAULT_MOVES_TO_GO) + 0.8 * increment
+    return max(0.01, min(budget, remaining / 2) / 1000 - MOVE_OVERHEAD)
+
+class UCIEngine:
+    def __init__(self, output=sys.stdout) -> None:
+        self.output = output
+        self.output_lock = threading.Lock() # Lines come from the loop and the search thread
+        self.options = {name: default for name, (_, default, _) in OPTIONS.items()}
+        self.board = Board()
+        self.board.reset()
+        self.engine = None
+        self.search_task: asyncio.Task | None = None
+        self.stop_event: asyncio.Event | None = None # Set by stop / ponderhit in infinite and ponder searches
+        self.stop_timer: asyncio.TimerHandle | None = None
+        self.pondering = False
+        self.stop_requested = False # Also applied after the search thread has reset the engine's flag
+        self.ponder_time = None # Time for the move once a ponder search becomes a real one
+
+    def send(self, line: str) -> None:
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def get_engine(self) -> Engine | ParallelEngine:
+        if self.engine is None:
+            book = OpeningBook(self.options["BookFile"]) if self.options["BookFile"] != "<empty>" else None
+            tablebases = Tablebases(self.options["TablebasePath"]) if self.options["TablebasePath"] != "<empty>" else None
+            workers = int(self.options["Threads"])
+            hash_mb = int(self.options["Hash"])
+            self.engine = (Engine(hash_mb, book, tablebases) if workers == 1
+                           else ParallelEngine(workers, hash_mb, book, tablebases))
+        return self.engine
+
+    def close_engine(self) -> None:
+        if self.engine is None:
+            return
+        if isinstance(self.engine, ParallelEngine):
+            self.engine.close()
+        if self.engine.book is not None:
+            self.engine.book.close()
+        self.engine = None
+
+    async def run(self, lines: asyncio.Queue) -> None:
+        while True:
+            line = await lines.get()
+            if line is None or not await self.handle(line.strip()):
+                break
+        await self.stop_search()
+        self.close_engine()
+
+    async def handle(self, line: str) -> bool: # False on quit
+        command, _, rest = line.partition(" ")
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            for name, (kind, default, extra) in OPTIONS.items():
+                self.send(f"option name {name} type {kind} default {default}" + (f" {extra}" if extra else ""))
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(rest)
+        elif command == "ucinewgame":
+            await self.stop_search()
+            if isinstance(self.engine, ParallelEngine):
+                self.engine.clear() # Tables of every worker
+            elif self.engine is not None:
+                self.engine.tt.clear()
+        elif command == "position":
+            await self.stop_search()
+            self.set_position(rest)
+        elif command == "go":
+            await self.stop_search()
+            self.go(rest)
+        elif command == "stop":
+            self.request_stop()
+        elif command == "ponderhit":
+            self.ponder_hit()
+        elif command == "quit":
+            return False
+        elif command:
+            self.send(f"info string unknown command: {command}")
+        return True
+
+    def set_option(self, text: str) -> None: # "name Hash value 64"
+        name, _, value = text.removeprefix("name ").partition(" value ")
+        name = name.strip()
+        if name not in OPTIONS:
+            self.send(f"info string unknown option: {name}")
+            return
+        if OPTIONS[name][0] == "spin":
+            try:
+                value = int(value)
+            except ValueError:
+                self.send(f"info string bad value for {name}: {value}")
+                return
+        self.options[name] = value.strip() if isinstance(value, str) else value
+        if name in ("Hash", "Threads", "BookFile", "TablebasePath"):
+            self.close_engine() # Rebuilt with the new settings on the next search
+
+    def set_position(self, text: str) -> None: # "startpos moves e2e4" / "fen <fen> moves ..."
+        words = text.split()
+        board = Board()
+        try:
+            if words[:1] == ["startpos"]:
+                board.reset()
+                words = words[1:]
+            elif words[:1] == ["fen"]:
+                end = words.index("moves") if "moves" in words else len(words)
+                board.load_fen(" ".join(words[1:end]))
+                words = words[end:]
+            else:
+                raise ValueError("expected startpos or fen")
+            for word in words[1:] if words[:1] == ["moves"] else []:
+                board.make_move(*parse_move(board, word))
+        except (ValueError, IndexError) as error:
+            self.send(f"info string bad position: {error}")
+            return
+        self.board = board
+
+    def go(self, text: str) -> None:
+        words = text.split()
+        args = {}
+        for index, word in enumerate(words):
+            if word in ("wtime", "btime", "winc", "binc", "movestogo", "movetime", "depth", "nodes"):
+                try:
+                    args[word] = int(words[index + 1])
+                except (IndexError, ValueError):
+                    self.send(f"info string bad go argument: {word}")
+                    return
+        self.stop_requested = False
+        self.pondering = "ponder" in words
+        infinite = "infinite" in words or self.pondering
+        time_limit = move_time(args, self.board.side_to_move)
+        self.ponder_time = time_limit
+        self.stop_event = asyncio.Event() if infinite else None
+        if infinite:
+            time_limit = None # Until stop / ponderhit
+        self.search_task = asyncio.ensure_future(self.search(args.get("depth", MAX_PLY), time_limit, args.get("nodes")))
+
+    async def search(self, depth: int, time_limit: float | None, node_limit: int | None) -> None:
+        engine = self.get_engine()
+        board = self.board.copy()
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, engine.search, board, depth, time_limit, node_limit, self.send_info)
+        if self.stop_event is not None:
+            await self.stop_event.wait() # No bestmove before stop / ponderhit in infinite and ponder mode
+        if self.stop_timer is not None:
+            self.stop_timer.cancel()
+            self.stop_timer = None
+        if result.move is None:
+            self.send("bestmove 0000")
+            return
+        ponder = f" ponder {tuple_move_name(result.pv[1])}" if len(result.pv) > 1 else ""
+        self.send(f"bestmove {tuple_move_name(result.move)}{ponder}")
+
+    def send_info(self, result) -> None: # Called by the search thread after every depth
+        if self.stop_requested:
+            self.engine.stop = True # Stop that arrived before the search started
+        nps = int(result.nodes / result.elapsed) if result.elapsed > 0 else 0
+        pv = " ".join(tuple_move_name(move) for move in result.pv)
+        self.send(f"info depth {result.depth} score {score_text(result.score)} nodes {result.nodes} nps {nps} "
+                  f"time {int(result.elapsed * 1000)} pv {pv}")
+
+    def request_stop(self) -> None:
+        self.stop_requested = True
+        if self.engine is not None:
+            self.engine.stop = True
+        if self.stop_event is not None:
+            self.stop_event.set()
+
+    def ponder_hit(self) -> None: # The expected move was played: the ponder search gets the move's time
+        if not self.pondering or self.search_task is None or self.search_task.done():
+            return
+        self.pondering = False
+        self.stop_event.set() # Bestmove as soon as the search ends
+        if self.ponder_time is not None:
+            self.stop_timer = asyncio.get_running_loop().call_later(self.ponder_time, self.request_stop)
+
+    async def stop_search(self) -> None: # Ends a running search (its bestmove is still sent)
+        if self.search_task is not None and not self.search_task.done():
+            self.request_stop()
+            await self.search_task
+        self.search_task = None
+
+def start_reader(loop: asyncio.AbstractEventLoop, lines: asyncio.Queue) -> None:
+    # stdin -> queue from a daemon thread (blocking reads work on every platform and never delay the exit)
+    def read() -> None:
+        try:
+            while True:
+                line = sys.stdin.readline()
+                loop.call_soon_threadsafe(lines.put_nowait, line or None) # None: end of input
+                if not line:
+                    return
+        except RuntimeError: # Loop closed after quit
+            pass
+
+    threading.Thread(target=read, daemon=True).start()
+
+async def serve() -> None:
+    lines = asyncio.Queue()
+    start_reader(asyncio.get_running_loop(), lines)
+    await UCIEngine().run(lines)
+
+class UCIClient: # Engine subprocess: commands are written at once, replies collected by a reader thread
+    def __init__(self, command: list[str] = None, options: dict = None) -> None:
+        command = command or [sys.executable, os.path.abspath(__file__)]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        self.replies = queue.Queue()
+        self.thinking = False
+        self.last_info = None # Latest "info" line of the running search
+        threading.Thread(target=self.read, daemon=True).start()
+        self.send("uci")
+        for name, value in (options or {}).items():
+            self.send(f"setoption name {name} value {value}")
+        self.send("isready")
+
+    def read(self) -> None:
+        for line in self.process.stdout:
+            self.replies.put(line.strip())
+        self.replies.put(None) # Process ended
+
+    def send(self, line: str) -> None:
+        self.process.stdin.write(line + "\n")
+        self.process.stdin.flush()
+
+    def go(self, board: Board, move_time: float) -> None: # Starts a search; poll() gives the move
+        self.send(position_command(board))
+        self.send(f"go movetime {max(1, int(move_time * 1000))}")
+        self.thinking = True
+
+    def poll(self) -> str | None: # Best move ("e2e4") once the search is over, never waits
+        while True:
+            try:
+                line = self.replies.get_nowait()
+            except queue.Empty:
+                return None
+            if line is None:
+                self.thinking = False
+                raise RuntimeError("engine process exited")
+            if line.startswith("info"):
+                self.last_info = line
+            elif line.startswith("bestmove") and self.thinking:
+                self.thinking = False
+                return line.split()[1]
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            try:
+                self.send("quit")
+                self.process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+
+def main() -> int:
+    init_tables()
+    asyncio.run(serve())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
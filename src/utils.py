@@ -2,6 +2,8 @@ import pygame
 import os
 from typing import overload
 
+from board import *
+
 # Constants
 GRAY = (50, 50, 50)
 DARK_GRAY = (90, 90, 90)
@@ -10,48 +12,143 @@ RED = (255, 0, 0)
 
 FPS = 60
 
-pygame.font.init()
-FONT16 = pygame.font.Font(None, 16)
-FONT32 = pygame.font.Font(None, 32)
-
-# Sound fx's
-pygame.mixer.init()
-PIECE_MOVE_SOUND = pygame.mixer.Sound(os.path.join("assets", "sound_fx", "piece_move.wav"))
-PIECE_CAPTURE_SOUND = pygame.mixer.Sound(os.path.join("assets", "sound_fx", "piece_capture.wav"))
-ILLEGAL_MOVE_SOUND = pygame.mixer.Sound(os.path.join("assets", "sound_fx", "illegal_move.wav"))
-PAWN_PROMOTION_SOUND = pygame.mixer.Sound(os.path.join("assets", "sound_fx", "pawn_promotion.wav"))
+# Sound fx's (assets/sound_fx)
+SOUND_FILES = {
+    "piece_move": "piece_move.wav",
+    "piece_capture": "piece_capture.wav",
+    "illegal_move": "illegal_move.wav",
+    "pawn_promotion": "pawn_promotion.wav",
+}
 
 # Chess board constants
 BOARD_OFFSET_X, BOARD_OFFSET_Y = 50, 50
-
-WHITE_START_POSITIONS = {
-    "w_pawn1": "a2", "w_pawn2": "b2", "w_pawn3": "c2", "w_pawn4": "d2", "w_pawn5": "e2", "w_pawn6": "f2", "w_pawn7": "g2", "w_pawn8": "h2",
-    "w_rook1": "a1", "w_knight1": "b1", "w_bishop1": "c1", "w_queen0": "d1", "w_king0": "e1", "w_bishop2": "f1", "w_knight2": "g1", "w_rook2": "h1",
-}
-
-BLACK_START_POSITIONS = {
-    "b_rook1": "a8", "b_knight1": "b8", "b_bishop1": "c8", "b_queen0": "d8", "b_king0": "e8", "b_bishop2": "f8", "b_knight2": "g8", "b_rook2": "h8",
-    "b_pawn1": "a7", "b_pawn2": "b7", "b_pawn3": "c7", "b_pawn4": "d7", "b_pawn5": "e7", "b_pawn6": "f7", "b_pawn7": "g7", "b_pawn8": "h7",
-}
+NOTATION_MARGIN = 50 # Rank labels (left) & file labels (bottom) of the board surface
+WINDOW_SIZE = (1000, 800) # Window size the square size below is made for
 
 # Chess piece customizations
-SQUARE_SIZE = 80
+SQUARE_SIZE = 80 # At WINDOW_SIZE, scaled with the window
+MIN_SQUARE_SIZE = 20
 DARK_SQUARE_COLOR = (184, 139, 74)
 LIGHT_SQUARE_COLOR = (227, 193, 111)
 
-PIECE_FILES = os.listdir(os.path.join("assets", "chess_pieces"))
-
 # Global variables
 square_rects_dict, chess_pieces_dict = {}, {}
 all_pieces_group = pygame.sprite.Group()
 
+# Fonts, sounds and asset listings are created on first use, so importing
+# this module touches no pygame subsystem. main.py calls resources.init()
+# once the window exists; without an audio device (or sound files) the game
+# runs silently.
+class ResourceManager:
+    def __init__(self) -> None:
+        self.fonts: dict[int, pygame.font.Font] = {}
+        self.sounds: dict[str, pygame.mixer.Sound | None] = {}
+        self.audio: bool | None = None # None until the mixer was tried
+        self._piece_files: dict[str, list[str]] = {} # Asset directory -> file names
+
+    def init(self) -> None: # Explicit start-up (fonts & sounds up front)
+        self.font(32)
+        for name in SOUND_FILES:
+            self.sound(name)
+
+    def font(self, size: int) -> pygame.font.Font:
+        font = self.fonts.get(size)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def audio_available(self) -> bool:
+        if self.audio is None:
+            try:
+                if not pygame.mixer.get_init():
+                    pygame.mixer.init()
+                self.audio = True
+            except pygame.error: # No audio device
+                self.audio = False
+        return self.audio
+
+    def sound(self, name: str) -> pygame.mixer.Sound | None:
+        if name not in self.sounds:
+            sound = None
+            if self.audio_available():
+                try:
+                    sound = pygame.mixer.Sound(os.path.join("assets", "sound_fx", SOUND_FILES[name]))
+                except (pygame.error, FileNotFoundError): # Missing sound file
+                    sound = None
+            self.sounds[name] = sound
+        return self.sounds[name]
+
+    def play(self, name: str) -> None:
+        sound = self.sound(name)
+        if sound is not None:
+            sound.play()
+
+    def piece_files(self, theme: str = "chess_pieces") -> list[str]: # File names in assets/<theme>
+        if theme not in self._piece_files:
+            self._piece_files[theme] = sorted(os.listdir(os.path.join("assets", theme)))
+        return self._piece_files[theme]
+
+resources = ResourceManager()
+
+# Board view transform: top-left pixel of the squares, square size and
+# orientation. Pixel <-> square mapping is arithmetic in both directions;
+# square_rects_dict is rebuilt from the view whenever it changes (resize,
+# flip) for code that wants the rects themselves.
+class BoardView:
+    def __init__(self) -> None:
+        self.square_size = SQUARE_SIZE
+        self.flipped = False # Black at the bottom
+        self.update_rects()
+
+    @property
+    def origin(self) -> tuple[int, int]: # Window position of the top-left square
+        return BOARD_OFFSET_X + NOTATION_MARGIN, BOARD_OFFSET_Y
+
+    def resize(self, window_size: tuple[int, int]) -> bool: # True if the square size changed
+        margin_x, margin_y = BOARD_OFFSET_X + NOTATION_MARGIN, BOARD_OFFSET_Y + NOTATION_MARGIN # Fixed size parts
+        scale = min((window_size[0] - margin_x) / (WINDOW_SIZE[0] - margin_x), (window_size[1] - margin_y) / (WINDOW_SIZE[1] - margin_y))
+        square_size = max(MIN_SQUARE_SIZE, int(SQUARE_SIZE * scale))
+        if square_size == self.square_size:
+            return False
+        self.square_size = square_size
+        self.update_rects()
+        return True
+
+    def flip(self) -> None:
+        self.flipped = not self.flipped
+        self.update_rects()
+
+    def cell(self, index: int) -> tuple[int, int]: # Square index -> (column, row) on screen
+        file, rank = index % 8, index // 8
+        return (7 - file, rank) if self.flipped else (file, 7 - rank)
+
+    def square_at(self, pos: tuple[int, int]) -> str | None: # Pixel -> square name
+        x, y = pos[0] - self.origin[0], pos[1] - self.origin[1]
+        size = self.square_size
+        if not (0 <= x < 8 * size and 0 <= y < 8 * size):
+            return None
+        col, row = x // size, y // size
+        return SQUARE_NAMES[(row * 8 + 7 - col) if self.flipped else ((7 - row) * 8 + col)]
+
+    def square_rect(self, square: str) -> pygame.Rect: # Square name -> rect in the window
+        col, row = self.cell(SQUARE_INDEX[square])
+        size = self.square_size
+        return pygame.Rect(self.origin[0] + col * size, self.origin[1] + row * size, size, size)
+
+    def update_rects(self) -> None:
+        square_rects_dict.clear()
+        for square in SQUARE_NAMES:
+            square_rects_dict[square] = self.square_rect(square)
+
+board_view = BoardView()
+
 # Helper functions
 def get_square_rect(arg: tuple[int, int] | str) -> pygame.Rect | None:
     if isinstance(arg, tuple):
-        for rect in square_rects_dict.values():
-            if rect.collidepoint(arg):
-                return rect
-        return None
+        square = board_view.square_at(arg)
+        return square_rects_dict[square] if square is not None else None
     elif isinstance(arg, str):
         return square_rects_dict.get(arg)
     else:
@@ -59,10 +156,7 @@ def get_square_rect(arg: tuple[int, int] | str) -> pygame.Rect | None:
     
 def get_square_coord(arg: tuple[int, int]) -> str | None:
     if isinstance(arg, tuple):
-        for coord, rect in square_rects_dict.items():
-            if rect.collidepoint(arg):
-                return coord
-        return None
+        return board_view.square_at(arg)
     else:
         raise ValueError("Argument must be a tuple or a string")
 
@@ -76,15 +170,12 @@ def get_piece_name(square: str) -> str | None:
 
 def get_piece_name(arg):
     if isinstance(arg, tuple):
-        if arg is not None:
-            for piece_name, piece in chess_pieces_dict.items():
-                if piece.rect.collidepoint(arg):
-                    return piece_name
+        square = get_square_coord(arg)
+        if square is not None:
+            return board_state.get_piece_name(square)
         return None
     elif isinstance(arg, str):
-        if square_rects_dict.get(arg) is not None:
-            square_center = get_square_center(arg)
-            return get_piece_name(square_center)
+        return board_state.get_piece_name(arg)
     else:
         raise ValueError("Argument must be a tuple or a string")
 
@@ -98,39 +189,15 @@ def is_square_occupied(square_coord: str) -> bool:
 
 def is_square_occupied(arg):
     if isinstance(arg, tuple):
-        square_rect = get_square_rect(arg)
-        if square_rect is not None:
-            for piece in chess_pieces_dict.values():
-                if piece.rect.collidepoint(square_rect.center):
-                    return True
+        square = get_square_coord(arg)
+        if square is not None:
+            return board_state.is_square_occupied(square)
         return False
     elif isinstance(arg, str):
-        square_rect = get_square_rect(arg)
-        if square_rect is not None:
-            for piece in chess_pieces_dict.values():
-                if piece.rect.collidepoint(square_rect.center):
-                    return True
-        return False
+        return board_state.is_square_occupied(arg)
     else:
         raise ValueError("Argument must be a tuple or a string")
     
-# # Correct this
-# def get_piece_square(piece_name) -> str | None:
-#     piece_obj = chess_pieces_dict.get(piece_name)
-#     if piece_obj is not None:
-#         for square, square_coord in square_rects_dict.items():
-#             if square_coord.rect.collidepoint(piece_obj.center):
-#                 return square
-#     return None
-
-# def get_piece_square_center(piece_name) -> tuple | None:
-#     piece_obj = chess_pieces_dict.get(piece_name)
-#     if piece_obj is not None:
-#         for square_coord in square_rects_dict.values():
-#             if square_coord.rect.collidepoint(piece_obj.center):
-#                 return square_coord
-#     return None
-
 def get_square_center(square: str) -> tuple:
     rect: pygame.Rect = square_rects_dict.get(square, None)
     if rect is not None:
@@ -143,12 +210,3 @@ def friendly_piece(current_square: str, target_square: str) -> bool: # Check if
     if target_piece is None:
         return False
     return current_piece[0] == target_piece[0]
-
-def is_white(piece_name: str) -> bool: # Checks if piece is white
-    return piece_name[0] == "w"
-
-def has_moved(piece_name: str, current_square: str) -> bool:
-    if is_white(piece_name):
-        return WHITE_START_POSITIONS.get(piece_name) != current_square
-    else:
-        return BLACK_START_POSITIONS.get(piece_name) != current_square 
\ No newline at end of file
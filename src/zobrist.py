@@ -0,0 +1,20 @@
+# Zobrist keys
+#
+# A position key is the XOR of one random 64-bit number per (piece kind,
+# square), plus numbers for the castling rights, the en passant file and the
+# side to move. Keys come from a fixed seed so they are identical in every
+# process (worker pools, opening book files).
+
+import random
+
+ZOBRIST_SEED = 0x5EED_C4E55
+
+_random = random.Random(ZOBRIST_SEED)
+
+PIECE_KINDS = ("w_pawn", "w_knight", "w_bishop", "w_rook", "w_queen", "w_king",
+               "b_pawn", "b_knight", "b_bishop", "b_rook", "b_queen", "b_king")
+
+PIECE_KEYS = {kind: [_random.getrandbits(64) for _ in range(64)] for kind in PIECE_KINDS} # [kind][square]
+CASTLING_KEYS = [_random.getrandbits(64) for _ in range(16)] # [castling bitfield]
+EP_KEYS = [_random.getrandbits(64) for _ in range(8)] # [en passant file]
+SIDE_KEY = _random.getrandbits(64) # Black to move
@@ -0,0 +1,27 @@
+# The game modules are flat files in src/ (run as scripts), so the tests
+# import them the same way: src/ goes first on the import path.
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bitboard import init_tables
+
+@pytest.fixture(scope="session", autouse=True)
+def tables() -> None: # Attack tables used by every move generator
+    init_tables()
+
+@pytest.fixture
+def logic(monkeypatch): # The GUI's game logic at the start position, without a window
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    monkeypatch.chdir(ROOT) # Assets are found from the repository root
+    import main, logic
+    main.ui.initialize_pieces()
+    logic.update_positions()
+    yield logic
+    logic.set_move_generator("bitboard")
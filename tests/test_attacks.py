@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from board import *
+from attacks import AttackMap
+from perft import PERFT_SUITE
+from rules import generate_legal_moves
+
+START_FENS = [fen for fen, _ in PERFT_SUITE.values()] + [
+    "4k3/1P4p1/8/3pP3/8/8/6P1/R3K2R w KQ d6 0 1", # En passant, castling and promotion right away
+    "r3k2r/1P4P1/8/8/2pP4/8/1p4p1/R3K2R b KQkq d3 0 1",
+]
+
+def move_kind(move: tuple[int, int, str | None]) -> str | None: # "en passant", "castling", "promotion" or None
+    origin, target, promotion = move
+    piece_type = get_piece_type(board_state.squares[origin])
+    if piece_type == "pawn" and target == board_state.ep_square:
+        return "en passant"
+    if piece_type == "king" and abs(target - origin) == 2:
+        return "castling"
+    return "promotion" if promotion is not None else None
+
+def assert_matches_rebuild(attack_map: AttackMap) -> None:
+    full = AttackMap(board_state, attack_map.piece_class_dict)
+    assert attack_map.mobility == full.mobility
+    assert attack_map.watchers == full.watchers
+    assert attack_map.attacks == full.attacks and attack_map.attack_count == full.attack_count
+
+@pytest.mark.parametrize("generator", ["bitboard", "board"])
+def test_incremental_updates_match_a_rebuild(logic, generator: str) -> None:
+    import main # Set up without a window by the logic fixture
+    logic.set_move_generator(generator)
+    rng = random.Random(2024)
+    seen = {"en passant": 0, "castling": 0, "promotion": 0}
+    for game in range(80):
+        main.ui.initialize_pieces(START_FENS[game % len(START_FENS)])
+        logic.update_positions()
+        for _ in range(60):
+            moves = generate_legal_moves(board_state)
+            if not moves:
+                break
+            special = [move for move in moves if move_kind(move) is not None]
+            move = rng.choice(special if special and rng.random() < 0.8 else moves) # Rare moves often
+            kind = move_kind(move)
+            if kind is not None:
+                seen[kind] += 1
+            logic.play_move(*move) # Updates logic.attack_map from the changed squares
+            assert_matches_rebuild(logic.attack_map)
+    assert min(seen.values()) >= 10, seen
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import batcheval
+from board import *
+from evaluate import evaluate_position
+from perft import PERFT_SUITE
+from rules import generate_legal_moves
+
+def from_fen(fen: str) -> Board:
+    board = Board()
+    board.load_fen(fen)
+    return board
+
+def sample_boards() -> list[Board]: # Suite positions and random playouts from them
+    rng = random.Random(3)
+    boards = []
+    for fen, _ in PERFT_SUITE.values():
+        board = from_fen(fen)
+        for _ in range(12):
+            boards.append(from_fen(board.to_fen()))
+            for _ in range(rng.randint(1, 8)):
+                moves = generate_legal_moves(board)
+                if not moves:
+                    break
+                board.make_move(*rng.choice(moves))
+    return boards
+
+def test_batch_matches_scalar_evaluation() -> None:
+    pytest.importorskip("numpy")
+    boards = sample_boards()
+    scores = batcheval.evaluate_batch(*batcheval.encode_boards(boards))
+    assert [int(score) for score in scores] == [evaluate_position(board) for board in boards]
+
+def test_fen_encoding_matches_board_encoding() -> None:
+    np = pytest.importorskip("numpy")
+    boards = sample_boards()
+    from_boards = batcheval.encode_boards(boards)
+    from_fens = batcheval.encode_fens([board.to_fen() for board in boards])
+    assert np.array_equal(from_boards[0], from_fens[0]) and np.array_equal(from_boards[1], from_fens[1])
+
+def test_scalar_fallback(monkeypatch) -> None:
+    boards = sample_boards()[:20]
+    fens = [board.to_fen() for board in boards]
+    monkeypatch.setattr(batcheval, "np", None)
+    assert batcheval.evaluate_batch(*batcheval.encode_fens(fens)) == [evaluate_position(board) for board in boards]
+
+def test_bad_fen_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        batcheval.fen_bitboards("rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR x")
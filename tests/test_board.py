@@ -0,0 +1,54 @@
+import pytest
+
+from board import *
+
+def fen_of(fen: str) -> str:
+    board = Board()
+    board.load_fen(fen)
+    return board.to_fen()
+
+@pytest.mark.parametrize("fen", [
+    START_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    "8/8/8/8/8/8/k7/4K3 b - - 57 112",
+])
+def test_round_trip(fen: str) -> None:
+    assert fen_of(fen) == fen
+
+@pytest.mark.parametrize("fen, expected", [
+    ("r3k2r/8/8/8/8/8/8/R3K2R w qkQK - 0 1", "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"), # Canonical order
+    ("r3k3/8/8/8/8/8/8/4K2R w KQkq - 0 1", "r3k3/8/8/8/8/8/8/4K2R w Kq - 0 1"), # Rights need king and rook at home
+    ("4k3/8/8/8/8/8/8/4K3 w KQkq - 0 1", "4k3/8/8/8/8/8/8/4K3 w - - 0 1"),
+    ("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1", # No pawn can take: no ep square
+     "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"),
+    ("rnbqkbnr/pppp1ppp/8/8/3pP3/8/PPP2PPP/RNBQKBNR b KQkq e3 0 3", # Kept: d4 pawn takes
+     "rnbqkbnr/pppp1ppp/8/8/3pP3/8/PPP2PPP/RNBQKBNR b KQkq e3 0 3"),
+    ("4k3/8/8/8/8/8/8/4K3 w - -", "4k3/8/8/8/8/8/8/4K3 w - - 0 1"), # Clocks default
+])
+def test_normalized_fields(fen: str, expected: str) -> None:
+    assert fen_of(fen) == expected
+    assert fen_of(expected) == expected
+
+def test_clocks_and_ep_follow_the_moves() -> None:
+    board = Board()
+    board.reset()
+    fens = []
+    for origin, target in (("g1", "f3"), ("d7", "d5"), ("f3", "g1"), ("d5", "d4"), ("e2", "e4")):
+        board.make_move(SQUARE_INDEX[origin], SQUARE_INDEX[target])
+        fens.append(board.to_fen())
+    assert [" ".join(fen.split()[3:]) for fen in fens] == ["- 1 1", "- 0 2", "- 1 2", "- 0 3", "e3 0 3"]
+    loaded = Board()
+    loaded.load_fen(fens[-1])
+    assert loaded.hash == board.hash
+    for _ in fens:
+        board.unmake_move()
+    assert board.to_fen() == START_FEN
+
+@pytest.mark.parametrize("fen", ["8/8/8/8/8/8/8/8/8 w - - 0 1", "4k3/8/8/8/8/8/8/4K3 x - - 0 1",
+                                 "4k3/8/8/8/8/8/8/4K3 w X - 0 1", "4k3/8/8/8/8/8/8/4K3 w - e4 0 1",
+                                 "4k3/8/8/8/8/8/8/4K3 w - - x 1", "4k3/8/8/9/8/8/8/4K3 w - - 0 1"])
+def test_invalid_fen(fen: str) -> None:
+    with pytest.raises(ValueError):
+        Board().load_fen(fen)
@@ -0,0 +1,27 @@
+import random
+
+from board import *
+from book import OpeningBook, build_book
+from pgn import parse_san
+from test_pgn import ZERO_CASTLING_GAME
+
+SANS = "e4 e5 Nf3 Nc6 Bc4 Bc5 O-O Nf6 d3 O-O Nc3 d6".split()
+
+def test_book_covers_zero_castling_games(tmp_path) -> None:
+    pgn_path = tmp_path / "games.pgn"
+    pgn_path.write_text(ZERO_CASTLING_GAME.replace("*", "1-0") * 2)
+    book_path = str(tmp_path / "book.bin")
+    assert build_book([str(pgn_path)], book_path, plies=20) == 6 # White's moves: weight from the 1-0 results
+
+    board = Board()
+    board.reset()
+    with OpeningBook(book_path) as book:
+        for ply, san in enumerate(SANS):
+            move = parse_san(board, san)
+            if ply % 2 == 0:
+                assert book.moves(board) == [(move, 4)]
+                assert book.choose(board, random.Random(ply)) == move
+            else:
+                assert book.moves(board) == [] # Lost games give no weight
+            board.make_move(*move)
+        assert book.choose(board) is None
@@ -0,0 +1,23 @@
+from board import *
+from engine import Engine, MATE_SCORE, score_to_tt, score_from_tt
+
+def test_mate_scores_are_node_relative_in_the_table() -> None:
+    assert score_to_tt(MATE_SCORE - 5, 3) == MATE_SCORE - 2
+    assert score_to_tt(-(MATE_SCORE - 5), 3) == -(MATE_SCORE - 2)
+    assert score_to_tt(120, 3) == 120
+    for score in (MATE_SCORE - 5, -(MATE_SCORE - 7), -45):
+        assert score_from_tt(score_to_tt(score, 4), 4) == score
+
+def test_mate_distance_counts_down_with_a_reused_table() -> None:
+    board = Board()
+    board.load_fen("k3K3/8/8/1R6/8/8/8/8 w - - 0 1") # Mate in 7 plies
+    engine = Engine(4)
+    distances = []
+    while True:
+        result = engine.search(board, max_depth=10)
+        if result.move is None:
+            break
+        if board.side_to_move == WHITE_SIDE:
+            distances.append(MATE_SCORE - result.score)
+        board.make_move(*result.move)
+    assert distances == [7, 5, 3, 1]
@@ -0,0 +1,65 @@
+import mmap
+
+import pytest
+
+import fentool
+from board import *
+
+FENS = [
+    START_FEN, # 20 moves
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", # 48
+    "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3", # Checkmate
+    "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", # Stalemate
+    "# comment",
+    "",
+    "not a fen",
+    "4k3/8/8/8/8/8/8/4K2R b K - 0 1", # 5
+]
+MOVES = ["20", "48", "0", "0", None, None, "error", "5"]
+STATUS = ["-", "-", "checkmate", "stalemate", None, None, "error", "-"]
+
+def write_fens(tmp_path, repeat: int = 1, trailing_newline: bool = True) -> str:
+    path = tmp_path / "positions.fen"
+    path.write_text("\n".join(FENS * repeat) + ("\n" if trailing_newline else ""))
+    return str(path)
+
+def expected_lines(results: list, repeat: int = 1) -> list[tuple[int, str]]:
+    return [(number, result) for number, result in enumerate(results * repeat, 1) if result is not None]
+
+def read_results(path) -> list[tuple[int, str]]:
+    lines = []
+    for line in open(path):
+        number, result = line.rstrip("\n").split("\t")
+        lines.append((int(number), "error" if result.startswith("error: ") else result))
+    return lines
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_chunks_end_on_line_breaks(tmp_path, trailing_newline: bool) -> None:
+    path = write_fens(tmp_path, 3, trailing_newline)
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        ranges = fentool.chunk_ranges(buffer, 50)
+        assert ranges[0][0] == 0 and ranges[-1][1] == len(buffer)
+        assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+        assert all(buffer[end - 1:end] == b"\n" for _, end in ranges[:-1])
+        assert len(ranges) > 3
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_results_in_input_order(tmp_path, monkeypatch, workers: int) -> None:
+    path = write_fens(tmp_path, 5)
+    output = tmp_path / "moves.txt"
+    chunk_ranges = fentool.chunk_ranges
+    monkeypatch.setattr(fentool, "chunk_ranges", lambda buffer: chunk_ranges(buffer, 100)) # Many small chunks
+    assert fentool.main([path, "--workers", str(workers), "--output", str(output)]) == 1 # Bad lines are errors
+    assert read_results(output) == expected_lines(MOVES, 5)
+
+def test_check_mode(tmp_path) -> None:
+    output = tmp_path / "status.txt"
+    fentool.main([write_fens(tmp_path), "--mode", "check", "--output", str(output)])
+    assert read_results(output) == expected_lines(STATUS)
+
+def test_empty_file(tmp_path) -> None:
+    path = tmp_path / "empty.fen"
+    path.write_text("")
+    output = tmp_path / "out.txt"
+    assert fentool.main([str(path), "--output", str(output)]) == 0
+    assert output.read_text() == ""
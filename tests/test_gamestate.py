@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from board import *
+from rules import generate_legal_moves, in_check
+from gamestate import GameState
+from uci import parse_move
+from pgn import board_pgn
+
+def play(state: GameState, moves: str) -> tuple[str, str] | None:
+    outcome = None
+    for text in moves.split():
+        outcome = state.push(*parse_move(state.board, text))
+    return outcome
+
+def new_state(fen: str = START_FEN) -> GameState:
+    board = Board()
+    board.load_fen(fen)
+    return GameState(board)
+
+def reference_outcome(board: Board) -> tuple[str, str] | None: # Rescans the history: slow but plain
+    if not generate_legal_moves(board):
+        if in_check(board):
+            return ("0-1" if board.side_to_move == WHITE_SIDE else "1-0"), "checkmate"
+        return "1/2-1/2", "stalemate"
+    if board.halfmove_clock >= 100:
+        return "1/2-1/2", "fifty-move rule"
+    game = board.copy()
+    seen = 1
+    for _ in range(min(board.halfmove_clock, len(board.undo_stack))):
+        game.unmake_move()
+        seen += game.hash == board.hash
+    if seen >= 3:
+        return "1/2-1/2", "threefold repetition"
+    kinds = [get_piece_kind(piece_name) for piece_name in board.piece_squares]
+    minors = [name for name in board.piece_squares if get_piece_type(name) in ("knight", "bishop")]
+    bishop_colours = {(index // 8 + index % 8) % 2 for name, index in board.piece_squares.items()
+                      if get_piece_type(name) == "bishop"}
+    if all(kind[2:] in ("king", "knight", "bishop") for kind in kinds) and \
+            (len(minors) <= 1 or all(get_piece_type(name) == "bishop" for name in minors) and len(bishop_colours) == 1):
+        return "1/2-1/2", "insufficient material"
+    return None
+
+def test_checkmate() -> None:
+    state = new_state()
+    assert play(state, "f2f3 e7e5 g2g4 d8h4") == ("0-1", "checkmate")
+    assert state.check and state.game_over
+    assert state.status_text() == "Checkmate, 0-1"
+
+def test_stalemate() -> None:
+    assert play(new_state("7k/8/5Q2/6K1/8/8/8/8 w - - 0 1"), "f6f7") == ("1/2-1/2", "stalemate")
+
+def test_threefold_repetition() -> None:
+    state = new_state()
+    assert play(state, "g1f3 g8f6 f3g1 f6g8 g1f3 g8f6 f3g1") is None
+    assert state.repetitions[state.board.hash] == 2
+    assert play(state, "f6g8") == ("1/2-1/2", "threefold repetition")
+    state.pop()
+    assert state.outcome is None
+
+def test_fifty_move_rule() -> None:
+    state = new_state("4k3/8/8/8/8/8/8/R3K3 w - - 99 80")
+    assert play(state, "a1a2") == ("1/2-1/2", "fifty-move rule")
+
+@pytest.mark.parametrize("fen, draw", [
+    ("4k3/8/8/8/8/8/8/4K3 w - - 0 1", True),
+    ("4k3/8/8/8/8/8/8/3NK3 w - - 0 1", True),
+    ("4k3/8/8/8/8/8/8/2B1KB2 w - - 0 1", False), # Bishops on both colours
+    ("4kb2/8/8/8/8/8/8/2B1K3 w - - 0 1", True), # Bishops on one colour
+    ("4k3/8/8/8/8/8/8/2NNK3 w - - 0 1", False),
+    ("4k3/8/8/8/8/8/4P3/4K3 w - - 0 1", False),
+])
+def test_insufficient_material(fen: str, draw: bool) -> None:
+    assert (new_state(fen).outcome == ("1/2-1/2", "insufficient material")) == draw
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_games_match_the_reference(seed: int) -> None: # With take-backs
+    rng = random.Random(seed)
+    state = new_state()
+    board = state.board
+    for _ in range(400):
+        assert state.outcome == reference_outcome(board)
+        if state.outcome is not None:
+            break
+        if board.undo_stack and rng.random() < 0.05:
+            state.pop()
+        else:
+            state.push(*rng.choice(generate_legal_moves(board)))
+    while board.undo_stack:
+        state.pop()
+        assert state.outcome == reference_outcome(board)
+
+def test_pgn_export_uses_the_tracker() -> None:
+    state = new_state()
+    play(state, "f2f3 e7e5 g2g4 d8h4")
+    text = board_pgn(state.board, {}, state)
+    assert '[Result "0-1"]' in text and '[Termination "checkmate"]' in text and text.rstrip().endswith("0-1")
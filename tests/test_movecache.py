@@ -0,0 +1,64 @@
+from board import *
+from attacks import AttackMap
+from movecache import MoveCache
+from rules import legal_allowed_moves
+
+def query_all(logic) -> dict: # get_allowed_moves of every piece on the board
+    return {name: logic.get_allowed_moves(name) for name in list(board_state.piece_squares)}
+
+def fresh_answers() -> dict: # Without the cache or the incremental map
+    attack_map = AttackMap(board_state)
+    attack_map.rebuild()
+    return {name: legal_allowed_moves(board_state, name, attack_map.mobility[name]) for name in board_state.piece_squares}
+
+def unordered(answers: dict) -> dict: # Move generators list the targets in different orders
+    return {name: {kind: sorted(squares) for kind, squares in moves.items()} for name, moves in answers.items()}
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = MoveCache(2)
+    cache.put((1, 0), {"moves": ["a3"]})
+    cache.put((1, 1), {"moves": ["b3"]})
+    assert cache.get((1, 0)) == {"moves": ["a3"]} # (1, 1) is now the oldest
+    cache.put((2, 0), {"moves": []})
+    assert cache.get((1, 1)) is None and cache.get((2, 0)) == {"moves": []}
+    assert cache.stats() == {"entries": 2, "capacity": 2, "hits": 2, "misses": 1, "hit_rate": 0.6667}
+    cache.clear()
+    assert cache.get((1, 0)) is None
+
+def test_played_moves_get_fresh_answers(logic) -> None:
+    cache = logic.move_cache
+    hits = cache.hits
+    opening = query_all(logic)
+    assert cache.hits == hits # New game: every query computed
+    assert query_all(logic) == opening and cache.hits == hits + len(opening)
+
+    hits = cache.hits
+    logic.play_move(SQUARE_INDEX["e2"], SQUARE_INDEX["e4"])
+    logic.play_move(SQUARE_INDEX["d7"], SQUARE_INDEX["d5"])
+    after = query_all(logic)
+    assert cache.hits == hits and after == fresh_answers()
+    assert "d5" in after[board_state.squares[SQUARE_INDEX["e4"]]]["captures"]
+
+def test_positions_that_come_back_hit(logic) -> None:
+    opening = query_all(logic)
+    for origin, target in (("g1", "f3"), ("g8", "f6"), ("f3", "g1"), ("f6", "g8")): # Knights out and back
+        logic.play_move(SQUARE_INDEX[origin], SQUARE_INDEX[target])
+        query_all(logic)
+    hits = logic.move_cache.hits
+    assert query_all(logic) == opening and logic.move_cache.hits == hits + len(opening)
+
+    logic.play_move(SQUARE_INDEX["e2"], SQUARE_INDEX["e4"])
+    query_all(logic)
+    logic.game_state.pop() # Take-back: the earlier position and its key return
+    logic.attack_map.rebuild()
+    hits = logic.move_cache.hits
+    assert query_all(logic) == opening and logic.move_cache.hits == hits + len(opening)
+
+def test_new_position_or_generator_clears_the_cache(logic) -> None:
+    query_all(logic)
+    logic.update_positions()
+    assert logic.move_cache.stats()["entries"] == 0
+    query_all(logic)
+    logic.set_move_generator("board")
+    assert logic.move_cache.stats()["entries"] == 0
+    assert unordered(query_all(logic)) == unordered(fresh_answers())
@@ -0,0 +1,48 @@
+import threading
+import time
+
+import pytest
+
+from board import *
+from parallel import ParallelEngine
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+@pytest.fixture(scope="module")
+def engine():
+    with ParallelEngine(2, 4) as engine:
+        yield engine
+
+def start_board() -> Board:
+    board = Board()
+    board.reset()
+    return board
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_stop_is_reset_by_the_next_search(workers: int) -> None:
+    with ParallelEngine(workers, 4) as engine:
+        engine.stop = True # A "stop" after the previous search
+        result = engine.search(start_board(), max_depth=2)
+    assert result.depth == 2
+
+def test_stop_interrupts_a_running_depth(engine: ParallelEngine) -> None:
+    board = Board()
+    board.load_fen(KIWIPETE)
+    stop_time = []
+    late_iterations = [] # Depths completed after the stop: the running depth must be abandoned
+    on_iteration = lambda result: late_iterations.append(result.depth) if stop_time else None
+    results = []
+    thread = threading.Thread(target=lambda: results.append(engine.search(board, on_iteration=on_iteration))) # No limit
+    thread.start()
+    time.sleep(2.0)
+    stop_time.append(time.monotonic())
+    engine.stop = True
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert time.monotonic() - stop_time[0] < 2
+    assert late_iterations == []
+    assert results[0].move is not None
+
+def test_search_after_stop(engine: ParallelEngine) -> None:
+    engine.stop = True
+    assert engine.search(start_board(), max_depth=2).depth == 2
@@ -0,0 +1,26 @@
+import pytest
+
+from board import *
+from perft import PERFT_SUITE, MOVE_GENERATORS, perft, divide
+
+def suite_board(name: str) -> Board:
+    board = Board()
+    board.load_fen(PERFT_SUITE[name][0])
+    return board
+
+@pytest.mark.parametrize("name", sorted(PERFT_SUITE))
+def test_bitboard_node_counts(name: str) -> None:
+    board = suite_board(name)
+    fen, key = board.to_fen(), board.hash
+    depth = 4 if name == "position3" else 3
+    assert perft(board, depth) == PERFT_SUITE[name][1][depth - 1]
+    assert (board.to_fen(), board.hash) == (fen, key) # Every move taken back
+
+@pytest.mark.parametrize("name", sorted(PERFT_SUITE))
+def test_board_backend_agrees(name: str) -> None:
+    board = suite_board(name)
+    assert perft(board, 2, MOVE_GENERATORS["board"]) == PERFT_SUITE[name][1][1]
+
+def test_divide_sums_to_perft() -> None:
+    counts = divide(suite_board("kiwipete"), 2)
+    assert len(counts) == 48 and counts["e1g1"] == 43 and sum(counts.values()) == 2039
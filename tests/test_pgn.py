@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from board import *
+from rules import generate_legal_moves
+from pgn import board_pgn, movetext_sans, parse_san, read_games, validate_game
+
+ZERO_CASTLING_GAME = """[Event "Zero castling"]
+[Result "*"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 4. 0-0 Nf6 5. d3 0-0 6. Nc3 d6 *
+"""
+
+def test_movetext_sans_skips_only_move_numbers() -> None:
+    movetext = "1. e4 {comment} e5 (1... c5 2. Nf3) 2. Nf3 $1 Nc6 3... 0-0-0 ; rest of line\n4.O-O 1-0"
+    assert list(movetext_sans(movetext)) == ["e4", "e5", "Nf3", "Nc6", "0-0-0", "O-O", "1-0"]
+
+def test_zero_castling_game_is_valid() -> None:
+    game = next(read_games(ZERO_CASTLING_GAME.splitlines()))
+    assert validate_game(game) == {"plies": 12, "result": "*", "error": None}
+
+@pytest.mark.parametrize("san, target", [("O-O", "g1"), ("0-0", "g1"), ("O-O-O", "c1"), ("0-0-0", "c1")])
+def test_parse_castling(san: str, target: str) -> None:
+    board = Board()
+    board.load_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    assert parse_san(board, san) == (SQUARE_INDEX["e1"], SQUARE_INDEX[target], None)
+
+def test_illegal_move_reports_the_ply() -> None:
+    game = next(read_games(["1. e4 e5 2. Ke3 *"]))
+    assert validate_game(game)["error"].startswith("ply 3:")
+
+@pytest.mark.parametrize("seed", range(5))
+def test_round_trip(seed: int) -> None: # Export a random game (with castling sometimes), read it back, replay it
+    rng = random.Random(seed)
+    board = Board()
+    board.load_fen("r3k2r/pppq1ppp/2npbn2/2b1p3/2B1P3/2NPBN2/PPPQ1PPP/R3K2R w KQkq - 0 1")
+    for _ in range(80):
+        moves = generate_legal_moves(board)
+        if not moves:
+            break
+        castling = [move for move in moves if board.squares[move[0]][2:4] == "ki" and abs(move[1] - move[0]) == 2]
+        board.make_move(*rng.choice(castling or moves))
+    text = board_pgn(board, {"Event": "Round trip"})
+
+    game = next(read_games(text.splitlines()))
+    assert game["headers"]["FEN"] == "r3k2r/pppq1ppp/2npbn2/2b1p3/2B1P3/2NPBN2/PPPQ1PPP/R3K2R w KQkq - 0 1"
+    assert validate_game(game)["error"] is None
+    replay = Board()
+    replay.load_fen(game["headers"]["FEN"])
+    for san in movetext_sans(game["movetext"]):
+        if san in ("1-0", "0-1", "1/2-1/2", "*"):
+            break
+        replay.make_move(*parse_san(replay, san))
+    assert replay.to_fen() == board.to_fen()
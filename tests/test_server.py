@@ -0,0 +1,91 @@
+import asyncio
+import math
+
+import pytest
+
+from server import GameServer
+
+FOOLS_MATE = ["f2f3", "e7e5", "g2g4", "d8h4"]
+
+def send(server: GameServer, line: str, owned: set[int]) -> str:
+    return server.command(line.split(), owned)
+
+def test_moves_are_validated_and_mate_ends_the_game() -> None:
+    server, owned = GameServer(), set()
+    assert send(server, "new", owned) == "game 1"
+    assert send(server, "move 1 e2e5", owned).startswith("error 1 ")
+    for move in FOOLS_MATE[:-1]:
+        assert send(server, f"move 1 {move}", owned) == f"ok 1 {move} - -"
+    assert send(server, "move 1 d8h4", owned) == "ok 1 d8h4 - - 0-1 checkmate"
+    assert send(server, "moves 1", owned) == "moves 1"
+    assert send(server, "move 1 a2a3", owned) == "error 1 game over 0-1 checkmate"
+
+def test_resign_and_close() -> None:
+    server, owned = GameServer(), set()
+    send(server, "new 60 1", owned)
+    assert send(server, "move 1 e2e4", owned).startswith("ok 1 e2e4 ")
+    assert send(server, "resign 1", owned) == "over 1 1-0 resignation"
+    assert send(server, "close 1", owned) == "closed 1"
+    assert owned == set() and server.games == {}
+    assert send(server, "fen 1", owned) == "error 1 unknown game"
+
+def test_games_belong_to_their_connection() -> None:
+    server, mine, theirs = GameServer(), set(), set()
+    send(server, "new", mine)
+    for line in ("move 1 e2e4", "fen 1", "moves 1", "resign 1", "close 1"):
+        assert send(server, line, theirs) == "error 1 not your game"
+    assert send(server, "move 1 e2e4", mine) == "ok 1 e2e4 - -"
+    assert server.games[1].outcome is None
+
+def test_flag_fall_is_noticed_on_the_next_command() -> None:
+    server, owned = GameServer(), set()
+    send(server, "new 0.01 0", owned)
+    game = server.games[1]
+    game.last_time -= 1.0 # White's clock ran out while thinking
+    assert send(server, "move 1 e2e4", owned) == "error 1 game over 0-1 time forfeit"
+
+@pytest.mark.parametrize("time_control", ["nan 0", "inf 0", "60 inf", "-5 0", "0 0", "60 -1", "60", "60 1 1", "x 1"])
+def test_bad_time_controls_are_refused(time_control: str) -> None:
+    server, owned = GameServer(), set()
+    assert send(server, f"new {time_control}", owned) == "error - bad time control"
+    assert server.games == {} and owned == set()
+    assert send(server, "new 60 0.5", owned) == "game 1"
+    assert send(server, "move 1 e2e4", owned).startswith("ok 1 e2e4 ")
+
+def test_a_failing_command_keeps_the_connection() -> None:
+    async def session() -> list[str]:
+        server = GameServer()
+        listener = await asyncio.start_server(server.handle_client, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"new 60 0\n")
+            await writer.drain()
+            replies = [(await reader.readline()).decode().strip()]
+            server.games[1].clocks[0] = math.inf # Breaks clock_text: the move reply raises
+            writer.write(b"move 1 e2e4\nmoves 1\nquit\n")
+            await writer.drain()
+            replies += [(await reader.readline()).decode().split()[0] for _ in range(2)]
+            writer.close()
+        return replies
+
+    assert asyncio.run(session()) == ["game 1", "error", "moves"]
+
+def test_round_trip_over_tcp() -> None:
+    async def session() -> list[str]:
+        server = GameServer()
+        listener = await asyncio.start_server(server.handle_client, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"new\nmove 1 e2e4\nfen 1\nquit\n")
+            await writer.drain()
+            replies = [(await reader.readline()).decode().strip() for _ in range(3)]
+            assert await reader.readline() == b"" # Closed after quit
+            writer.close()
+            await asyncio.sleep(0.05) # Let the handler drop the connection's games
+            replies.append(str(len(server.games)))
+        return replies
+
+    assert asyncio.run(session()) == ["game 1", "ok 1 e2e4 - -",
+                                      "fen 1 rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1", "0"]
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from board import *
+from engine import Engine, MATE_SCORE
+from tablebase import Tablebases, build_table, decode_value
+
+@pytest.fixture(scope="module")
+def tablebases(tmp_path_factory) -> Tablebases:
+    directory = str(tmp_path_factory.mktemp("tablebases"))
+    build_table("KRvK", directory)
+    return Tablebases(directory)
+
+def position(fen: str) -> Board:
+    board = Board()
+    board.load_fen(fen)
+    return board
+
+def krk(squares: list[int], side_to_move: int, strong: str = "w") -> Board: # Strong king, weak king, rook
+    weak = "b" if strong == "w" else "w"
+    board = Board()
+    for piece, square in zip((f"{strong}_king", f"{weak}_king", f"{strong}_rook"), squares):
+        board.place_piece(piece, square)
+    board.side_to_move = side_to_move
+    board.hash = board.compute_hash()
+    return board
+
+def random_krk(rng: random.Random) -> Board:
+    return krk(rng.sample(range(64), 3), rng.choice((WHITE_SIDE, BLACK_SIDE)), rng.choice("wb"))
+
+def test_longest_mate(tablebases: Tablebases) -> None:
+    values = [decode_value(value) for value in bytes(tablebases.table("KRvK").values)]
+    assert max(plies for value, plies in filter(None, values) if value == 1) == 31 # Mate in 16 moves
+    assert max(plies for value, plies in filter(None, values) if value == -1) == 32
+
+def test_known_positions(tablebases: Tablebases) -> None:
+    assert tablebases.probe(position("k7/8/1K6/8/8/8/8/7R w - - 0 1")) == (1, 1)
+    assert tablebases.probe(position("k7/7R/1K6/8/8/8/8/8 b - - 0 1")) == (-1, 2)
+    assert tablebases.probe(position("8/8/8/8/8/3k4/8/Kr6 w - - 0 1")) == (0, 0) # Rook hangs
+    assert tablebases.probe(position("8/8/8/4k3/8/8/8/K7 w - - 0 1")) == (0, 0) # KvK needs no table
+    assert tablebases.probe(position("8/8/8/4k3/8/8/8/KQ6 w - - 0 1")) is None # No KQvK table here
+
+def test_colours_and_symmetry_agree(tablebases: Tablebases) -> None:
+    rng = random.Random(7)
+    for _ in range(200):
+        squares, side = rng.sample(range(64), 3), rng.choice((WHITE_SIDE, BLACK_SIDE))
+        value = tablebases.probe(krk(squares, side))
+        assert tablebases.probe(krk([square ^ 56 for square in squares], side ^ 1, "b")) == value # Colours swapped
+        assert tablebases.probe(krk([square ^ 7 for square in squares], side)) == value # Mirrored files
+
+def test_best_move_keeps_the_distance(tablebases: Tablebases) -> None:
+    rng = random.Random(11)
+    checked = 0
+    while checked < 100:
+        board = random_krk(rng)
+        value = tablebases.probe(board)
+        if value is None or value[0] == 0:
+            continue
+        move, wdl, plies = tablebases.best_move(board)
+        assert (wdl, plies) == value
+        board.make_move(*move)
+        after = tablebases.probe(board)
+        assert after == (-wdl, plies - 1) or plies == 1 and after is not None and after[1] == 0
+        checked += 1
+
+def test_engine_plays_the_table_move(tablebases: Tablebases) -> None:
+    board = position("2k5/3R4/8/3K4/8/8/8/8 w - - 0 1")
+    result = Engine(1, tablebases=tablebases).search(board, max_depth=1)
+    assert result.move == tablebases.best_move(board)[0]
+    assert MATE_SCORE - result.score == tablebases.probe(board)[1] == 7
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from board import *
+from uci import UCIClient, parse_move
+
+SEARCH_TIMEOUT = 30 # Seconds before a missing bestmove fails the test
+
+def wait_move(engine: UCIClient) -> str:
+    deadline = time.monotonic() + SEARCH_TIMEOUT
+    while time.monotonic() < deadline:
+        move = engine.poll()
+        if move is not None:
+            return move
+        time.sleep(0.01)
+    raise AssertionError("no bestmove")
+
+@pytest.mark.parametrize("threads", [1, 2])
+def test_consecutive_searches(threads: int) -> None:
+    board = Board()
+    board.reset()
+    engine = UCIClient(options={"Threads": threads})
+    try:
+        for _ in range(2):
+            engine.go(board, 0.3)
+            board.make_move(*parse_move(board, wait_move(engine))) # Legal, or parse_move raises
+    finally:
+        engine.close()
+    assert len(board.undo_stack) == 2
+
+def test_parse_move() -> None:
+    board = Board()
+    board.reset()
+    assert parse_move(board, "e2e4") == (SQUARE_INDEX["e2"], SQUARE_INDEX["e4"], None)
+    for text in ("e2e5", "e7e5", "e2e4q", "e2", "z9z9"):
+        with pytest.raises(ValueError):
+            parse_move(board, text)
+    board.load_fen("8/4P3/8/8/8/8/k7/4K3 w - - 0 1")
+    assert parse_move(board, "e7e8n") == (SQUARE_INDEX["e7"], SQUARE_INDEX["e8"], "knight")
+    with pytest.raises(ValueError):
+        parse_move(board, "e7e8")
+
+@pytest.mark.parametrize("threads", [1, 2])
+def test_stop_infinite_then_search(threads: int) -> None:
+    board = Board()
+    board.reset()
+    engine = UCIClient(options={"Threads": threads})
+    try:
+        engine.send("position startpos")
+        engine.send("go infinite")
+        engine.thinking = True
+        time.sleep(0.5)
+        engine.send("stop")
+        wait_move(engine)
+        engine.last_info = None
+        engine.go(board, 0.3) # The stop must not carry over
+        wait_move(engine)
+        assert engine.last_info is not None and " depth 0 " not in engine.last_info
+    finally:
+        engine.close()
+
+def search_nodes(engine: UCIClient) -> int: # Nodes of a fixed depth search from the start position
+    engine.send("position startpos")
+    engine.send("go depth 4")
+    engine.thinking = True
+    wait_move(engine)
+    fields = engine.last_info.split()
+    return int(fields[fields.index("nodes") + 1])
+
+@pytest.mark.parametrize("threads", [1, 2])
+def test_ucinewgame_clears_the_tables(threads: int) -> None:
+    engine = UCIClient(options={"Threads": threads})
+    try:
+        fresh = search_nodes(engine)
+        again = search_nodes(engine) # Same search: answered from the tables
+        assert again < fresh
+        engine.send("ucinewgame")
+        assert search_nodes(engine) > again # Empty tables: searched out again (which worker takes which share varies)
+    finally:
+        engine.close()